@@ -0,0 +1,80 @@
+#benchmark for DBDMatchLogFileLoader over a synthetic log, run it from this directory with ../src on PYTHONPATH:
+#python loaderbenchmark.py [database url] [line count]
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from classutil import DBDMatchParser, DBDMatchLogFileLoader, parseDateHeader, LOG_DATE_FORMAT
+from database import Database
+from parserbenchmark import SAMPLE_LINES
+from util import isDateString
+
+GAMES_PER_DAY = 12
+
+
+def writeSyntheticLog(path: str, lineCount: int) -> None:
+    with open(path, mode='w', encoding='utf-8') as f:
+        for i in range(lineCount):
+            day = i // (GAMES_PER_DAY + 1)
+            if i % (GAMES_PER_DAY + 1) == 0:
+                f.write(f"{day % 28 + 1:02} {day // 28 % 12 + 1:02} {2020 + day // 336}\n")
+            else:
+                f.write(SAMPLE_LINES[i % len(SAMPLE_LINES)] + '\n')
+
+
+def strptimeDateHeader(line: str):
+    #what the loader did before: isDateString parses the line and then it is parsed again on success
+    return datetime.strptime(line, LOG_DATE_FORMAT) if isDateString(line, LOG_DATE_FORMAT) else None
+
+
+def benchmarkDateDetection(lines: list[str], detect) -> float:
+    start = time.perf_counter()
+    for line in lines:
+        detect(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def benchmarkLoad(loader: DBDMatchLogFileLoader, path: str, lineCount: int) -> float:
+    start = time.perf_counter()
+    loader.load(path)
+    return lineCount / (time.perf_counter() - start)
+
+
+def benchmarkRead(loader: DBDMatchLogFileLoader, path: str, lineCount: int) -> float:
+    start = time.perf_counter()
+    reader, _ = loader._openReader(path, None)
+    for _, rawLine in reader:
+        rawLine.decode(loader.encoding)
+    return lineCount / (time.perf_counter() - start)
+
+
+def benchmarkSplit(loader: DBDMatchLogFileLoader, path: str, lineCount: int) -> float:
+    start = time.perf_counter()
+    loader.splitIntoChunks(path)
+    return lineCount / (time.perf_counter() - start)
+
+
+def main() -> None:
+    dbUrl = sys.argv[1] if len(sys.argv) > 1 else 'sqlite:///../dbd-match-log.db'
+    lineCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    Database.init(dbUrl)
+    parser = DBDMatchParser(Database.instance().newResourceInstance())
+    loader = DBDMatchLogFileLoader(parser)
+    mappedLoader = DBDMatchLogFileLoader(parser, useMemoryMap=True)
+    with tempfile.TemporaryDirectory() as tempDir:
+        path = os.path.join(tempDir, 'log.txt')
+        writeSyntheticLog(path, lineCount)
+        with open(path, encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+        print(f"Date detection with strptime over {lineCount:,} lines: {benchmarkDateDetection(lines, strptimeDateHeader):,.0f} lines/sec")
+        print(f"Date detection with parseDateHeader over {lineCount:,} lines: {benchmarkDateDetection(lines, parseDateHeader):,.0f} lines/sec")
+        for name, l in (('file object', loader), ('memory map', mappedLoader)):
+            print(f"Read {lineCount:,} lines through a {name}: {benchmarkRead(l, path, lineCount):,.0f} lines/sec")
+            print(f"Split {lineCount:,} lines into chunks through a {name}: {benchmarkSplit(l, path, lineCount):,.0f} lines/sec")
+            print(f"Loaded {lineCount:,} lines through a {name}: {benchmarkLoad(l, path, lineCount):,.0f} lines/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#micro-benchmark for DBDMatchParser.parse, run it from this directory with ../src on PYTHONPATH:
+#python parserbenchmark.py [database url] [line count]
+import sys
+import time
+from datetime import date
+
+from classutil import DBDMatchParser, DBDResources, _tokenizeMatchLine
+from database import Database
+from util import EditDistanceIndex, levenshteinDistance
+
+SAMPLE_LINES = [
+    "Hillbilly, 2 kills, (tinkerer I, enduring III, lightborn III), 23196 points, "
+    "add ons: apex muffler, map: rancid abattoir, offering: black ward, "
+    "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6",
+    "Hillbilly, 1 kill, 2 moris, 1 disconnect (tinkerer I, enduring III, lightborn III), 23196 points, "
+    "add ons: apex muffler, iridescent brick, map: rancid abattoir, offering: black ward, "
+    "survivors: [Jeff: sacrificed, Yui: killed, David: killed, Meg: disconnected], rank: 6",
+    "Spirit, 4 kills, (tinkerer I, enduring III, lightborn III), 30102 points, "
+    "add ons: zori, map: rancid abattoir, offering: black ward, "
+    "survivors: [Jeff, Yui, David, Meg], rank: 3",
+    "Bill, sacrificed, (we're gonna live forever III, dead hard I, unbreakable III, "
+    "borrowed time III), 20100 points, item: commodious toolbox, add ons: wire spool, "
+    "scraps (against legion), map: wreckers' yard, offering: white ward, rank: 10, party size: 1",
+    "Bill, escaped, (we're gonna live forever III, dead hard I, unbreakable III, "
+    "borrowed time III), 20100 points, item: none, add ons: none (against legion), "
+    "map: wreckers' yard, offering: white ward, rank: 10, party size: 2",
+]
+
+#the same lines with misspelled perks, add-ons, maps and offerings, for parsers with fuzzy matching
+MISSPELLED_LINES = [line.replace('tinkerer', 'tinkrer').replace('apex muffler', 'apex mufler').replace('rancid abattoir', 'rancid abatoir')
+                    .replace('black ward', 'black wrd').replace('borrowed time', 'borowed time').replace('wire spool', 'wire spol')
+                    for line in SAMPLE_LINES]
+
+
+def benchmark(parser: DBDMatchParser, lines: list[str]) -> float:
+    parser.setMatchDate(date(2021, 5, 21))
+    start = time.perf_counter()
+    for line in lines:
+        parser.parse(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def benchmarkTokenizer(lines: list[str]) -> float:
+    start = time.perf_counter()
+    for line in lines:
+        _tokenizeMatchLine(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def benchmarkFuzzySearch(resources: DBDResources, searchCount: int) -> tuple[float, float]:
+    #searches/sec for names with one character left out, through the index and through a scan computing every distance
+    names = sorted({p.perkName.lower() for p in resources.perks} | {a.addonName.lower() for a in resources.addons} |
+                   {o.offeringName.lower() for o in resources.offerings} | {m.mapName.lower() for r in resources.realms for m in r.maps})
+    queries = [name[:len(name) // 2] + name[len(name) // 2 + 1:] for name in names]
+    queries = [queries[i % len(queries)] for i in range(searchCount)]
+    index = EditDistanceIndex(names)
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, 3)
+    indexRate = searchCount / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for query in queries:
+        sorted((d, name) for name in names if (d := levenshteinDistance(query, name)) <= 3)
+    return indexRate, searchCount / (time.perf_counter() - start)
+
+
+def main() -> None:
+    dbUrl = sys.argv[1] if len(sys.argv) > 1 else 'sqlite:///../dbd-match-log.db'
+    lineCount = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    Database.init(dbUrl)
+    parser = DBDMatchParser(Database.instance().newResourceInstance())
+    lines = [SAMPLE_LINES[i % len(SAMPLE_LINES)] for i in range(lineCount)]
+    benchmark(parser, lines[:len(SAMPLE_LINES)])  # warm-up
+    print(f"Parsed {lineCount:,} lines: {benchmark(parser, lines):,.0f} lines/sec")
+    print(f"Tokenized {lineCount:,} lines: {benchmarkTokenizer(lines):,.0f} lines/sec")
+    fuzzyParser = DBDMatchParser(parser.resources, fuzzyMatching=True)
+    misspelledLines = [MISSPELLED_LINES[i % len(MISSPELLED_LINES)] for i in range(lineCount)]
+    print(f"Parsed {lineCount:,} misspelled lines with fuzzy matching: {benchmark(fuzzyParser, misspelledLines):,.0f} lines/sec")
+    newFuzzyParser = DBDMatchParser(parser.resources, fuzzyMatching=True)
+    print(f"Parsed {len(MISSPELLED_LINES):,} misspelled lines with a new fuzzy matching parser: "
+          f"{benchmark(newFuzzyParser, MISSPELLED_LINES):,.0f} lines/sec")
+    indexRate, scanRate = benchmarkFuzzySearch(parser.resources, 200)
+    print(f"Fuzzy name search: {indexRate:,.0f} searches/sec with the index, {scanRate:,.0f} searches/sec scanning every name")
+    for section, info in parser.cacheInfo().items():
+        print(f"{section.capitalize()} cache: {info.hits:,} hits, {info.misses:,} misses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#counts the statements and time it takes to load matches for the match list and for the statistics, run it from this
+#directory with ../src on PYTHONPATH:
+#python querybenchmark.py [database file] [match count]
+#the database file is copied first, nothing is written to it
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.orm import subqueryload
+
+from classutil import DBDMatchParser
+from database import Database
+from models import KillerMatch, SurvivorMatch, MATCH_LIST_LOAD_OPTIONS
+from parserbenchmark import SAMPLE_LINES
+
+GAMES_PER_DAY = 12
+
+
+def subqueryLoadEverything(mapper, path=None, visited=()) -> list:
+    #what lazy='subquery' on every relationship used to do: each relationship, and each of theirs, gets a subquery load
+    options = []
+    for relationshipProperty in mapper.relationships:
+        target = relationshipProperty.mapper
+        if target in visited:
+            continue
+        attribute = getattr(mapper.class_, relationshipProperty.key)
+        loader = subqueryload(attribute) if path is None else path.subqueryload(attribute)
+        options.append(loader)
+        options += subqueryLoadEverything(target, loader, visited + (mapper,))
+    return options
+
+
+def countStatements(engine: sqlalchemy.engine.Engine, query) -> tuple[int, float]:
+    statements = []
+    listener = lambda connection, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        start = time.perf_counter()
+        query()
+        return len(statements), time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+
+def main() -> None:
+    dbPath = sys.argv[1] if len(sys.argv) > 1 else '../dbd-match-log.db'
+    matchCount = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as tempDir:
+        copyPath = os.path.join(tempDir, 'matches.db')
+        shutil.copyfile(dbPath, copyPath)
+        Database.init(f'sqlite:///{copyPath}')
+        parser = DBDMatchParser(Database.instance().newResourceInstance())
+        firstDate = date(2021, 5, 21)
+        matches = []
+        for i in range(matchCount):
+            parser.setMatchDate(firstDate + timedelta(days=i // GAMES_PER_DAY))
+            matches.append(parser.parse(SAMPLE_LINES[i % len(SAMPLE_LINES)]))
+        Database.instance().saveMatches(matches)
+        engine = Database.instance()._engine
+
+        legacyOptions = {m: subqueryLoadEverything(sqlalchemy.inspect(m)) for m in (KillerMatch, SurvivorMatch)}
+
+        def loadWithSubqueries(matchType, options, *criteria):
+            with Database.instance().getNewSession() as s:
+                return s.query(matchType).options(*legacyOptions[matchType]).filter(*criteria).all()
+
+        Database.instance().referenceData #loaded once per process, like at startup
+        strategies = [
+            ('subquery loads everywhere', loadWithSubqueries),
+            ('per use case options and shared resources', Database.instance().loadMatches)
+        ]
+        for name, loadMatches in strategies:
+            def loadMatchList(): #one day of matches, like MainWindow.__filterMatches
+                for matchType in (KillerMatch, SurvivorMatch):
+                    loadMatches(matchType, MATCH_LIST_LOAD_OPTIONS, matchType.matchDate == firstDate)
+
+            statementCount, seconds = countStatements(engine, loadMatchList)
+            print(f"match list with {name}: {statementCount} statements, {seconds * 1000:,.1f}ms")
+
+        def loadStatisticsMatches(): #every mapped match, what the statistics used to be calculated from
+            for matchType in (KillerMatch, SurvivorMatch):
+                loadWithSubqueries(matchType, None)
+
+        statementCount, seconds = countStatements(engine, loadStatisticsMatches)
+        print(f"statistics as mapped matches with subquery loads everywhere: {statementCount} statements, {seconds * 1000:,.1f}ms")
+        statementCount, seconds = countStatements(engine, Database.instance().loadMatchFrames)
+        print(f"statistics as integer frames: {statementCount} statements, {seconds * 1000:,.1f}ms")
+        statementCount, seconds = countStatements(engine, Database.instance().loadMatchAggregates) #what MainWindow.__calculateStatistics loads now
+        print(f"statistics as match aggregates: {statementCount} statements, {seconds * 1000:,.1f}ms")
+        Database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#compares the ORM unit of work save with Database.saveMatchRecords and the SQLite profiles, run it from this directory with ../src on PYTHONPATH:
+#python savebenchmark.py [database file] [match count]
+#the database file is copied first, nothing is written to it
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+from classutil import DBDMatchParser, matchToRecord
+from database import Database, SQLITE_PROFILES
+from models import KillerMatch
+from parserbenchmark import SAMPLE_LINES
+
+
+def rowCount(matches: list) -> int:
+    #match rows plus perk, add-on and faced survivor rows
+    return sum(1 + len(m.perks) + len(m.killerAddons if isinstance(m, KillerMatch) else m.itemAddons) +
+               len(m.facedSurvivors if isinstance(m, KillerMatch) else ()) for m in matches)
+
+
+def saveWithOrm(matches: list) -> None:
+    with Database.instance().getNewSession() as s:
+        s.add_all(matches)
+        s.commit()
+
+
+def saveWithCoreInserts(matches: list) -> None:
+    Database.instance().saveMatchRecords([matchToRecord(m) for m in matches])
+
+
+def saveInChunks(matches: list) -> None:
+    for _ in Database.instance().iterSaveMatches(matches):
+        pass
+
+
+def benchmark(dbPath: str, tempDir: str, matchCount: int, saveFunc, sqliteProfile: str) -> float:
+    Database.close()
+    copyPath = os.path.join(tempDir, f'{saveFunc.__name__}-{sqliteProfile}.db')
+    shutil.copyfile(dbPath, copyPath)
+    Database.init(f'sqlite:///{copyPath}', sqliteProfile=sqliteProfile)
+    parser = DBDMatchParser(Database.instance().newResourceInstance())
+    parser.setMatchDate(date(2021, 5, 21))
+    matches = [parser.parse(SAMPLE_LINES[i % len(SAMPLE_LINES)]) for i in range(matchCount)]
+    start = time.perf_counter()
+    saveFunc(matches)
+    return rowCount(matches) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    dbPath = sys.argv[1] if len(sys.argv) > 1 else '../dbd-match-log.db'
+    matchCount = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as tempDir:
+        for saveFunc in (saveWithOrm, saveWithCoreInserts, saveInChunks):
+            for profile in SQLITE_PROFILES:
+                rowsPerSecond = benchmark(dbPath, tempDir, matchCount, saveFunc, profile)
+                print(f"Saved {matchCount:,} matches with {saveFunc.__name__}, '{profile}' SQLite profile: {rowsPerSecond:,.0f} rows/sec")
+        Database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#times StatisticsCalculator against the object column implementation it replaced (test/statisticsreference.py),
+#run it from this directory with ../src on PYTHONPATH:
+#python statisticsbenchmark.py [database url] [match count]
+import sys
+import time
+from datetime import date, timedelta
+
+from classutil import DBDMatchParser
+from database import Database
+from models import KillerMatch, SurvivorMatch
+from parserbenchmark import SAMPLE_LINES
+from statistics import StatisticsCalculator
+
+sys.path.append('../test')
+from statisticsreference import ReferenceStatisticsCalculator
+
+GAMES_PER_DAY = 12
+
+
+def timeCalculations(calculator) -> dict[str, float]:
+    times = {}
+    for calculate in (calculator.calculateGeneral, calculator.calculateKillerGeneral, calculator.calculateSurvivorGeneral):
+        start = time.perf_counter()
+        calculate()
+        times[calculate.__name__] = time.perf_counter() - start
+    return times
+
+
+def main() -> None:
+    dbUrl = sys.argv[1] if len(sys.argv) > 1 else 'sqlite:///../dbd-match-log.db'
+    matchCount = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    Database.init(dbUrl)
+    resources = Database.instance().referenceData
+    parser = DBDMatchParser(resources)
+    matches = []
+    for i in range(matchCount):
+        parser.setMatchDate(date(2021, 5, 21) + timedelta(days=i // GAMES_PER_DAY))
+        matches.append(parser.parse(SAMPLE_LINES[i % len(SAMPLE_LINES)]))
+    killerMatches = [m for m in matches if isinstance(m, KillerMatch)]
+    survivorMatches = [m for m in matches if isinstance(m, SurvivorMatch)]
+
+    for name, calculatorType in (('object columns', ReferenceStatisticsCalculator), ('match frames', StatisticsCalculator)):
+        calculator = calculatorType(killerMatches, survivorMatches, resources)
+        for calculation, seconds in timeCalculations(calculator).items():
+            print(f"{calculation} over {matchCount:,} matches with {name}: {seconds * 1000:,.1f}ms")
+    Database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#compares the memory of the statistics frames and the time of a per-character groupby for object columns of resources
+#(test/statisticsreference.py), 64 bit integer ids and the compact integer and categorical columns StatisticsCalculator uses.
+#run it from this directory with ../src on PYTHONPATH:
+#python statisticsmemorybenchmark.py [database url] [match count]
+import sys
+import time
+from dataclasses import fields
+from datetime import date, timedelta
+
+import pandas as pd
+
+from classutil import DBDMatchParser
+from database import Database
+from models import KillerMatch, SurvivorMatch
+from parserbenchmark import SAMPLE_LINES
+from statistics import StatisticsCalculator, MatchFrames
+
+sys.path.append('../test')
+from statisticsreference import ReferenceStatisticsCalculator
+
+GAMES_PER_DAY = 12
+
+
+def megabytes(frames: list[pd.DataFrame]) -> float:
+    return sum(f.memory_usage(index=True, deep=True).sum() for f in frames) / 2 ** 20
+
+
+def widened(frame: pd.DataFrame) -> pd.DataFrame:
+    #the same ids and codes as plain int64 columns
+    return frame.astype({name: 'int64' for name, dtype in frame.dtypes.items() if not pd.api.types.is_datetime64_dtype(dtype)})
+
+
+def groupbyTime(frame: pd.DataFrame, column: str, repeats: int = 10) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        frame.groupby(column, sort=False).size()
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> None:
+    dbUrl = sys.argv[1] if len(sys.argv) > 1 else 'sqlite:///../dbd-match-log.db'
+    matchCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    Database.init(dbUrl)
+    resources = Database.instance().referenceData
+    parser = DBDMatchParser(resources)
+    matches = []
+    for i in range(matchCount):
+        parser.setMatchDate(date(2021, 5, 21) + timedelta(days=i // GAMES_PER_DAY))
+        matches.append(parser.parse(SAMPLE_LINES[i % len(SAMPLE_LINES)]))
+    killerMatches = [m for m in matches if isinstance(m, KillerMatch)]
+    survivorMatches = [m for m in matches if isinstance(m, SurvivorMatch)]
+
+    reference = ReferenceStatisticsCalculator(killerMatches, survivorMatches, resources)
+    frames = StatisticsCalculator(killerMatches, survivorMatches, resources).frames
+    compactFrames = [getattr(frames, f.name) for f in fields(MatchFrames)]
+    layouts = [
+        ('object columns', [reference.killerGamesDf, reference.survivorGamesDf], reference.killerGamesDf, 'killer'),
+        ('int64 ids', [widened(f) for f in compactFrames], widened(frames.killerMatches), 'killerID'),
+        ('compact ids and categoricals', compactFrames, frames.killerMatches, 'killerID')
+    ]
+    for name, layout, killerFrame, killerColumn in layouts:
+        print(f"{name}: {megabytes(layout):,.1f}MB for {matchCount:,} matches, "
+              f"games per killer groupby {groupbyTime(killerFrame, killerColumn) * 1000:,.2f}ms")
+    Database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QDialog, QHBoxLayout, QVBoxLayout, QPushButton, QListWidget, QLabel, QTabWidget, \
-    QGridLayout
+    QGridLayout, QProgressBar
 
 from guicontrols import PaginatedMatchListWidget
 from models import DBDMatch, SurvivorMatch, KillerMatch
@@ -11,12 +11,14 @@ from util import confirmation
 
 class LoadedGamesDisplayDialog(QDialog):
 
-    def __init__(self, games: list[DBDMatch], errors: list[str], title="PyQt5 dialog", dialogSize=(1000,750), parent=None):
+    def __init__(self, games: list[DBDMatch], errors: list[str], title="PyQt5 dialog", dialogSize=(1000,750), loading=False, parent=None):
+        #with loading the games come in with addGames while the files are still being read, they can't be accepted before finishLoading
         super().__init__(parent)
         self.games = games
         self.survivorGames = list(filter(lambda g: isinstance(g, SurvivorMatch), self.games))
         self.killerGames = list(filter(lambda g: isinstance(g, KillerMatch), self.games))
         self.errors = errors
+        self.loading = loading
         self.resize(*dialogSize)
         self.setWindowTitle(title)
         #setup code
@@ -35,13 +37,22 @@ class LoadedGamesDisplayDialog(QDialog):
 
 
         discardButton = QPushButton("Discard")
-        acceptButton = QPushButton("Accept")
-        acceptButton.clicked.connect(self.accept)
+        self.acceptButton = QPushButton("Accept")
+        self.acceptButton.clicked.connect(self.accept)
+        self.acceptButton.setEnabled(not loading)
         discardButton.clicked.connect(lambda: closeDialog())
+        self.loadingLabel = QLabel("Loading...")
+        self.loadingProgressBar = QProgressBar()
+        self.loadingProgressBar.setRange(0, 0)
+        self.loadingProgressBar.setFixedWidth(250)
+        self.loadingLabel.setVisible(loading)
+        self.loadingProgressBar.setVisible(loading)
+        buttonsLayout.addWidget(self.loadingLabel)
+        buttonsLayout.addWidget(self.loadingProgressBar)
         buttonsLayout.addStretch(1)
-        buttonsLayout.addWidget(acceptButton)
+        buttonsLayout.addWidget(self.acceptButton)
         buttonsLayout.addWidget(discardButton)
-        buttonsLayout.setAlignment(acceptButton, Qt.AlignRight)
+        buttonsLayout.setAlignment(self.acceptButton, Qt.AlignRight)
         buttonsLayout.setAlignment(discardButton,Qt.AlignRight)
         gamesDisplayLayout = QVBoxLayout()
         errorsDisplayLayout = QVBoxLayout()
@@ -59,3 +70,30 @@ class LoadedGamesDisplayDialog(QDialog):
         errorsDisplayLayout.addWidget(errorsLabel)
         errorsDisplayLayout.addWidget(self.errorsListWidget)
         self.errorsListWidget.addItems(self.errors if len(self.errors) > 0 else ('No errors',))
+
+    def addGames(self, games: list[DBDMatch], errors: list[str]):
+        if len(errors) > 0 and len(self.errors) == 0:
+            self.errorsListWidget.clear() #the 'No errors' item
+        self.games += games
+        self.errors += errors
+        #the list widgets extend self.killerGames and self.survivorGames, they hold the same lists
+        self.killerGamesListWidget.addItems([g for g in games if isinstance(g, KillerMatch)])
+        self.survivorGamesListWidget.addItems([g for g in games if isinstance(g, SurvivorMatch)])
+        self.errorsListWidget.addItems(errors)
+        self.loadingLabel.setText(f"Loading... {len(self.games)} matches loaded")
+
+    def setLoadingProgress(self, done: int, total: int):
+        self.loadingProgressBar.setRange(0, total)
+        self.loadingProgressBar.setValue(done)
+
+    def failLoading(self, message: str):
+        #the games read before the error stay visible, but without the checkpoints of their files they can't be accepted
+        self.loading = False
+        self.loadingLabel.setText(f"Loading failed: {message}")
+        self.loadingProgressBar.setVisible(False)
+
+    def finishLoading(self):
+        self.loading = False
+        self.loadingLabel.setVisible(False)
+        self.loadingProgressBar.setVisible(False)
+        self.acceptButton.setEnabled(True)
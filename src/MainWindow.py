@@ -1,11 +1,9 @@
 from __future__ import annotations
 
 import datetime
-import operator
-from typing import Callable
+import os
+from typing import Callable, Optional
 
-import sqlalchemy
-import sqlalchemy.orm
 from PyQt5 import QtGui
 from PyQt5.QtCore import *
 from PyQt5.QtGui import QKeySequence
@@ -15,23 +13,27 @@ from PyQt5.QtWidgets import QMainWindow, QWidget, QGridLayout, QHBoxLayout, QVBo
 
 from LoadedGamesDisplayDialog import LoadedGamesDisplayDialog
 from StatisticsWindow import StatisticsWindow
-from classutil import DBDMatchParser, DBDMatchLogFileLoader, LogFileLoadWorker
+from classutil import DBDMatchParser, DBDMatchLogFileLoader, LogFileLoadWorker, matchToRecord
 from database import Database, DatabaseUpdateWorker, DatabaseMatchListSaveWorker
 from globaldata import Globals
 from guicontrols import KillerSelect, AddonSelection, FacedSurvivorSelectionWindow, PerkSelection, \
     OfferingSelection, MapSelect, SurvivorSelect, SurvivorItemSelect, DBDMatchListItem
 from models import KillerAddon, KillerMatch, KillerMatchPerk, \
     MatchKillerAddon, DBDMatch, ItemAddon, PerkType, SurvivorMatchResult, SurvivorMatchPerk, MatchItemAddon, \
-    SurvivorMatch, FacedSurvivorState, Realm, GameMap
-from statistics import StatisticsCalculator
+    SurvivorMatch, FacedSurvivorState, LogFileCheckpoint, MATCH_LIST_LOAD_OPTIONS
+from statistics import StatisticsCalculator, StatisticsCache, StatisticsFilter, MatchTimeSeries, MatchFrames
 from util import setQWidgetLayout, nonNegativeIntValidator, addWidgets, splitUpper, confirmation
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, parent=None, title='PyQt5 Application', windowSize=(800,600)):
+    def __init__(self, parent=None, title='PyQt5 Application', windowSize=(800,600), statisticsCache: Optional[StatisticsCache] = None):
         super(MainWindow, self).__init__(parent=parent)
-        self.resources = Database.instance().newResourceInstance()
+        self.resources = Database.instance().referenceData
+        self.statisticsCache = statisticsCache
+        self.timeSeries: Optional[MatchTimeSeries] = None #of all matches, appended to on saves
+        self.timeSeriesVersion: Optional[str] = None
         self.currentlyAddedMatches: list[DBDMatch] = []
+        self.pendingCheckpoints: dict[str, LogFileCheckpoint] = {} #checkpoints of loaded log files, saved with the matches
         self.setWindowTitle(title)
         self.setContentsMargins(5, 5, 5, 5)
         self.resize(windowSize[0], windowSize[1])
@@ -196,10 +198,8 @@ class MainWindow(QMainWindow):
             return
         listWidget.clear()
         filterDate = datetime.datetime.strptime(dateStr, '%d/%m/%Y').date()
-        with Database.instance().getNewSession() as s:
-            items = map(operator.itemgetter(0), s.execute(sqlalchemy.select(matchType).where(matchType.matchDate == filterDate)).all())
-            for item in items:
-                self.__addMatchToList(listWidget, item)
+        for item in Database.instance().loadMatches(matchType, MATCH_LIST_LOAD_OPTIONS, matchType.matchDate == filterDate):
+            self.__addMatchToList(listWidget, item)
 
     def __onMatchAdded(self, match: DBDMatch, listWidget: QListWidget, clearInputsFunc: Callable):
         clearInputsFunc()
@@ -335,57 +335,99 @@ class MainWindow(QMainWindow):
         menubar.setCornerWidget(self.unsavedChangesLabel, Qt.TopRightCorner)
 
     def __calculateStatistics(self):
-        with Database.instance().getNewSession() as s:
-            #this query is needed to avoid the DetachedInstanceException
-            realms = s.query(Realm).options(sqlalchemy.orm.subqueryload(Realm.maps, GameMap.realm)).all()
-            killerMatches = s.query(KillerMatch).all()
-            survivorMatches = s.query(SurvivorMatch).all()
-        calc = StatisticsCalculator(killerMatches, survivorMatches, self.resources)
+        calculatorFactory = lambda statisticsFilter: StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(statisticsFilter), self.resources)
 
         def deleteStatsWindowReference():
             if self.statsWindow is not None:
                 del self.statsWindow
                 self.statsWindow = None
 
-        self.statsWindow = StatisticsWindow(calc)
+        self.statsWindow = StatisticsWindow(self.resources, calculatorFactory, self.statisticsCache, Database.instance().contentVersion(),
+                                            timeSeriesFactory=self.__loadTimeSeries)
         self.statsWindow.setModal(True)
         self.statsWindow.closing.connect(deleteStatsWindowReference)
         self.statsWindow.exec_()
 
+    def __loadTimeSeries(self, statisticsFilter: StatisticsFilter) -> MatchTimeSeries:
+        if not statisticsFilter.isEmpty:
+            return MatchTimeSeries.fromFrames(Database.instance().loadMatchFrames(statisticsFilter))
+        #the one of all matches is kept and appended to, it is only loaded again when matches were saved elsewhere (e.g. importlogs)
+        version = Database.instance().contentVersion()
+        if self.timeSeries is None or self.timeSeriesVersion != version:
+            self.timeSeries = MatchTimeSeries.fromFrames(Database.instance().loadMatchFrames())
+            self.timeSeriesVersion = version
+        return self.timeSeries
+
+    def __appendToTimeSeries(self, savedMatches: list[DBDMatch]):
+        if self.timeSeries is not None and len(savedMatches) > 0:
+            self.timeSeries.append(MatchFrames.fromRecords(map(matchToRecord, savedMatches)))
+            self.timeSeriesVersion = Database.instance().contentVersion()
+
     def __saveMatches(self):
         matchCount = len(self.currentlyAddedMatches)
         if matchCount <= 0:
             return
 
+        def updateComboBoxes():
+            survivorDates = self.__fetchDates(SurvivorMatch)
+            killerDates = self.__fetchDates(KillerMatch)
+            self.killerMatchDateComboBox.clear()
+            self.survivorMatchDateComboBox.clear()
+            mapper = lambda tup: tup[0].strftime("%d/%m/%Y")
+            self.killerMatchDateComboBox.addItems(map(mapper, killerDates))
+            self.survivorMatchDateComboBox.addItems(map(mapper, survivorDates))
+
         def showSuccessMessageAndClearList():
-            def updateComboBoxes():
-                survivorDates = self.__fetchDates(SurvivorMatch)
-                killerDates = self.__fetchDates(KillerMatch)
-                self.killerMatchDateComboBox.clear()
-                self.survivorMatchDateComboBox.clear()
-                mapper = lambda tup: tup[0].strftime("%d/%m/%Y")
-                self.killerMatchDateComboBox.addItems(map(mapper, killerDates))
-                self.survivorMatchDateComboBox.addItems(map(mapper, survivorDates))
             msgBox = QMessageBox()
             msgBox.setWindowTitle("Saving result")
             msgBox.setText("Matches saved successfully!")
             msgBox.exec_()
             self.statusBar().showMessage(f"Saved {matchCount} matches to database", 5000)
+            self.__appendToTimeSeries(self.currentlyAddedMatches)
             self.currentlyAddedMatches.clear()
+            self.pendingCheckpoints.clear()
             self.__updateUnsavedChanges('')
             updateComboBoxes()
 
 
+        def showCancelledMessage(savedCount: int):
+            #committed chunks stay in the database and the rest can be saved later. a save with log file checkpoints
+            #is rolled back as a whole, then savedCount is 0
+            self.__appendToTimeSeries(self.currentlyAddedMatches[:savedCount])
+            del self.currentlyAddedMatches[:savedCount]
+            self.statusBar().showMessage(f"Saving cancelled, saved {savedCount} of {matchCount} matches", 7500)
+            if savedCount > 0:
+                updateComboBoxes()
+
+        def updateProgress(saved: int, total: int, matchesPerSecond: float):
+            progressDialog.setValue(saved)
+            progressDialog.setLabelText(f"Saved {saved}/{total} matches ({matchesPerSecond:.0f} matches/s)")
+
+        def cancelSaving():
+            self.saveWorker.cancel()
+            self.statusBar().showMessage("Cancelling after the current chunk is saved...")
+
+        def closeProgressDialog():
+            #closing a QProgressDialog emits canceled, which must not reach a save that is already over
+            progressDialog.canceled.disconnect(cancelSaving)
+            progressDialog.close()
+
         progressDialog = QProgressDialog()
         progressDialog.setWindowTitle("Saving data")
         progressDialog.setLabelText(f"Saving {matchCount} matches...")
-        progressDialog.setRange(0,0)
+        progressDialog.setRange(0, matchCount)
         progressDialog.setFixedSize(500, 150)
-        progressDialog.setCancelButton(None)
         progressDialog.setModal(True)
+        progressDialog.setAutoClose(False)
+        progressDialog.setAutoReset(False)
 
-        self.saveWorker = DatabaseMatchListSaveWorker(self.currentlyAddedMatches)
+        self.saveWorker = DatabaseMatchListSaveWorker(self.currentlyAddedMatches, list(self.pendingCheckpoints.values()))
+        self.saveWorker.signals.progressUpdated.connect(updateProgress)
+        self.saveWorker.signals.finished.connect(closeProgressDialog)
         self.saveWorker.signals.finished.connect(showSuccessMessageAndClearList)
+        self.saveWorker.signals.cancelled.connect(closeProgressDialog)
+        self.saveWorker.signals.cancelled.connect(showCancelledMessage)
+        progressDialog.canceled.connect(cancelSaving)
         self.threadPool.start(self.saveWorker)
         progressDialog.show()
 
@@ -408,28 +450,38 @@ class MainWindow(QMainWindow):
         files, _ = QFileDialog.getOpenFileNames(self,"Select match log files",filter="Text files (*.txt)")
         if len(files) <= 0:
             return
-        parser = DBDMatchParser(self.resources)
-        loader = DBDMatchLogFileLoader(parser)
-        progressDialog = QProgressDialog()
-        progressDialog.setRange(0,0)
-        progressDialog.setWindowTitle("Loading match log files")
-        progressDialog.setCancelButton(None)
-        progressDialog.setFixedSize(450, 100)
-        progressDialog.setModal(True)
-        self.loadWorker = LogFileLoadWorker(loader, files)
-        self.loadWorker.signals.fileLoadStarted.connect(lambda fileName: progressDialog.setLabelText(f"Loading file: {fileName}"))
-        self.loadWorker.signals.finished.connect(lambda l,e: progressDialog.close())
-        self.loadWorker.signals.finished.connect(self.__showLoadedMatchData)
+        parser = DBDMatchParser(self.resources, fuzzyMatching=True)
+        loader = DBDMatchLogFileLoader(parser, useMemoryMap=True)
+        with Database.instance().getNewSession() as s:
+            paths = [os.path.abspath(f) for f in files]
+            checkpoints = {c.filePath: c for c in s.query(LogFileCheckpoint).filter(LogFileCheckpoint.filePath.in_(paths))}
+        checkpoints |= self.pendingCheckpoints
+        loadedCheckpoints = []
+
+        #the dialog shows the matches batch by batch while the files are read, the worker doesn't keep them for finished
+        dialog = LoadedGamesDisplayDialog([], [], title="Show loaded matches", loading=True)
+        self.loadWorker = LogFileLoadWorker(loader, files, processes=os.cpu_count() or 1, checkpoints=checkpoints, keepResults=False)
+        self.loadWorker.signals.checkpointCreated.connect(loadedCheckpoints.append)
+        self.loadWorker.signals.fileLoadStarted.connect(lambda fileName: dialog.setWindowTitle(f"Show loaded matches - loading file: {fileName}"))
+        self.loadWorker.signals.progressUpdated.connect(dialog.setLoadingProgress)
+        self.loadWorker.signals.batchLoaded.connect(dialog.addGames)
+        self.loadWorker.signals.finished.connect(lambda l,e: dialog.setWindowTitle("Show loaded matches"))
+        self.loadWorker.signals.finished.connect(lambda l,e: dialog.finishLoading())
+        self.loadWorker.signals.failed.connect(dialog.failLoading)
+        dialog.rejected.connect(self.loadWorker.cancel) #no effect once loading finished
         self.threadPool.start(self.loadWorker)
-        progressDialog.show()
+        self.__showLoadedMatchData(dialog, loadedCheckpoints)
 
-    def __showLoadedMatchData(self, loadedGames: list[DBDMatch], errors: list[str]):
-        dialog = LoadedGamesDisplayDialog(loadedGames, errors, title="Show loaded matches")
+    def __showLoadedMatchData(self, dialog: LoadedGamesDisplayDialog, checkpoints: list[LogFileCheckpoint]):
         result = dialog.exec_()
-        if result == QDialog.Accepted:
-            self.currentlyAddedMatches += loadedGames
-            self.statusBar().showMessage(f"{len(loadedGames)}x matches loaded in", 7500)
+        if result == QDialog.Accepted: #only possible once loading finished, so all checkpoints are in
+            self.currentlyAddedMatches += dialog.games
+            self.pendingCheckpoints |= {c.filePath: c for c in checkpoints}
+            self.statusBar().showMessage(f"{len(dialog.games)}x matches loaded in", 7500)
             self.__updateUnsavedChanges("Unsaved changes!")
+        elif dialog.loading:
+            #discarded while the files are still read, the batches parsed before the worker stops are dropped instead of collected
+            self.loadWorker.signals.batchLoaded.disconnect(dialog.addGames)
 
     def __showLogHelpWindow(self):
         pass
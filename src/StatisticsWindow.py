@@ -1,71 +1,108 @@
 from __future__ import annotations
 
 import dataclasses
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from operator import itemgetter
-from typing import Iterable
+from typing import Iterable, Callable, Optional
 
 from PyQt5 import QtGui
-from PyQt5.QtChart import QBarSet, QBarSeries, QChart, QBarCategoryAxis, QValueAxis, QChartView
-from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtChart import QBarSet, QBarSeries, QChart, QBarCategoryAxis, QValueAxis, QChartView, QLineSeries, QDateTimeAxis
+from PyQt5.QtCore import QThread, Qt, pyqtSignal, QDateTime
 from PyQt5.QtGui import QPainter
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTabWidget, QGridLayout, QLabel, QSpacerItem, QWidget, QHBoxLayout, \
-    QScrollArea, QSizePolicy, QLayout
+    QScrollArea, QSizePolicy, QLayout, QComboBox, QSpinBox
 
 from globaldata import Globals
-from models import FacedSurvivorState, SurvivorMatchResult
+from models import FacedSurvivorState, SurvivorMatchResult, Killer
+from classutil import DBDResources
+from guicontrols import StatisticsFilterSelection
 from statistics import StatisticsCalculator, GeneralMatchStatistics, SurvivorMatchStatistics, KillerMatchStatistics, \
-    EliminationInfo
-from util import clearLayout, qtMakeBold, addSubLayouts, splitUpper, addWidgets, toResourceName, singleOrPlural
+    EliminationInfo, StatisticsCache, StatisticsGroup, MatchStatistics, StatisticsFilter, \
+    MatchTimeSeries, TimeSeriesPeriod
+from util import setQWidgetLayout, qtMakeBold, addSubLayouts, splitUpper, addWidgets, toResourceName, singleOrPlural
 from waitingspinnerwidget import QtWaitingSpinner
 
+#chart title -> MatchTimeSeries statistics column, None for the killer encounter shares
+TREND_METRICS = {'Games': 'games', 'Average points': 'averagePoints', 'Kill rate': 'killRate', 'Escape rate': 'escapeRate',
+                 'Killer encounter share': None}
+TREND_CHART_KILLERS = 5
+
 
 class StatisticsWorker(QThread):
 
-    calculationFinished = pyqtSignal(GeneralMatchStatistics, KillerMatchStatistics, SurvivorMatchStatistics)
+    groupCalculated = pyqtSignal(object, object) #StatisticsGroup and its statistics, None for a side without matches, emitted as each one is done
+    timeSeriesCalculated = pyqtSignal(object) #MatchTimeSeries, after the groups
+    calculationFinished = pyqtSignal(object, object, object) #general, killer and survivor statistics, the sides can be None
+    calculationFailed = pyqtSignal(str) #error message, loading or calculating the statistics raised and nothing else is emitted after it
 
-    def __init__(self, calc: StatisticsCalculator):
+    def __init__(self, calculatorFactory: Callable[[], StatisticsCalculator], cache: Optional[StatisticsCache] = None, version: Optional[str] = None,
+                 timeSeriesFactory: Optional[Callable[[], MatchTimeSeries]] = None):
         super().__init__()
-        self.calculator = calc
+        self.calculatorFactory = calculatorFactory
+        self.timeSeriesFactory = timeSeriesFactory
+        self.cache = cache
+        self.version = version
 
     def run(self) -> None:
-        general = self.calculator.calculateGeneral()
-        killer = self.calculator.calculateKillerGeneral()
-        survivor = self.calculator.calculateSurvivorGeneral()
-        self.calculationFinished.emit(general, killer, survivor)
+        #an exception escaping a QThread's run aborts the whole program, filters make the unusual cases easy to select
+        try:
+            self.__calculate()
+        except Exception as e:
+            self.calculationFailed.emit(f'{type(e).__name__}: {e}')
+
+    def __calculate(self) -> None:
+        #nothing is loaded from the database when the cache has the statistics of its current content
+        statistics = self.cache.load(self.version) if self.cache is not None else None
+        if statistics is None:
+            calculator = self.calculatorFactory()
+            #threads and not processes, the groups only read the counters and pandas runs much of that without the GIL.
+            #spawning processes and pickling their input costs more than the whole calculation over the stored aggregates
+            results = {}
+            with ThreadPoolExecutor(max_workers=len(StatisticsGroup)) as executor:
+                futures = {executor.submit(calculator.calculate, group): group for group in StatisticsGroup}
+                for future in as_completed(futures):
+                    group = futures[future]
+                    results[group] = future.result()
+                    self.groupCalculated.emit(group, results[group])
+            statistics = tuple(results[group] for group in StatisticsGroup)
+            if self.cache is not None:
+                self.cache.store(self.version, statistics)
+        else:
+            for group, groupStatistics in zip(StatisticsGroup, statistics):
+                self.groupCalculated.emit(group, groupStatistics)
+        if self.timeSeriesFactory is not None:
+            self.timeSeriesCalculated.emit(self.timeSeriesFactory())
+        self.calculationFinished.emit(*statistics)
 
 
 class StatisticsWindow(QDialog):
 
     closing = pyqtSignal()
 
-    def __init__(self, calc: StatisticsCalculator, parent=None):
+    def __init__(self, resources: DBDResources, calculatorFactory: Callable[[StatisticsFilter], StatisticsCalculator], cache: Optional[StatisticsCache] = None,
+                 version: Optional[str] = None, timeSeriesFactory: Optional[Callable[[StatisticsFilter], MatchTimeSeries]] = None,
+                 parent=None):
         super().__init__(parent=parent)
         self.resize(1200, 840)
         self.setWindowTitle("Match statistics")
         self.setWindowFlags(self.windowFlags() | Qt.CustomizeWindowHint)
-        self.resources = calc.resources
-        self.worker = StatisticsWorker(calc)
-        self.worker.calculationFinished.connect(self.__setupUIForStatistics)
-        self.worker.finished.connect(self.enableCloseButton)
+        self.resources = resources
+        self.calculatorFactory = calculatorFactory
+        self.cache = cache
+        self.version = version
+        self.timeSeriesFactory = timeSeriesFactory
+        self.worker: Optional[StatisticsWorker] = None
+        self.content: Optional[QWidget] = None
+        self.mainLayout, self.generalStatsWidget, self.statsTabWidget = None, None, None
         layout = QVBoxLayout()
         self.setLayout(layout)
-        self.spinner = QtWaitingSpinner(None, centerOnParent=True)
-        self.spinner.setInnerRadius(25)
-        self.spinner.setLineLength(20)
-        textLabel = QLabel("Calculating...")
-        textLabel.setAlignment(Qt.AlignCenter)
-        textLabel.setStyleSheet("""
-            font-weight: bold;
-            font-size: 24px;
-        """)
-        layout.addWidget(self.spinner)
-        layout.addSpacerItem(QSpacerItem(0, 50))
-        layout.addWidget(textLabel)
+        self.filterSelection = StatisticsFilterSelection(resources.killers, resources.survivors)
+        self.filterSelection.filterApplied.connect(self.__applyFilter)
+        layout.addWidget(self.filterSelection)
 
     def exec_(self) -> int:
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowCloseButtonHint)
-        self.spinner.start()
-        self.worker.start()
+        self.__calculate(StatisticsFilter())
         return super().exec_()
 
     def closeEvent(self, a0: QtGui.QCloseEvent) -> None:
@@ -76,66 +113,141 @@ class StatisticsWindow(QDialog):
         self.setWindowFlags(self.windowFlags() | Qt.WindowCloseButtonHint)
         self.show() #we need this call because, apparently, setting window flags changes the parent. because of that, the window becomes hidden and we must show it again
 
-    def __setupUIForStatistics(self, generalStats: GeneralMatchStatistics, killerStats: KillerMatchStatistics, survivorStats: SurvivorMatchStatistics):
-        self.spinner.stop()
-        clearLayout(self.layout())
-        self.layout().deleteLater()
-        mainLayout = QGridLayout() #create a box for general stats, and below it - a tab widget with survivor and killer stats
-        self.layout().destroyed.connect(lambda: self.setLayout(mainLayout))
-
-        minChartHeight = 600
-
-        generalStatsLayout = self.__setupGeneralStatsLayout(generalStats)
-        mainLayout.addLayout(generalStatsLayout, 0, 0, 1, 1)
-        killerAndSurvivorStatsLayout = QVBoxLayout()
-        mainLayout.addLayout(killerAndSurvivorStatsLayout, 1, 0, 3, 1)
-        statsTabWidget = QTabWidget()
+    def __applyFilter(self, statisticsFilter: StatisticsFilter):
+        #the window can't be closed while the worker runs, same as during the first calculation
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowCloseButtonHint)
+        self.show()
+        self.__calculate(statisticsFilter)
+
+    def __calculate(self, statisticsFilter: StatisticsFilter):
+        #the cache only keeps the statistics of all matches, filtered ones are calculated from the rows the filter selects every time
+        cache = self.cache if statisticsFilter.isEmpty else None
+        self.setWindowTitle(f"Match statistics - {statisticsFilter}")
+        self.filterSelection.setEnabled(False)
+        self.statsTabWidget = None
+        self.__setContent(self.__spinnerContent())
+        timeSeriesFactory = (lambda: self.timeSeriesFactory(statisticsFilter)) if self.timeSeriesFactory is not None else None
+        self.worker = StatisticsWorker(lambda: self.calculatorFactory(statisticsFilter), cache, self.version, timeSeriesFactory)
+        self.worker.groupCalculated.connect(self.__showGroupStatistics)
+        self.worker.timeSeriesCalculated.connect(self.__showTimeSeries)
+        self.worker.calculationFailed.connect(self.__showCalculationError)
+        self.worker.finished.connect(lambda: self.filterSelection.setEnabled(True))
+        self.worker.finished.connect(self.enableCloseButton)
+        self.spinner.start()
+        self.worker.start()
 
-        killerStatsScroll = QScrollArea()
-        killerStatsScroll.setWidgetResizable(True)
-        killerStatsScroll.setAutoFillBackground(True)
+    def __setContent(self, content: QWidget):
+        if self.content is None:
+            self.layout().addWidget(content, 1)
+        else:
+            self.layout().replaceWidget(self.content, content)
+            self.content.deleteLater()
+        self.content = content
 
-        survivorStatsScroll = QScrollArea()
-        survivorStatsScroll.setWidgetResizable(True)
-        survivorStatsScroll.setAutoFillBackground(True)
+    def __spinnerContent(self) -> QWidget:
+        content, layout = setQWidgetLayout(QWidget(), QVBoxLayout())
+        self.spinner = QtWaitingSpinner(None, centerOnParent=True)
+        self.spinner.setInnerRadius(25)
+        self.spinner.setLineLength(20)
+        textLabel = QLabel("Calculating...")
+        textLabel.setAlignment(Qt.AlignCenter)
+        textLabel.setStyleSheet("""
+            font-weight: bold;
+            font-size: 24px;
+        """)
+        layout.addWidget(self.spinner)
+        layout.addSpacerItem(QSpacerItem(0, 50))
+        layout.addWidget(textLabel)
+        return content
+
+    def __showGroupStatistics(self, group: StatisticsGroup, statistics: Optional[MatchStatistics]):
+        if self.statsTabWidget is None:
+            self.__setupSections()
+        if group is StatisticsGroup.General:
+            generalStatsWidget = QWidget()
+            generalStatsWidget.setLayout(self.__setupGeneralStatsLayout(statistics))
+            self.mainLayout.replaceWidget(self.generalStatsWidget, generalStatsWidget)
+            self.generalStatsWidget.deleteLater()
+            self.generalStatsWidget = generalStatsWidget
+        elif group is StatisticsGroup.Killer:
+            self.statsTabWidget.widget(0).setWidget(self.__setupKillerStatsWidget(statistics))
+        else:
+            self.statsTabWidget.widget(1).setWidget(self.__setupSurvivorStatsWidget(statistics))
+
+    def __showTimeSeries(self, timeSeries: MatchTimeSeries):
+        if self.statsTabWidget is not None:
+            self.statsTabWidget.widget(2).setWidget(self.__setupTrendsWidget(timeSeries))
+
+    def __showCalculationError(self, message: str):
+        #another filter can still be applied, the filter bar is enabled again when the worker finishes
+        if self.statsTabWidget is None: #the spinner is only shown until the first statistics arrive
+            self.spinner.stop()
+        self.statsTabWidget = None
+        content, layout = setQWidgetLayout(QWidget(), QVBoxLayout())
+        label = QLabel(qtMakeBold(f"Calculating the statistics failed: {message}"))
+        label.setWordWrap(True)
+        layout.addWidget(label)
+        layout.setAlignment(label, Qt.AlignCenter)
+        self.__setContent(content)
 
-        killerStatsWidget = QWidget()
-        survivorStatsWidget = QWidget()
-        killerStatsScroll.setWidget(killerStatsWidget)
-        survivorStatsScroll.setWidget(survivorStatsWidget)
+    def __setupSections(self):
+        #the sections show a placeholder until their statistics are calculated, the general ones usually come first
+        self.spinner.stop()
+        #create a box for general stats, and below it - a tab widget with survivor and killer stats
+        sectionsWidget, self.mainLayout = setQWidgetLayout(QWidget(), QGridLayout())
 
-        killerStatsScroll.setStyleSheet("background-color: white; border: 0px black;")
-        survivorStatsScroll.setStyleSheet("background-color: white; border: 0px black;")
+        self.generalStatsWidget = self.__calculatingPlaceholder()
+        self.mainLayout.addWidget(self.generalStatsWidget, 0, 0, 1, 1)
+        killerAndSurvivorStatsLayout = QVBoxLayout()
+        self.mainLayout.addLayout(killerAndSurvivorStatsLayout, 1, 0, 3, 1)
+        self.statsTabWidget = QTabWidget()
+
+        titles = ["Killer statistics", "Survivor statistics"] + (["Trends"] if self.timeSeriesFactory is not None else [])
+        for title in titles:
+            statsScroll = QScrollArea()
+            statsScroll.setWidgetResizable(True)
+            statsScroll.setAutoFillBackground(True)
+            statsScroll.setWidget(self.__calculatingPlaceholder())
+            statsScroll.setStyleSheet("background-color: white; border: 0px black;")
+            self.statsTabWidget.addTab(statsScroll, title)
 
         killerAndSurvivorStatsLayout.setContentsMargins(0, 20, 0, 0)
-        statsTabWidget.addTab(killerStatsScroll, "Killer statistics")
-        statsTabWidget.addTab(survivorStatsScroll, "Survivor statistics")
-
-        killerAndSurvivorStatsLayout.addWidget(statsTabWidget)
-
-        def characterSubLayout(info, infoStrings, characterExtractorFunc, nameExtractorFunc, iconsDict) -> QHBoxLayout:
-            character = characterExtractorFunc(info)
-            characterLayout = QHBoxLayout()
-            textLayout = QVBoxLayout()
-            iconLabel = QLabel()
-            icon = iconsDict[toResourceName(nameExtractorFunc(character))]
-            icon = icon.scaled(icon.width() // 2, icon.height() // 2)
-            iconLabel.setPixmap(icon)
-            for s in infoStrings:
-                infoLabel = QLabel(qtMakeBold(s))
-                infoLabel.setWordWrap(True)
-                infoLabel.setAlignment(Qt.AlignCenter)
-                textLayout.addWidget(infoLabel)
-            characterLayout.addLayout(textLayout)
-            characterLayout.addWidget(iconLabel)
-            characterLayout.setAlignment(iconLabel, Qt.AlignCenter)
-            return characterLayout
-
-        #extractor functions
+        killerAndSurvivorStatsLayout.addWidget(self.statsTabWidget)
+        self.__setContent(sectionsWidget)
+
+    def __calculatingPlaceholder(self) -> QWidget:
+        widget = QWidget()
+        layout = QVBoxLayout()
+        widget.setLayout(layout)
+        label = QLabel(qtMakeBold("Calculating..."))
+        layout.addWidget(label)
+        layout.setAlignment(label, Qt.AlignCenter)
+        return widget
+
+    def __characterSubLayout(self, info, infoStrings, characterExtractorFunc, nameExtractorFunc, iconsDict) -> QHBoxLayout:
+        character = characterExtractorFunc(info)
+        characterLayout = QHBoxLayout()
+        textLayout = QVBoxLayout()
+        iconLabel = QLabel()
+        icon = iconsDict[toResourceName(nameExtractorFunc(character))]
+        icon = icon.scaled(icon.width() // 2, icon.height() // 2)
+        iconLabel.setPixmap(icon)
+        for s in infoStrings:
+            infoLabel = QLabel(qtMakeBold(s))
+            infoLabel.setWordWrap(True)
+            infoLabel.setAlignment(Qt.AlignCenter)
+            textLayout.addWidget(infoLabel)
+        characterLayout.addLayout(textLayout)
+        characterLayout.addWidget(iconLabel)
+        characterLayout.setAlignment(iconLabel, Qt.AlignCenter)
+        return characterLayout
+
+    def __setupKillerStatsWidget(self, killerStats: Optional[KillerMatchStatistics]) -> QWidget:
+        minChartHeight = 600
+        killerStatsWidget = QWidget()
         killerInfoExtractor = lambda i: i.killer
         killerNameExtractor = lambda k: k.killerAlias
 
-        #killer stats setup
         if killerStats is None:
             l = QLabel(qtMakeBold("Nothing to see here. No killer matches present."))
             layout = QVBoxLayout()
@@ -178,22 +290,21 @@ class StatisticsWindow(QDialog):
                 label.setStyleSheet("font-size: 18px")
 
             favouriteKillerInfo = killerStats.favouriteKillerInfo
-            favouriteKillerSubLayout = characterSubLayout(favouriteKillerInfo, [f"{favouriteKillerInfo.gamesWithKiller:,} out of {favouriteKillerInfo.totalGames} {singleOrPlural(favouriteKillerInfo.totalGames, 'game')}"],
+            favouriteKillerSubLayout = self.__characterSubLayout(favouriteKillerInfo, [f"{favouriteKillerInfo.gamesWithKiller:,} out of {favouriteKillerInfo.totalGames} {singleOrPlural(favouriteKillerInfo.totalGames, 'game')}"],
                                                           killerInfoExtractor, killerNameExtractor, Globals.KILLER_ICONS)
             favouriteKillerLayout.addLayout(favouriteKillerSubLayout)
 
             survExtractor, survNameExtractor = lambda i: i.survivor, lambda s: s.survivorName
-            mostCommonInfo = killerStats.mostCommonSurvivorData
-            mostCommonSurvivorInfoStr = f"{mostCommonInfo.encounters:,} {singleOrPlural(mostCommonInfo.encounters, 'encounter')} across {mostCommonInfo.totalGames:,} {singleOrPlural(mostCommonInfo.totalGames, 'game')}"
-            mostCommonSurvivorSubLayout = characterSubLayout(mostCommonInfo, [mostCommonSurvivorInfoStr],
-                                                             survExtractor, survNameExtractor, Globals.SURVIVOR_ICONS)
-            mostCommonSurvivorLayout.addLayout(mostCommonSurvivorSubLayout)
-
-            leastCommonInfo = killerStats.leastCommonSurvivorData
-            leastCommonSurvivorInfoStr = f"{leastCommonInfo.encounters:,} {singleOrPlural(leastCommonInfo.encounters, 'encounter')} across {leastCommonInfo.totalGames:,} {singleOrPlural(leastCommonInfo.totalGames, 'game')}"
-            leastCommonSurvivorSubLayout = characterSubLayout(killerStats.leastCommonSurvivorData, [leastCommonSurvivorInfoStr],
-                                                              survExtractor, survNameExtractor, Globals.SURVIVOR_ICONS)
-            leastCommonSurvivorLayout.addLayout(leastCommonSurvivorSubLayout)
+            for commonInfo, commonSurvivorLayout in ((killerStats.mostCommonSurvivorData, mostCommonSurvivorLayout),
+                                                     (killerStats.leastCommonSurvivorData, leastCommonSurvivorLayout)):
+                if commonInfo is None:
+                    noSurvivorsLabel = QLabel(qtMakeBold("No survivors faced"))
+                    commonSurvivorLayout.addWidget(noSurvivorsLabel)
+                    commonSurvivorLayout.setAlignment(noSurvivorsLabel, Qt.AlignCenter)
+                    continue
+                commonSurvivorInfoStr = f"{commonInfo.encounters:,} {singleOrPlural(commonInfo.encounters, 'encounter')} across {commonInfo.totalGames:,} {singleOrPlural(commonInfo.totalGames, 'game')}"
+                commonSurvivorLayout.addLayout(self.__characterSubLayout(commonInfo, [commonSurvivorInfoStr], survExtractor,
+                                                                         survNameExtractor, Globals.SURVIVOR_ICONS))
 
             sacrificesLabel = QLabel(qtMakeBold(f"Sacrifices: {killerStats.totalEliminationsInfo.sacrifices:,}"))
             killsLabel = QLabel(qtMakeBold(f"Kills: {killerStats.totalEliminationsInfo.kills:,}"))
@@ -220,8 +331,14 @@ class StatisticsWindow(QDialog):
             averageKillsChart = self.__setupAverageKillsChart(killerStats)
             killerStatsLayout.addWidget(averageKillsChart)
             averageKillsChart.setMinimumHeight(minChartHeight)
+        return killerStatsWidget
+
+    def __setupSurvivorStatsWidget(self, survivorStats: Optional[SurvivorMatchStatistics]) -> QWidget:
+        minChartHeight = 600
+        survivorStatsWidget = QWidget()
+        killerInfoExtractor = lambda i: i.killer
+        killerNameExtractor = lambda k: k.killerAlias
 
-        #survivor stats setup
         if survivorStats is None:
             l = QLabel(qtMakeBold("Nothing to see here. No survivor matches present."))
             layout = QVBoxLayout()
@@ -270,13 +387,13 @@ class StatisticsWindow(QDialog):
 
             mostCommonInfo = survivorStats.mostCommonKillerData
             mostCommonKillerInfoStr = f"{mostCommonInfo.encounters} {singleOrPlural(mostCommonInfo.encounters, 'encounter')} across {mostCommonInfo.totalGames} {singleOrPlural(mostCommonInfo.totalGames, 'game')}"
-            mostCommonKillerSubLayout = characterSubLayout(mostCommonInfo, [mostCommonKillerInfoStr],
+            mostCommonKillerSubLayout = self.__characterSubLayout(mostCommonInfo, [mostCommonKillerInfoStr],
                                                            killerInfoExtractor, killerNameExtractor, Globals.KILLER_ICONS)
             mostCommonKillerLayout.addLayout(mostCommonKillerSubLayout)
 
             leastCommonInfo = survivorStats.leastCommonKillerData
             leastCommonKillerInfoStr = f"{leastCommonInfo.encounters} {singleOrPlural(leastCommonInfo.encounters, 'encounter')} across {leastCommonInfo.totalGames} {singleOrPlural(leastCommonInfo.totalGames, 'game')}"
-            leastCommonKillerSubLayout = characterSubLayout(leastCommonInfo, [leastCommonKillerInfoStr],
+            leastCommonKillerSubLayout = self.__characterSubLayout(leastCommonInfo, [leastCommonKillerInfoStr],
                                                             killerInfoExtractor, killerNameExtractor, Globals.KILLER_ICONS)
             leastCommonKillerLayout.addLayout(leastCommonKillerSubLayout)
 
@@ -285,7 +402,7 @@ class StatisticsWindow(QDialog):
                 f"{mostLethalInfo.deathsCount} {singleOrPlural(mostLethalInfo.deathsCount, 'death')} out of {mostLethalInfo.totalGames} {singleOrPlural(mostLethalInfo.totalGames, 'game')}",
                 f"Kill ratio: {mostLethalInfo.killRatio:.2}"
             )
-            mostLethalKillerSubLayout = characterSubLayout(mostLethalInfo, mostLethalKillerInfoStrings,
+            mostLethalKillerSubLayout = self.__characterSubLayout(mostLethalInfo, mostLethalKillerInfoStrings,
                                                            killerInfoExtractor, killerNameExtractor, Globals.KILLER_ICONS)
             mostLethalKillerLayout.addLayout(mostLethalKillerSubLayout)
 
@@ -294,7 +411,7 @@ class StatisticsWindow(QDialog):
                 f"{leastLethalInfo.deathsCount} {singleOrPlural(leastLethalInfo.deathsCount, 'death')} out of {leastLethalInfo.totalGames} {singleOrPlural(leastLethalInfo.totalGames, 'game')}",
                 f"Kill ratio: {leastLethalInfo.killRatio:.2}"
             )
-            leastLethalKillerSubLayout = characterSubLayout(leastLethalInfo, leastLethalKillerInfoStrings,
+            leastLethalKillerSubLayout = self.__characterSubLayout(leastLethalInfo, leastLethalKillerInfoStrings,
                                                             killerInfoExtractor, killerNameExtractor, Globals.KILLER_ICONS)
             leastLethalKillerLayout.addLayout(leastLethalKillerSubLayout)
 
@@ -305,8 +422,9 @@ class StatisticsWindow(QDialog):
             mostCommonItemTypeIconLabel = QLabel()
             itemTypeSubLayout.addWidget(mostCommonItemTypeLabel)
             itemTypeSubLayout.addWidget(mostCommonItemTypeIconLabel)
-            item = next(x for x in self.resources.items if x.itemType == itemTypeInfo.itemType)
-            mostCommonItemTypeIconLabel.setPixmap(Globals.ITEM_ICONS[toResourceName(item.itemName)])
+            item = next((x for x in self.resources.items if x.itemType == itemTypeInfo.itemType), None)
+            if item is not None:
+                mostCommonItemTypeIconLabel.setPixmap(Globals.ITEM_ICONS[toResourceName(item.itemName)])
             mostCommonItemTypeLayout.addLayout(itemTypeSubLayout)
 
             survivorGamesChart = self.__setupSurvivorGamesChart(survivorStats)
@@ -324,6 +442,71 @@ class StatisticsWindow(QDialog):
             totalMatchResultsChart = self.__setupMatchResultsHistogramChart(survivorStats)
             totalMatchResultsChart.setMinimumHeight(minChartHeight)
             survivorStatsLayout.addWidget(totalMatchResultsChart)
+        return survivorStatsWidget
+
+    def __setupTrendsWidget(self, timeSeries: MatchTimeSeries) -> QWidget:
+        trendsWidget, trendsLayout = setQWidgetLayout(QWidget(), QVBoxLayout())
+        controlsLayout = QHBoxLayout()
+        periodComboBox = QComboBox()
+        periodComboBox.addItems([p.name for p in TimeSeriesPeriod])
+        windowSpinner = QSpinBox()
+        windowSpinner.setRange(1, 52)
+        windowSpinner.setPrefix("Rolling window: ")
+        metricComboBox = QComboBox()
+        metricComboBox.addItems(TREND_METRICS.keys())
+        addWidgets(controlsLayout, periodComboBox, windowSpinner, metricComboBox)
+        controlsLayout.addStretch()
+        trendsLayout.addLayout(controlsLayout)
+        chartView = self.__barChartView(QChart())
+        chartView.setMinimumHeight(600)
+        trendsLayout.addWidget(chartView)
+
+        def updateChart():
+            #the series keeps the results, only a changed period or window size calculates anything
+            previousChart = chartView.chart()
+            chartView.setChart(self.__setupTrendChart(timeSeries, TimeSeriesPeriod[periodComboBox.currentText()], windowSpinner.value(),
+                                                      metricComboBox.currentText()))
+            previousChart.deleteLater()
+
+        periodComboBox.currentIndexChanged.connect(updateChart)
+        windowSpinner.valueChanged.connect(updateChart)
+        metricComboBox.currentIndexChanged.connect(updateChart)
+        updateChart()
+        return trendsWidget
+
+    def __setupTrendChart(self, timeSeries: MatchTimeSeries, period: TimeSeriesPeriod, window: int, metric: str) -> QChart:
+        statistics, shares = timeSeries.calculate(period, window)
+        if TREND_METRICS[metric] is not None:
+            lines = {metric: statistics[TREND_METRICS[metric]]}
+        else:
+            #the killers faced the most, a line for every killer would make the chart unreadable
+            killers = self.resources.byID[Killer]
+            lines = {killers[killerID].killerAlias: shares[killerID] for killerID in shares.mean().nlargest(TREND_CHART_KILLERS).index}
+        dateAxis, valueAxis = QDateTimeAxis(), QValueAxis()
+        dateAxis.setFormat('MM-yyyy' if period is TimeSeriesPeriod.Month else 'dd-MM-yyyy')
+        dateAxis.setLabelsAngle(-90)
+        chart = QChart()
+        chart.addAxis(dateAxis, Qt.AlignBottom)
+        chart.addAxis(valueAxis, Qt.AlignLeft)
+        maxVal = 0
+        for name, values in lines.items():
+            series = QLineSeries()
+            series.setName(name)
+            values = values.dropna()
+            for periodIndex, value in zip(values.index, values.tolist()):
+                series.append(QDateTime(periodIndex.start_time.to_pydatetime()).toMSecsSinceEpoch(), value)
+                maxVal = max(maxVal, value)
+            chart.addSeries(series)
+            series.attachAxis(dateAxis)
+            series.attachAxis(valueAxis)
+        if not statistics.empty:
+            dateAxis.setRange(QDateTime(statistics.index[0].start_time.to_pydatetime()), QDateTime(statistics.index[-1].start_time.to_pydatetime()))
+        valueAxis.setRange(0, maxVal if maxVal > 0 else 1)
+        windowText = f", rolling over {window} {singleOrPlural(window, period.name.lower())}" if window > 1 else ""
+        chart.setTitle(qtMakeBold(f"{metric} per {period.name.lower()}{windowText}"))
+        chart.legend().setVisible(len(lines) > 1)
+        chart.legend().setAlignment(Qt.AlignRight)
+        return chart
 
     def __setStatSubLayout(self, layout: QHBoxLayout, leftLabel: QLabel, rightLabel: QLabel, margins: tuple[int, int, int, int]):
         layout.addWidget(leftLabel)
@@ -349,7 +532,7 @@ class StatisticsWindow(QDialog):
 
     def __setupTotalStatesChart(self, killerStats: KillerMatchStatistics) -> QChartView:
         hist = killerStats.totalSurvivorStatesHistogram
-        categoryAxis, valueAxis = self.__barSeriesAxes(0, max(hist.values()), [' '.join(splitUpper(state.name)) for state in FacedSurvivorState])
+        categoryAxis, valueAxis = self.__barSeriesAxes(0, max(hist.values(), default=0), [' '.join(splitUpper(state.name)) for state in FacedSurvivorState])
         barset = QBarSet("Survivor state")
         for k in FacedSurvivorState:
             barset.append(hist[k])
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
+import hashlib
+import mmap
+import multiprocessing
+import os
 import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Union, Callable, Optional
+from functools import cached_property, lru_cache
+from typing import Union, Callable, Optional, Iterable, Iterator
 
 from PyQt5.QtCore import QRunnable, QObject, pyqtSignal
+from sqlalchemy.orm.attributes import set_committed_value
 
 from globaldata import Globals
 from models import Killer, Survivor, KillerAddon, Item, ItemAddon, Offering, Realm, Perk, KillerMatch, SurvivorMatch, \
     DBDMatch, KillerMatchPerk, FacedSurvivorState, FacedSurvivor, MatchKillerAddon, MatchItemAddon, SurvivorMatchResult, \
-    SurvivorMatchPerk, GameMap
-from util import isDateString
+    SurvivorMatchPerk, GameMap, ItemType, LogFileCheckpoint
+from util import EditDistanceIndex
 
+LOG_DATE_FORMAT = '%d %m %Y'
+MAX_DATE_LINE_LENGTH = 16 #'dd mm yyyy' plus some whitespace
+DEFAULT_CHUNK_SIZE = 1 << 20 #bytes of log text parsed by one worker process at a time
+DEFAULT_BATCH_SIZE = 500
+PARSE_CACHE_SIZE = 1024 #distinct perk, add-on and faced survivor sections remembered by each parser
+MAX_FUZZY_DISTANCE = 3
+
+_DATE_HEADER_REGEX = re.compile(r'(\d{1,2})\s+(\d{1,2})\s+(\d{4})')
+#starts with the line break before the header, a literal first character lets the regex engine skip ahead to candidates
+_DATE_HEADER_LINE_REGEX = re.compile(rb'\n[ \t]*\d{1,2}[ \t]+\d{1,2}[ \t]+\d{4}[ \t\r]*(?=\n|$)')
 
 @dataclass(frozen=True)
 class DBDResources(object):
@@ -24,149 +42,182 @@ class DBDResources(object):
     realms: list[Realm]
     perks: list[Perk]
 
+    @cached_property
+    def byID(self) -> dict[type, dict[int, object]]:
+        return {
+            Killer: {k.killerID: k for k in self.killers},
+            Survivor: {_s.survivorID: _s for _s in self.survivors},
+            KillerAddon: {a.addonID: a for a in self.addons if isinstance(a, KillerAddon)},
+            ItemAddon: {a.addonID: a for a in self.addons if isinstance(a, ItemAddon)},
+            Item: {i.itemID: i for i in self.items},
+            Offering: {o.offeringID: o for o in self.offerings},
+            GameMap: {m.mapID: m for r in self.realms for m in r.maps},
+            Perk: {p.perkID: p for p in self.perks}
+        }
+
 
 class DBDMatchParser(object):
 
-    def __init__(self, resources: DBDResources):
+    def __init__(self, resources: DBDResources, fuzzyMatching: bool = False):
         self._resources = resources
         self._matchDate = None
+        self._fuzzyMatching = fuzzyMatching #resolve misspelled perk, add-on, item, offering and map names to the closest one
+        self.__fuzzyIndexes: dict[tuple, _FuzzyNameIndex] = {} #built on the first miss in the index they cover
+        self.__buildIndexes()
+        #logs repeat the same builds over and over, so resolved perk, add-on and faced survivor sections are cached
+        #as tuples of resources; mapped objects are still created anew for every match
+        self.__cachedPerks = lru_cache(maxsize=PARSE_CACHE_SIZE)(self.__resolvePerks)
+        self.__cachedAddons = lru_cache(maxsize=PARSE_CACHE_SIZE)(self.__resolveAddons)
+        self.__cachedFacedSurvivors = lru_cache(maxsize=PARSE_CACHE_SIZE)(self.__resolveFacedSurvivors)
+
+    def __buildIndexes(self):
+        #every lookup the parser does per token goes through one of these dicts, so the cost of a line doesn't grow with the amount of resources
+        self._killersBySubstring = _substringIndex(self._resources.killers, lambda k: k.killerAlias)
+        self._killersByLowerSubstring = _substringIndex(self._resources.killers, lambda k: k.killerAlias.lower())
+        self._survivorsBySubstring = _substringIndex(self._resources.survivors, lambda _s: _s.survivorName)
+        self._perksByNameAndTier = {}
+        for perk in self._resources.perks:
+            for key in _nameKeys(perk.perkName):
+                self._perksByNameAndTier.setdefault((key, perk.perkTier), perk)
+        self._killerAddonsByKiller = {}
+        self._itemAddonsByItemType = {}
+        for addon in self._resources.addons:
+            addonIndex = self._killerAddonsByKiller if isinstance(addon, KillerAddon) else self._itemAddonsByItemType
+            owner = addon.killer if isinstance(addon, KillerAddon) else addon.itemType
+            for key in _nameKeys(addon.addonName):
+                addonIndex.setdefault((owner, key), addon)
+        self._itemsByName = _nameIndex(self._resources.items, lambda i: i.itemName)
+        self._offeringsByName = _nameIndex(self._resources.offerings, lambda o: o.offeringName)
+        self._mapsByName = _nameIndex((m for r in self._resources.realms for m in r.maps), lambda m: m.mapName)
+
+    @property
+    def resources(self) -> DBDResources:
+        return self._resources
+
+    @property
+    def fuzzyMatching(self) -> bool:
+        return self._fuzzyMatching
 
     def setMatchDate(self, d: date):
         self._matchDate = d
 
+    def cacheInfo(self) -> dict[str, tuple]:
+        #functools cache infos (hits, misses, maxsize, currsize) of every cached section
+        return {
+            'perks': self.__cachedPerks.cache_info(),
+            'addons': self.__cachedAddons.cache_info(),
+            'faced survivors': self.__cachedFacedSurvivors.cache_info()
+        }
+
+    def clearCaches(self):
+        self.__cachedPerks.cache_clear()
+        self.__cachedAddons.cache_clear()
+        self.__cachedFacedSurvivors.cache_clear()
+
     def parse(self, s: str) -> DBDMatch:
-        firstCommaIndex = s.index(',')
-        if firstCommaIndex == -1:
-            raise ValueError("No commas found in match entry. Corrupted entry")
-        charName = s[:firstCommaIndex].strip()
-        handler = self.__determineMatchType(charName)
+        tokens = _tokenizeMatchLine(s)
+        handler = self.__determineMatchType(tokens.characterName)
         if handler is None:
-            raise ValueError(f"No character named {charName} found.")
-        return handler(s)
+            raise ValueError(f"No character named {tokens.characterName} found.")
+        return handler(tokens)
 
-    def __determineMatchType(self, charName: str) -> Callable[[str], DBDMatch]:
-        return self.__parseKillerGame if any(charName in k.killerAlias for k in self._resources.killers) else self.__parseSurvivorGame if any(charName in _s.survivorName for _s in self._resources.survivors) else None
+    def __determineMatchType(self, charName: str) -> Callable[[_MatchLineTokens], DBDMatch]:
+        return self.__parseKillerGame if charName in self._killersBySubstring else self.__parseSurvivorGame if charName in self._survivorsBySubstring else None
 
-    def __parseKillerGame(self, s: str) -> KillerMatch:
+    def __parseKillerGame(self, tokens: _MatchLineTokens) -> KillerMatch:
         #parsing killer
-        firstCommaIndex = s.index(',')
-        killerName = s[:firstCommaIndex]
-        killer = next(k for k in self._resources.killers if killerName in k.killerAlias)
+        killer = self._killersBySubstring[tokens.characterName]
 
         #parsing eliminations
         elimsDict = {'kill':0,'mori':0,'disconnect':0}
-        perkParseStartIndex = s.index('(', firstCommaIndex)
-        eliminationsInfo = s[firstCommaIndex+1:perkParseStartIndex]
-        if not 'kill' in eliminationsInfo:
+        if not 'kill' in tokens.outcome:
             raise ValueError(f"No kills specified in string")
-        eliminationsInfoStrings = list(filter(lambda _s: _s.strip(), eliminationsInfo.split(',')))
-        for elimString in eliminationsInfoStrings:
-            for key in elimsDict.keys():
-                if key in elimString:
-                    tokens = elimString.strip().split(" ")
-                    elimsDict[key] += int(tokens[0])
-                    break
+        for count, key in _ELIMINATIONS_REGEX.findall(tokens.outcome):
+            elimsDict[key] += int(count)
 
         assert sum(elimsDict.values()) in range(0,5), "Cannot be more than 4 eliminations"
 
-        #parsing perks
-        perks = self.__parsePerks(s)
-
-        #parsing points
-        points = self.__parsePoints(s)
-
-
-        addons = self.__parseAddonsInfo(s)
-        gameMap = self.__parseMap(s)
-        offering = self.__parseOffering(s)
-
-        #parsing faced survivors info
-        facedSurvivorsMatch = re.search(r'survivors: \[(.*)\]', s)
-        facedSurvivors = []
-        if facedSurvivorsMatch:
-            facedSurvivorsString = facedSurvivorsMatch.group(1)
-            facedSurvivorsStrings = facedSurvivorsString.split(',')
-            #if there's 4 of any elimination method and no states specified then we assume all of them were eliminated that way
-            #same with escapes, if there's 0 of each method then all of them escaped
-            survivors = [next(_s for _s in self._resources.survivors if (fss[:fss.index(':')].strip() if ':' in fss else fss.strip()) in _s.survivorName) for fss in facedSurvivorsStrings]
-            survivorStates = []
-            MAX_ELIMS = 4
-            MAX_ELIMS_RANGE = range(MAX_ELIMS)
-            if elimsDict['kill'] == MAX_ELIMS: #all of them sacrificed
-                survivorStates = [FacedSurvivorState.Sacrificed for _ in MAX_ELIMS_RANGE]
-            elif elimsDict['mori'] == MAX_ELIMS: #all of them were mori'd
-                survivorStates = [FacedSurvivorState.Killed for _ in MAX_ELIMS_RANGE]
-            elif elimsDict['disconnect'] == MAX_ELIMS: #all of them disconnected
-                survivorStates = [FacedSurvivorState.Disconnected for _ in MAX_ELIMS_RANGE]
-            elif all(v == 0 for v in elimsDict.values()): #everyone escaped
-                survivorStates = [FacedSurvivorState.Escaped for _ in MAX_ELIMS_RANGE]
-            else: #parse it normally
-                for fss in facedSurvivorsStrings:
-                    fss = fss.strip()
-                    state = FacedSurvivorState.Escaped
-                    parts = fss.split(':')
-                    if len(parts) > 1:
-                        statePart = parts[1].strip()
-                        state = FacedSurvivorState[''.join(e.capitalize() for e in statePart.split(' '))]
-                    survivorStates.append(state)
-            facedSurvivors = [FacedSurvivor(state=state, facedSurvivor=survivor) for state,survivor in zip(survivorStates, survivors)]
-
-        rank = self.__parseRank(s)
+        perks = self.__cachedPerks(tokens.perks)
+        points = self.__parsePoints(tokens.fields)
+        addons = [MatchKillerAddon(killerAddon=addon) for addon in self.__cachedAddons(tokens.fields.get('add ons', 'none'), killer)]
+        gameMap = self.__parseMap(tokens.fields)
+        offering = self.__parseOffering(tokens.fields)
+        facedSurvivors = [FacedSurvivor(state=state, facedSurvivor=survivor) for state, survivor in
+                          self.__cachedFacedSurvivors(tokens.fields.get('survivors', ''), elimsDict['kill'], elimsDict['mori'], elimsDict['disconnect'])]
+        rank = self.__parseRank(tokens.fields)
 
         return KillerMatch(killer=killer, rank=rank, points=points, matchDate=self._matchDate,
                            gameMap=gameMap, offering=offering, killerAddons=addons, perks=[KillerMatchPerk(perk=perk) for perk in perks],
                            facedSurvivors=facedSurvivors, sacrifices=elimsDict['kill'],
                            kills=elimsDict['mori'],disconnects=elimsDict['disconnect'])
 
-
-
-    def __parseSurvivorGame(self, s: str) -> SurvivorMatch:
-        firstCommaIndex = s.index(',')
-        survivorName = s[:firstCommaIndex]
-        survivor = next(_s for _s in self._resources.survivors if survivorName in _s.survivorName)
-
-        perks = self.__parsePerks(s)
-
-        # parsing points
-        points = self.__parsePoints(s)
+    def __resolveFacedSurvivors(self, facedSurvivorsString: str, sacrifices: int, kills: int, disconnects: int) -> tuple[tuple[FacedSurvivorState, Survivor], ...]:
+        if not facedSurvivorsString.startswith('['):
+            return ()
+        elimsDict = {'kill': sacrifices, 'mori': kills, 'disconnect': disconnects}
+        facedSurvivorsStrings = facedSurvivorsString[1:facedSurvivorsString.rfind(']')].split(',')
+        #if there's 4 of any elimination method and no states specified then we assume all of them were eliminated that way
+        #same with escapes, if there's 0 of each method then all of them escaped
+        survivors = [self.__findSurvivor(fss[:fss.index(':')].strip() if ':' in fss else fss.strip()) for fss in facedSurvivorsStrings]
+        survivorStates = []
+        MAX_ELIMS = 4
+        MAX_ELIMS_RANGE = range(MAX_ELIMS)
+        if elimsDict['kill'] == MAX_ELIMS: #all of them sacrificed
+            survivorStates = [FacedSurvivorState.Sacrificed for _ in MAX_ELIMS_RANGE]
+        elif elimsDict['mori'] == MAX_ELIMS: #all of them were mori'd
+            survivorStates = [FacedSurvivorState.Killed for _ in MAX_ELIMS_RANGE]
+        elif elimsDict['disconnect'] == MAX_ELIMS: #all of them disconnected
+            survivorStates = [FacedSurvivorState.Disconnected for _ in MAX_ELIMS_RANGE]
+        elif all(v == 0 for v in elimsDict.values()): #everyone escaped
+            survivorStates = [FacedSurvivorState.Escaped for _ in MAX_ELIMS_RANGE]
+        else: #parse it normally
+            for fss in facedSurvivorsStrings:
+                state = FacedSurvivorState.Escaped
+                parts = fss.strip().split(':')
+                if len(parts) > 1:
+                    statePart = parts[1].strip()
+                    state = FacedSurvivorState.__members__.get(''.join(e.capitalize() for e in statePart.split(' ')))
+                    assert state is not None, f"Unknown survivor state: {statePart}"
+                survivorStates.append(state)
+        return tuple(zip(survivorStates, survivors))
+
+    def __parseSurvivorGame(self, tokens: _MatchLineTokens) -> SurvivorMatch:
+        survivor = self.__findSurvivor(tokens.characterName)
+        perks = self.__cachedPerks(tokens.perks)
+        points = self.__parsePoints(tokens.fields)
 
         #parsing item info
-        itemName = re.search(r'item: (.*?),', s).group(1).strip()
-        item = next((i for i in self._resources.items if i.itemName.lower() == itemName), None)
+        itemName = tokens.fields.get('item', 'none').lower()
+        item = None if itemName == 'none' else self._itemsByName.get(itemName) or self.__fuzzyFind(('items',), itemName, lambda: self._itemsByName)
         # parsing add ons info
-        addons = [] if item is None else self.__parseAddonsInfo(s)
+        addons = [] if item is None else [MatchItemAddon(itemAddon=addon) for addon in self.__cachedAddons(tokens.fields.get('add ons', 'none'), item.itemType)]
         assert len(addons) in range(0,3), "There cannot be more than 2 add-ons"
         assert len(addons) == len(set(map(str, addons))), "There cannot be 2 of the same add-on"
-        # parsing map info
-        gameMap = self.__parseMap(s)
 
-        # parsing offering info
-        offering = self.__parseOffering(s)
-        perkParseStartIndex = s.index('(')
+        gameMap = self.__parseMap(tokens.fields)
+        offering = self.__parseOffering(tokens.fields)
+
         #parsing match result
-        matchResultStr = s[firstCommaIndex+1:perkParseStartIndex].replace(',','').strip()
-        matchResult = SurvivorMatchResult[''.join(e.capitalize() for e in matchResultStr.split(' '))]
+        matchResultStr = tokens.outcome.replace(',','').strip()
+        matchResult = SurvivorMatchResult.__members__.get(''.join(e.capitalize() for e in matchResultStr.split(' ')))
+        assert matchResult is not None, f"Unknown match result: {matchResultStr}"
 
         #parsing faced killer
-        facedKillerName = re.search(r'\(\s*against (.*)\)',s).group(1)
-        facedKiller = next(k for k in self._resources.killers if facedKillerName in k.killerAlias.lower())
-        #parsing rank
-        rank = self.__parseRank(s)
+        facedKillerName = tokens.fields.get('against')
+        assert facedKillerName is not None, "No faced killer specified"
+        facedKiller = self._killersByLowerSubstring.get(facedKillerName.lower())
+        assert facedKiller is not None, f"Unknown killer: {facedKillerName}"
+        rank = self.__parseRank(tokens.fields)
 
         #parsing party size
-        partySize=1
-        partySizeMatch = re.search(r"party size: ([1-4])",s)
-        if partySizeMatch:
-            partySize = int(partySizeMatch.group(1))
+        partySizeStr = tokens.fields.get('party size', '')[:1]
+        partySize = int(partySizeStr) if partySizeStr in ('1', '2', '3', '4') else 1
 
         return SurvivorMatch(survivor=survivor,perks=[SurvivorMatchPerk(perk=perk) for perk in perks], item=item,
                              itemAddons=addons, facedKiller=facedKiller, rank=rank, partySize=partySize,
                              matchResult=matchResult,offering=offering,gameMap=gameMap,points=points,matchDate=self._matchDate)
 
-    def __parsePerks(self, s: str) -> list[Perk]:
-        perkParseStartIndex = s.index('(')
-        perkParseEndIndex = s.index(')', perkParseStartIndex)
-        perksStr = s[perkParseStartIndex + 1:perkParseEndIndex].strip()
+    def __resolvePerks(self, perksStr: str) -> tuple[Perk, ...]:
         perks = []
         if perksStr:
             perkStrings = perksStr.split(',')
@@ -175,128 +226,577 @@ class DBDMatchParser(object):
                 nameParts = perkStr.split(" ")
                 perkName = ' '.join(nameParts[:-1])
                 tier = len(nameParts[-1])
-                perk = next(
-                    (p for p in self._resources.perks if p.perkName.lower() == perkName.lower() and tier == p.perkTier),
-                    None)
+                perk = self._perksByNameAndTier.get((perkName.lower(), tier)) or \
+                       self.__fuzzyFind(('perks', tier), perkName.lower(), lambda: {name: p for (name, t), p in self._perksByNameAndTier.items() if t == tier})
                 assert perk is not None, f"Unknown perk: {perkName} {tier}"
                 perks.append(perk)
         assert len(perks) in range(0, 5), "There cannot be more than 4 perks"
         assert len(perks) == len(set(map(lambda p: p.perkName, perks))), "There cannot be duplicate perks!"
-        return perks
-
-    def __parseAddonsInfo(self, s: str) -> Union[list[MatchItemAddon], list[MatchKillerAddon]]:
-        addons = []
-        match = re.search(r'add ons: (.*)(?=\()', s)
-        if not match:  # means its a killer string
-            addonsIndex = s.index('add ons:')
-            mapIndex = s.find('map:')
-            if mapIndex == -1: #means its at the end of the string
-                addonsStr = s[addonsIndex+len('add ons:'):].strip()
-            else:
-                addonsStr = s[addonsIndex + len('add ons:'):mapIndex].rstrip(',').strip()
-            if addonsStr != 'none':
-                addonNames = [e.strip() for e in addonsStr.split(',') if e]
-                addons = [MatchKillerAddon(killerAddon=next(addon for addon in self._resources.addons if a and addon.addonName.lower() == a.strip().lower())) if a != 'zori' else MatchKillerAddon(killerAddon=next(addon for addon in self._resources.addons if addon.addonName == 'Zōri')) for a in addonNames]
-        else:
-            addonsStr = match.group(1).strip().rstrip(',').strip()
-            if addonsStr != 'none':
-                addonNames = [e.strip() for e in addonsStr.split(',') if e]
-                addons = [MatchItemAddon(itemAddon=next(addon for addon in self._resources.addons if a and addon.addonName.lower() == a.strip().lower())) for a in addonNames]
-        return addons
-
-    def __parsePoints(self, s: str) -> int:
-        match = re.search('(\d+) points', s)
-        return int(match.group(1)) if match else 0
-
-    def __parseOffering(self, s: str) -> Optional[Offering]:
-        offeringMatch = re.search(r'offering: (.*?),', s)
-        offering = None
-        if offeringMatch:
-            offeringName = offeringMatch.group(1).strip().lower()
-            offering = None if offeringName == 'none' else next(
-                o for o in self._resources.offerings if o.offeringName.lower() == offeringName)
+        return tuple(perks)
+
+    def __resolveAddons(self, addonsStr: str, owner: Union[Killer, ItemType]) -> tuple[Union[KillerAddon, ItemAddon], ...]:
+        if addonsStr == 'none':
+            return ()
+        addonIndex = self._killerAddonsByKiller if isinstance(owner, Killer) else self._itemAddonsByItemType
+        addonNames = [e.strip() for e in addonsStr.split(',') if e.strip()]
+        return tuple(self.__findAddon(addonIndex, owner, a) for a in addonNames)
+
+    def __findAddon(self, addonIndex: dict, owner: Union[Killer, ItemType], addonName: str) -> Union[KillerAddon, ItemAddon]:
+        nameKey = addonName.strip().lower()
+        addon = addonIndex.get((owner, nameKey)) or \
+                self.__fuzzyFind(('addons', owner), nameKey, lambda: {name: a for (o, name), a in addonIndex.items() if o == owner})
+        assert addon is not None, f"Unknown add-on: {addonName}"
+        return addon
+
+    def __findSurvivor(self, survivorName: str) -> Survivor:
+        survivor = self._survivorsBySubstring.get(survivorName)
+        assert survivor is not None, f"Unknown survivor: {survivorName}"
+        return survivor
+
+    def __parsePoints(self, fields: dict[str, str]) -> int:
+        return int(fields.get('points', 0))
+
+    def __parseOffering(self, fields: dict[str, str]) -> Optional[Offering]:
+        offeringName = fields.get('offering', 'none').lower()
+        offering = None if offeringName == 'none' else \
+            self._offeringsByName.get(offeringName) or self.__fuzzyFind(('offerings',), offeringName, lambda: self._offeringsByName)
+        assert offeringName == 'none' or offering is not None, f"Unknown offering: {offeringName}"
         return offering
 
-    def __parseRank(self, s:str) -> Optional[int]:
+    def __parseRank(self, fields: dict[str, str]) -> Optional[int]:
         rank = None
-        rankMatch = re.search(r'rank: (\d{1,2})', s)
+        rankMatch = _RANK_REGEX.match(fields.get('rank', ''))
         if rankMatch:
-            rank = int(rankMatch.group(1))
+            rank = int(rankMatch.group(0))
             assert rank in range(Globals.HIGHEST_RANK,
                                  Globals.LOWEST_RANK + 1), "Rank can only be equal to numbers from range 1 to 20"
         return rank
 
-    def __parseMap(self,s:str) -> Optional[GameMap]:
-        gameMapIndex = s.find('map:')
-        gameMap = None
-        if gameMapIndex != -1:
-            commaIndex = s.find(',', gameMapIndex)
-            mapName = s[gameMapIndex + len("map:"):commaIndex].strip().lower()
-            for r in self._resources.realms:
-                gameMap = next((m for m in r.maps if m.mapName.lower() == mapName), None)
-                if gameMap is not None:
-                    break
-        return gameMap
+    def __parseMap(self, fields: dict[str, str]) -> Optional[GameMap]:
+        mapName = fields.get('map', '').lower()
+        return self._mapsByName.get(mapName) or self.__fuzzyFind(('maps',), mapName, lambda: self._mapsByName)
+
+    def __fuzzyFind(self, indexKey: tuple, name: str, nameIndexFunc: Callable[[], dict[str, object]]) -> Optional[object]:
+        if not self._fuzzyMatching or not name:
+            return None
+        fuzzyIndex = self.__fuzzyIndexes.get(indexKey)
+        if fuzzyIndex is None:
+            fuzzyIndex = self.__fuzzyIndexes[indexKey] = _FuzzyNameIndex(nameIndexFunc())
+        return fuzzyIndex.get(name)
+
+
+class _FuzzyNameIndex(object):
+
+    def __init__(self, nameIndex: dict[str, object]):
+        self.__nameIndex = nameIndex
+        self.__index = EditDistanceIndex(nameIndex.keys())
+        self.__resolvedNames = {} #the same typo tends to be repeated all over a log
+
+    def get(self, name: str) -> Optional[object]:
+        if name not in self.__resolvedNames:
+            self.__resolvedNames[name] = self.__search(name)
+        return self.__resolvedNames[name]
+
+    def __search(self, name: str) -> Optional[object]:
+        #the tolerance grows with the name length, so short names still have to be spelled right
+        maxDistance = min(MAX_FUZZY_DISTANCE, len(name) // 4)
+        if maxDistance == 0:
+            return None
+        matches = self.__index.search(name, maxDistance)
+        return self.__nameIndex[matches[0][1]] if matches else None
+
+
+@dataclass(frozen=True)
+class _MatchLineTokens(object):
+    characterName: str
+    outcome: str #eliminations for killer lines, match result for survivor lines
+    perks: str
+    fields: dict[str, str]
+
+
+_ELIMINATIONS_REGEX = re.compile(r'(\d+)\s*(kill|mori|disconnect)')
+_RANK_REGEX = re.compile(r'\d{1,2}')
+#every field that can follow the perks section: "N points", "key: value" pairs and the "(against killer)" part of survivor lines
+_MATCH_FIELDS_REGEX = re.compile(r'(\d+) points|\b(add ons|map|offering|item|rank|party size|survivors):|\(\s*against ([^)]*)\)')
+
+def _tokenizeMatchLine(s: str) -> _MatchLineTokens:
+    #splits a match line into its sections in one scan, a "key: value" field ends where the next field starts
+    firstCommaIndex = s.find(',')
+    if firstCommaIndex == -1:
+        raise ValueError("No commas found in match entry. Corrupted entry")
+    perksStartIndex = s.find('(', firstCommaIndex)
+    perksEndIndex = s.find(')', perksStartIndex)
+    if perksStartIndex == -1 or perksEndIndex == -1:
+        raise ValueError("No perks found in match entry. Corrupted entry")
+    fields = {}
+    key, valueStartIndex = None, 0
+    for match in _MATCH_FIELDS_REGEX.finditer(s, perksEndIndex + 1):
+        if key is not None:
+            fields[key] = s[valueStartIndex:match.start()].strip(' ,')
+        points, key, facedKiller = match.groups()
+        valueStartIndex = match.end()
+        if points is not None:
+            fields['points'] = points
+        elif facedKiller is not None:
+            fields['against'] = facedKiller.strip()
+    if key is not None:
+        fields[key] = s[valueStartIndex:].strip(' ,')
+    return _MatchLineTokens(characterName=s[:firstCommaIndex].strip(), outcome=s[firstCommaIndex + 1:perksStartIndex],
+                            perks=s[perksStartIndex + 1:perksEndIndex].strip(), fields=fields)
+
+def _nameKeys(name: str) -> set[str]:
+    lowered = name.lower()
+    #log files are typed by hand, so names with diacritics (e.g. Zōri) are usually written without them
+    folded = unicodedata.normalize('NFKD', lowered).encode('ascii', 'ignore').decode('ascii')
+    return {lowered, folded}
+
+def _nameIndex(objects: Iterable, nameExtractorFunc: Callable[[object], str]) -> dict[str, object]:
+    index = {}
+    for obj in objects:
+        for key in _nameKeys(nameExtractorFunc(obj)):
+            index.setdefault(key, obj)
+    return index
+
+def _substringIndex(objects: Iterable, nameExtractorFunc: Callable[[object], str]) -> dict[str, object]:
+    #character names in the log are any part of the full name ("Jeff", "Hillbilly"), so every substring is a key.
+    #setdefault keeps the first object in resource order, same as a linear scan would
+    index = {}
+    for obj in objects:
+        name = nameExtractorFunc(obj)
+        for start in range(len(name)):
+            for end in range(start + 1, len(name) + 1):
+                index.setdefault(name[start:end], obj)
+    return index
 
 
 class DBDMatchLogFileLoader(object):
 
-    def __init__(self, parser: DBDMatchParser, encoding: str ='utf-8'):
+    def __init__(self, parser: DBDMatchParser, encoding: str ='utf-8', useMemoryMap: bool = False):
         self.parser = parser
         self.encoding = encoding
+        self.readerType = _MappedLogLineReader if useMemoryMap else _LogLineReader
         self.errors = []
+        self.checkpoint: Optional[LogFileCheckpoint] = None #covers everything read by the last finished load
+        self.linesRead = 0 #lines read by all finished loads and chunk splits, for throughput reports
+
+    def load(self, path: str, checkpoint: Optional[LogFileCheckpoint] = None) -> list[DBDMatch]:
+        return self.__collect(self.iterLoad(path, checkpoint))
+
+    def iterLoad(self, path: str, checkpoint: Optional[LogFileCheckpoint] = None) -> Iterator[Union[DBDMatch, LogFileLoadError]]:
+        #yields games and errors in file order while reading, so only the current line is kept in memory
+        #with a checkpoint of an earlier load only the lines added since then are yielded
+        reader, firstNewLine = self._openReader(path, checkpoint)
+        lines = ((lineNumber, rawLine.decode(self.encoding)) for lineNumber, rawLine in reader)
+        yield from self._iterLines(lines, path, firstNewLine)
+        self.checkpoint = reader.checkpoint()
+        self.linesRead += reader.linesRead
+
+    def iterBatches(self, path: str, batchSize: int, checkpoint: Optional[LogFileCheckpoint] = None) -> Iterator[tuple[list[DBDMatch], list[LogFileLoadError]]]:
+        #every batch holds batchSize games (the last one can be smaller) and the errors found since the previous batch
+        games, errors = [], []
+        for result in self.iterLoad(path, checkpoint):
+            if isinstance(result, LogFileLoadError):
+                errors.append(result)
+                continue
+            games.append(result)
+            if len(games) >= batchSize:
+                yield games, errors
+                games, errors = [], []
+        if games or errors:
+            yield games, errors
+
+    def loadChunk(self, chunk: LogFileChunk) -> list[DBDMatch]:
+        with open(chunk.path, mode='rb') as f:
+            f.seek(chunk.startOffset)
+            data = f.read(chunk.endOffset - chunk.startOffset).decode(self.encoding)
+        return self.__collect(self._iterLines(enumerate(data.split('\n'), chunk.firstLine), chunk.path, chunk.firstNewLine))
+
+    def splitIntoChunks(self, path: str, chunkSize: int = DEFAULT_CHUNK_SIZE, checkpoint: Optional[LogFileCheckpoint] = None) -> list[LogFileChunk]:
+        #chunks always start at a date header (or the beginning of the file), so each of them can be parsed on its own
+        reader, firstNewLine = self._openReader(path, checkpoint)
+        starts = [(reader.offset, reader.lineNumber)]
+        starts += reader.chunkStarts(chunkSize)
+        ends = [offset for offset, _ in starts[1:]] + [reader.offset]
+        self.checkpoint = reader.checkpoint()
+        self.linesRead += reader.linesRead
+        return [LogFileChunk(path, start, end, firstLine, firstNewLine) for (start, firstLine), end in zip(starts, ends) if end > start]
+
+    def _openReader(self, path: str, checkpoint: Optional[LogFileCheckpoint]) -> tuple[_LogLineReader, int]:
+        #returns a reader and the first line that was not loaded before. when the file only grew since the checkpoint,
+        #reading starts at its last date block, so the games appended to it still get the right date
+        fileSize = os.path.getsize(path)
+        modificationTime = os.path.getmtime(path)
+        if checkpoint is not None and self.__isPrefixUnchanged(path, fileSize, modificationTime, checkpoint):
+            reader = self.readerType(path, checkpoint.blockOffset, checkpoint.blockLine, fileSize, modificationTime, self.encoding)
+            return reader, checkpoint.lineCount + 1
+        return self.readerType(path, 0, 1, fileSize, modificationTime, self.encoding), 1
+
+    def _iterLines(self, lines: Iterable[tuple[int, str]], path: str, firstNewLine: int = 1) -> Iterator[Union[DBDMatch, LogFileLoadError]]:
+        #lines before firstNewLine only restore the parsing state, their games and errors were reported already
+        currentDate = None
+        parseGames = False
+        for currentLine, line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            lineDate = parseDateHeader(line)
+            if lineDate is not None:
+                currentDate = lineDate
+                self.parser.setMatchDate(currentDate)
+                parseGames=True
+                continue
+            elif parseGames:
+                try:
+                    game = self.parser.parse(line)
+                    if currentLine >= firstNewLine:
+                        yield game
+                except ValueError:#empty
+                    parseGames=False
+                    currentDate=None
+                except AssertionError as e:
+                    if currentLine >= firstNewLine:
+                        yield LogFileLoadError(path, currentLine, str(e))
+
+    def __collect(self, results: Iterable[Union[DBDMatch, LogFileLoadError]]) -> list[DBDMatch]:
+        games, self.errors = [], []
+        for result in results:
+            if isinstance(result, LogFileLoadError):
+                self.errors.append(str(result))
+            else:
+                games.append(result)
+        return games
 
-    def load(self, path: str) -> list[DBDMatch]:
-        self.errors = []
-        with open(path, mode='r', encoding=self.encoding) as f:
-            games = []
-            currentDate = None
-            parseGames = False
-            currentLine = 0
-            for line in f:
-                currentLine+=1
-                line = line.strip()
-                if not line:
-                    continue
-                if isDateString(line, '%d %m %Y'):
-                    currentDate = datetime.strptime(line, '%d %m %Y')
-                    self.parser.setMatchDate(currentDate)
-                    parseGames=True
+    @staticmethod
+    def __isPrefixUnchanged(path: str, fileSize: int, modificationTime: float, checkpoint: LogFileCheckpoint) -> bool:
+        if fileSize < checkpoint.fileSize:
+            return False
+        if fileSize == checkpoint.fileSize and modificationTime == checkpoint.modificationTime:
+            return True
+        with open(path, mode='rb') as f:
+            f.seek(checkpoint.blockOffset)
+            block = f.read(checkpoint.fileSize - checkpoint.blockOffset)
+        return hashlib.sha1(block).hexdigest() == checkpoint.blockHash
+
+
+class _LogLineReader(object):
+    #reads raw lines up to the file size known when loading started, keeping track of the last date block for checkpoints
+
+    def __init__(self, path: str, offset: int, lineNumber: int, endOffset: int, modificationTime: float, encoding: str):
+        self.path = path
+        self.offset = offset
+        self.lineNumber = lineNumber
+        self.firstLine = lineNumber
+        self.endOffset = endOffset
+        self.modificationTime = modificationTime
+        self.encoding = encoding
+        self.blockOffset = offset
+        self.blockLine = lineNumber
+        self.blockHash = hashlib.sha1()
+
+    def __iter__(self) -> Iterator[tuple[int, bytes]]:
+        for rawLine in self._rawLines():
+            if isDateHeader(rawLine, self.encoding):
+                self.blockOffset, self.blockLine, self.blockHash = self.offset, self.lineNumber, hashlib.sha1()
+            self.blockHash.update(rawLine)
+            self.offset += len(rawLine)
+            yield self.lineNumber, rawLine
+            self.lineNumber += 1
+
+    def chunkStarts(self, chunkSize: int) -> Iterator[tuple[int, int]]:
+        #reads to the end, yielding offsets and line numbers of the date headers that start a new chunk
+        chunkStart = self.offset
+        for lineNumber, _ in self:
+            if self.blockLine == lineNumber and self.blockOffset - chunkStart >= chunkSize:
+                chunkStart = self.blockOffset
+                yield self.blockOffset, lineNumber
+
+    def _rawLines(self) -> Iterator[bytes]:
+        with open(self.path, mode='rb') as f:
+            f.seek(self.offset)
+            for rawLine in f:
+                if self.offset >= self.endOffset:
+                    break
+                yield rawLine[:self.endOffset - self.offset]
+
+    @property
+    def linesRead(self) -> int:
+        return self.lineNumber - self.firstLine
+
+    def checkpoint(self) -> LogFileCheckpoint:
+        return LogFileCheckpoint(filePath=os.path.abspath(self.path), fileSize=self.offset, modificationTime=self.modificationTime,
+                                 blockOffset=self.blockOffset, blockLine=self.blockLine,
+                                 blockHash=self.blockHash.hexdigest(), lineCount=self.lineNumber - 1)
+
+
+class _MappedLogLineReader(_LogLineReader):
+    #finds line ends with find on a memory map of the file instead of going through a buffered file object,
+    #so every line is copied out of the page cache once and nothing is decoded here
+
+    def _rawLines(self) -> Iterator[bytes]:
+        if self.offset >= self.endOffset:
+            return #empty files can't be mapped
+        with open(self.path, mode='rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            while self.offset < self.endOffset:
+                lineEnd = buffer.find(b'\n', self.offset, self.endOffset)
+                yield buffer[self.offset:self.endOffset if lineEnd < 0 else lineEnd + 1]
+
+    def chunkStarts(self, chunkSize: int) -> Iterator[tuple[int, int]]:
+        #date header candidates are found by a regex running over the whole map, only newlines get counted in between.
+        #a header right at the start offset already is the current block
+        if self.offset >= self.endOffset:
+            return
+        with open(self.path, mode='rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            chunkStart = self.offset
+            for header in _DATE_HEADER_LINE_REGEX.finditer(buffer, self.offset, self.endOffset):
+                headerStart = header.start() + 1
+                lineEnd = buffer.find(b'\n', headerStart, self.endOffset)
+                if not isDateHeader(buffer[headerStart:self.endOffset if lineEnd < 0 else lineEnd + 1], self.encoding):
                     continue
-                elif parseGames:
-                    try:
-                        game = self.parser.parse(line)
-                        games.append(game)
-                    except ValueError:#empty
-                        parseGames=False
-                        currentDate=None
-                    except AssertionError as e:
-                        self.errors.append(f'Error at line {currentLine} in file {path}: {e}')
+                self.lineNumber += buffer[self.offset:headerStart].count(b'\n')
+                self.offset = self.blockOffset = headerStart
+                self.blockLine = self.lineNumber
+                if self.blockOffset - chunkStart >= chunkSize:
+                    chunkStart = self.blockOffset
+                    yield self.blockOffset, self.blockLine
+            lastBlock = buffer[self.blockOffset:self.endOffset]
+        self.blockHash = hashlib.sha1(lastBlock)
+        self.lineNumber += lastBlock.count(b'\n')
+        if not lastBlock.endswith(b'\n'):
+            self.lineNumber += 1 #last line without a line break
+        self.offset = self.endOffset
+
+
+def isDateHeader(rawLine: bytes, encoding: str) -> bool:
+    return len(rawLine) <= MAX_DATE_LINE_LENGTH and parseDateHeader(rawLine.decode(encoding).strip()) is not None
+
+def parseDateHeader(line: str) -> Optional[datetime]:
+    #accepts the same lines as datetime.strptime(line, LOG_DATE_FORMAT), but match lines are rejected by the length
+    #and regex checks instead of a raised and caught exception
+    if len(line) > MAX_DATE_LINE_LENGTH or _DATE_HEADER_REGEX.fullmatch(line) is None:
+        return None
+    return _parseDate(line)
+
+@lru_cache(maxsize=4096)
+def _parseDate(line: str) -> Optional[datetime]:
+    day, month, year = map(int, _DATE_HEADER_REGEX.fullmatch(line).groups())
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
 
-        return games
+
+@dataclass(frozen=True)
+class LogFileLoadError(object):
+    path: str
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f'Error at line {self.line} in file {self.path}: {self.message}'
+
+
+@dataclass(frozen=True)
+class LogFileChunk(object):
+    path: str
+    startOffset: int
+    endOffset: int
+    firstLine: int
+    firstNewLine: int = 1
+
+
+#matches cross process boundaries as plain tuples of resource IDs, the parent process turns them back into ORM objects
+def matchToRecord(match: DBDMatch) -> tuple:
+    perkIDs = tuple(p.perk.perkID for p in match.perks)
+    offeringID = match.offering.offeringID if match.offering is not None else None
+    gameMapID = match.gameMap.mapID if match.gameMap is not None else None
+    if isinstance(match, KillerMatch):
+        addonIDs = tuple(a.killerAddon.addonID for a in match.killerAddons)
+        facedSurvivors = tuple((fs.facedSurvivor.survivorID, fs.state.value) for fs in match.facedSurvivors)
+        return (KillerMatch, match.killer.killerID, match.matchDate, match.points, match.rank, offeringID, gameMapID,
+                perkIDs, addonIDs, match.sacrifices, match.kills, match.disconnects, facedSurvivors)
+    addonIDs = tuple(a.itemAddon.addonID for a in match.itemAddons)
+    itemID = match.item.itemID if match.item is not None else None
+    return (SurvivorMatch, match.survivor.survivorID, match.matchDate, match.points, match.rank, offeringID, gameMapID,
+            perkIDs, addonIDs, match.facedKiller.killerID, itemID, match.matchResult.value, match.partySize)
+
+def matchFromRecord(record: tuple, resources: DBDResources) -> DBDMatch:
+    byID = resources.byID
+    matchType, characterID, matchDate, points, rank, offeringID, gameMapID, perkIDs, addonIDs, *rest = record
+    offering = byID[Offering].get(offeringID)
+    gameMap = byID[GameMap].get(gameMapID)
+    if matchType is KillerMatch:
+        sacrifices, kills, disconnects, facedSurvivors = rest
+        return KillerMatch(killer=byID[Killer][characterID], matchDate=matchDate, points=points, rank=rank,
+                           offering=offering, gameMap=gameMap, sacrifices=sacrifices, kills=kills, disconnects=disconnects,
+                           perks=[KillerMatchPerk(perk=byID[Perk][p]) for p in perkIDs],
+                           killerAddons=[MatchKillerAddon(killerAddon=byID[KillerAddon][a]) for a in addonIDs],
+                           facedSurvivors=[FacedSurvivor(facedSurvivor=byID[Survivor][s], state=FacedSurvivorState(state)) for s, state in facedSurvivors])
+    facedKillerID, itemID, matchResult, partySize = rest
+    return SurvivorMatch(survivor=byID[Survivor][characterID], matchDate=matchDate, points=points, rank=rank,
+                         offering=offering, gameMap=gameMap, facedKiller=byID[Killer][facedKillerID], item=byID[Item].get(itemID),
+                         matchResult=SurvivorMatchResult(matchResult), partySize=partySize,
+                         perks=[SurvivorMatchPerk(perk=byID[Perk][p]) for p in perkIDs],
+                         itemAddons=[MatchItemAddon(itemAddon=byID[ItemAddon][a]) for a in addonIDs])
+
+
+def resolveMatchReferences(matches: Iterable[DBDMatch], resources: DBDResources) -> None:
+    #points loaded matches at the shared resource objects by their foreign keys. the values are set as if they were
+    #loaded, so the matches don't look modified to a session they are added to later. raises KeyError for ids the
+    #resources don't know
+    byID = resources.byID
+    for match in matches:
+        set_committed_value(match, 'offering', byID[Offering][match.offeringID] if match.offeringID is not None else None)
+        set_committed_value(match, 'gameMap', byID[GameMap][match.gameMapID] if match.gameMapID is not None else None)
+        if isinstance(match, KillerMatch):
+            set_committed_value(match, 'killer', byID[Killer][match.killerID])
+            for perk in match.perks:
+                set_committed_value(perk, 'perk', byID[Perk][perk.killerPerkID])
+            for addon in match.killerAddons:
+                set_committed_value(addon, 'killerAddon', byID[KillerAddon][addon.killerAddonID])
+            for facedSurvivor in match.facedSurvivors:
+                set_committed_value(facedSurvivor, 'facedSurvivor', byID[Survivor][facedSurvivor.survivorID])
+        else:
+            set_committed_value(match, 'survivor', byID[Survivor][match.survivorID])
+            set_committed_value(match, 'facedKiller', byID[Killer][match.facedKillerID])
+            set_committed_value(match, 'item', byID[Item][match.itemID] if match.itemID is not None else None)
+            for perk in match.perks:
+                set_committed_value(perk, 'perk', byID[Perk][perk.survivorPerkID])
+            for addon in match.itemAddons:
+                set_committed_value(addon, 'itemAddon', byID[ItemAddon][addon.itemAddonID])
+
+
+_processLoader: Optional[DBDMatchLogFileLoader] = None
+
+def _initLoaderProcess(resources: DBDResources, fuzzyMatching: bool, encoding: str):
+    global _processLoader
+    _processLoader = DBDMatchLogFileLoader(DBDMatchParser(resources, fuzzyMatching), encoding)
+
+def _loadChunkInProcess(chunk: LogFileChunk) -> tuple[list[tuple], list[str]]:
+    games = _processLoader.loadChunk(chunk)
+    return [matchToRecord(g) for g in games], _processLoader.errors
 
 
 class LogFileLoadWorkerSignals(QObject):
-    finished = pyqtSignal(object, object) #lets you pass loaded games and errors occurred during loading
+    finished = pyqtSignal(object, object) #lets you pass loaded games and errors occurred during loading, empty without keepResults
     fileLoadStarted = pyqtSignal(str) #emits the file path
+    progressUpdated = pyqtSignal(int, int) #parsed chunks, total chunks
+    batchLoaded = pyqtSignal(object, object) #games and errors parsed since the previous batch, emitted in file order
+    checkpointCreated = pyqtSignal(object) #LogFileCheckpoint of every loaded file, save it together with the games
+    cancelled = pyqtSignal() #emitted instead of finished, checkpoints of files that weren't read to the end are left out
+    failed = pyqtSignal(str) #emitted instead of finished when reading or parsing raised, with the error message
 
 
 class LogFileLoadWorker(QRunnable):
 
 
-    def __init__(self, loader: DBDMatchLogFileLoader, paths: list[str]):
+    def __init__(self, loader: DBDMatchLogFileLoader, paths: list[str], processes: int = 1,
+                 chunkSize: int = DEFAULT_CHUNK_SIZE, batchSize: int = DEFAULT_BATCH_SIZE,
+                 checkpoints: Optional[dict[str, LogFileCheckpoint]] = None, asRecords: bool = False, keepResults: bool = True):
         super(LogFileLoadWorker, self).__init__()
         self.signals = LogFileLoadWorkerSignals()
         self.filePaths = paths
         self.loader = loader
+        self.processes = processes
+        self.chunkSize = chunkSize
+        self.batchSize = batchSize
+        self.checkpoints = checkpoints or {} #keyed by absolute file path
+        self.asRecords = asRecords #emit matchToRecord tuples instead of mapped objects, for Database.saveMatchRecords
+        self.keepResults = keepResults #without it the games are only emitted in batches and not held on to for finished
+        self.__cancelled = False
+
+    def cancel(self) -> None:
+        #takes effect after the batch or chunk that is being parsed right now
+        self.__cancelled = True
 
     def run(self) -> None:
-        allGames, allErrors = [], []
+        #an exception escaping the runnable would leave whoever waits for finished waiting forever
+        try:
+            allGames, allErrors = self.__load()
+        except Exception as e:
+            self.signals.failed.emit(f'{type(e).__name__}: {e}')
+            return
+        if self.__cancelled:
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(allGames, allErrors)
+
+    def __load(self) -> tuple[list[DBDMatch], list[str]]:
+        if self.processes <= 1:
+            return self.__loadSequentially()
+        chunks, newCheckpoints = [], []
         for file in self.filePaths:
+            if self.__cancelled:
+                return [], []
+            self.signals.fileLoadStarted.emit(file)
+            chunks += self.loader.splitIntoChunks(file, self.chunkSize, self.__checkpointFor(file))
+            newCheckpoints.append(self.loader.checkpoint)
+        #splitting has read the files already, a single chunk is parsed right here instead of reading it once more
+        allGames, allErrors = self.__loadInParallel(chunks) if len(chunks) > 1 else self.__loadChunks(chunks)
+        if not self.__cancelled:
+            for checkpoint in newCheckpoints:
+                self.signals.checkpointCreated.emit(checkpoint)
+        return allGames, allErrors
+
+    def __loadSequentially(self) -> tuple[list[DBDMatch], list[str]]:
+        allGames, allErrors = [], []
+        for i, file in enumerate(self.filePaths):
+            if self.__cancelled:
+                break
             self.signals.fileLoadStarted.emit(file)
-            games = self.loader.load(file)
+            for games, errors in self.loader.iterBatches(file, self.batchSize, self.__checkpointFor(file)):
+                games = [matchToRecord(g) for g in games] if self.asRecords else games
+                errors = [str(e) for e in errors]
+                self.signals.batchLoaded.emit(games, errors)
+                if self.keepResults:
+                    allGames += games
+                    allErrors += errors
+                if self.__cancelled:
+                    return allGames, allErrors
+            self.signals.checkpointCreated.emit(self.loader.checkpoint)
+            self.signals.progressUpdated.emit(i + 1, len(self.filePaths))
+        return allGames, allErrors
+
+    def __loadChunks(self, chunks: list[LogFileChunk]) -> tuple[list[DBDMatch], list[str]]:
+        allGames, allErrors = [], []
+        for i, chunk in enumerate(chunks):
+            if self.__cancelled:
+                break
+            games = self.loader.loadChunk(chunk)
+            games = [matchToRecord(g) for g in games] if self.asRecords else games
             errors = self.loader.errors
-            allGames += games
-            allErrors += errors
-        self.signals.finished.emit(allGames, allErrors)
-
+            self.signals.batchLoaded.emit(games, errors)
+            if self.keepResults:
+                allGames += games
+                allErrors += errors
+            self.signals.progressUpdated.emit(i + 1, len(chunks))
+        return allGames, allErrors
+
+    def __loadInParallel(self, chunks: list[LogFileChunk]) -> tuple[list[DBDMatch], list[str]]:
+        resources = self.loader.parser.resources
+        results = [None] * len(chunks)
+        allGames, allErrors, nextChunk = [], [], 0
+        #spawn instead of fork, forking a process that runs Qt threads is not safe and spawn is the only option on Windows anyway
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(chunks)), mp_context=context,
+                                 initializer=_initLoaderProcess, initargs=(resources, self.loader.parser.fuzzyMatching, self.loader.encoding)) as executor:
+            futures = {executor.submit(_loadChunkInProcess, chunk): i for i, chunk in enumerate(chunks)}
+            for done, future in enumerate(as_completed(futures), 1):
+                if self.__cancelled:
+                    executor.shutdown(wait=False, cancel_futures=True) #leaving the with block then only waits for running chunks
+                    break
+                results[futures[future]] = future.result()
+                self.signals.progressUpdated.emit(done, len(chunks))
+                #chunks are emitted in submission order, which keeps the file and line order, as soon as the ones before are done
+                while nextChunk < len(chunks) and results[nextChunk] is not None:
+                    records, errors = results[nextChunk]
+                    results[nextChunk] = None
+                    nextChunk += 1
+                    games = records if self.asRecords else [matchFromRecord(r, resources) for r in records]
+                    self.signals.batchLoaded.emit(games, errors)
+                    if self.keepResults:
+                        allGames += games
+                        allErrors += errors
+        return allGames, allErrors
+
+    def __checkpointFor(self, path: str) -> Optional[LogFileCheckpoint]:
+        return self.checkpoints.get(os.path.abspath(path))
@@ -1,40 +1,106 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
 from operator import itemgetter
-from typing import Optional, Union
+from typing import Callable, Optional, Union, Iterator, Sequence
 
+import pandas as pd
 import requests
 import sqlalchemy
 from PIL import Image
 from PyQt5.QtCore import QThread, pyqtSlot, pyqtSignal, QObject, QRunnable
 from bs4 import BeautifulSoup
-from sqlalchemy import select
+from sqlalchemy import select, event, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.engine import Transaction
 from sqlalchemy.orm import Session, sessionmaker
 
-from classutil import DBDResources
+from classutil import DBDResources, matchToRecord, resolveMatchReferences
 from models import Killer, Survivor, Perk, PerkType, ItemType, Item, Offering, Realm, GameMap, KillerAddon, ItemAddon, \
-    DBDMatch
+    DBDMatch, LogFileCheckpoint, mapperRegistry, KillerMatch, SurvivorMatch, KillerMatchPerk, SurvivorMatchPerk, \
+    MatchKillerAddon, MatchItemAddon, FacedSurvivor, FacedSurvivorState, SurvivorMatchResult, RESOURCE_LOAD_OPTIONS, \
+    MatchAggregate, AggregateKind, MISSING_SUB_KEY, SURVIVOR_SIDE, KILLER_SIDE
+from statistics import MatchFrames, typedFrame, KILLER_MATCH_COLUMNS, SURVIVOR_MATCH_COLUMNS, FACED_SURVIVOR_COLUMNS, \
+    MATCH_PERK_COLUMNS, MATCH_ADDON_COLUMNS, AGGREGATE_COLUMNS, StatisticsFilter
 from util import saveImageFromURL
 
+BULK_INSERT_BATCH_SIZE = 5000 #rows per executemany call
+SAVE_CHUNK_SIZE = 2000 #matches per committed transaction when saving from the GUI
+
+#pragmas run on every new SQLite connection, picked with SQLITE_PROFILE in config.cfg (a profile name or a dict of pragmas).
+#in WAL mode readers don't wait for a writer, so the GUI can query while a save or a resource update runs,
+#and synchronous=NORMAL only syncs at checkpoints instead of on every commit
+SQLITE_PROFILES: dict[str, dict[str, Union[int, str]]] = {
+    'default': {}, #whatever SQLite defaults to: rollback journal, synchronous=FULL, 2MB page cache
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536, #negative means KiB, so 64MB
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000 #ms a connection waits for a lock before failing
+    }
+}
+DEFAULT_SQLITE_PROFILE = 'wal'
+SQLITE_PRAGMAS = {'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout', 'foreign_keys', 'wal_autocheckpoint'}
+
+
+def sqlitePragmas(profile: Union[str, dict[str, Union[int, str]]]) -> dict[str, Union[int, str]]:
+    pragmas = profile if isinstance(profile, dict) else SQLITE_PROFILES.get(profile)
+    if pragmas is None:
+        raise ValueError(f"Unknown SQLite profile '{profile}', expected one of: {', '.join(SQLITE_PROFILES)}")
+    for name, value in pragmas.items():
+        if name not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma '{name}'")
+        if not isinstance(value, int) and not str(value).isalnum():
+            raise ValueError(f"Invalid value '{value}' for SQLite pragma '{name}'")
+    return dict(pragmas)
+
 
 class Database:
     __instance = None
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, saveChunkSize: int = SAVE_CHUNK_SIZE, sqliteProfile: Union[str, dict] = DEFAULT_SQLITE_PROFILE):
         self._engine = sqlalchemy.create_engine(url)
+        self.saveChunkSize = max(1, saveChunkSize)
+        if self._engine.dialect.name == 'sqlite':
+            self.sqlitePragmas = sqlitePragmas(sqliteProfile)
+            event.listen(self._engine, 'connect', self.__applySqlitePragmas)
         self._sessionmaker = sessionmaker(self._engine)
+        self.__referenceData: Optional[DBDResources] = None
+        self.__referenceDataLock = threading.Lock()
+        self.__migrate()
+
+    def __applySqlitePragmas(self, dbapiConnection, connectionRecord):
+        cursor = dbapiConnection.cursor()
+        for name, value in self.sqlitePragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    def __migrate(self):
+        #brings database files made by older versions up to the current schema, every step can run any number of times.
+        #files made before log file checkpoints and match aggregates existed don't have their tables yet
+        mapperRegistry.metadata.create_all(self._engine, tables=[LogFileCheckpoint.__table__, MatchAggregate.__table__])
+        #nor the indexes for the columns matches are filtered and joined on
+        with self._engine.begin() as connection:
+            for table in mapperRegistry.metadata.sorted_tables:
+                for index in sorted(table.indexes, key=lambda i: i.name):
+                    index.create(connection, checkfirst=True)
+        #and the matches they already have aren't counted in the aggregates
+        with self._engine.begin() as connection:
+            if connection.execute(select(MatchAggregate.__table__.c.kind).limit(1)).first() is None:
+                Database.__addMatchAggregates(connection)
 
     def newResourceInstance(self) -> DBDResources:
         with self.getNewSession() as s:
             extractor = itemgetter(0)
             killers = list(map(extractor, s.execute(
                 sqlalchemy.select(Killer)).all()))  # for some ungodly reason this returns list of 1-element tuples
-            realms = list(map(extractor, s.execute(sqlalchemy.select(Realm)).all()))
+            realms = list(map(extractor, s.execute(sqlalchemy.select(Realm).options(*RESOURCE_LOAD_OPTIONS[Realm])).all()))
             survivors = list(map(extractor, s.execute(sqlalchemy.select(Survivor)).all()))
-            killerAddons = list(map(extractor, s.execute(sqlalchemy.select(KillerAddon)).all()))
+            killerAddons = list(map(extractor, s.execute(sqlalchemy.select(KillerAddon).options(*RESOURCE_LOAD_OPTIONS[KillerAddon])).all()))
             itemAddons = list(map(extractor, s.execute(sqlalchemy.select(ItemAddon)).all()))
             addons = killerAddons + itemAddons
             offerings = list(map(extractor, s.execute(sqlalchemy.select(Offering)).all()))
@@ -42,6 +108,267 @@ class Database:
             items = list(map(extractor, s.execute(sqlalchemy.select(Item)).all()))
             return DBDResources(killers, survivors, addons, items, offerings, realms, perks)
 
+    @property
+    def referenceData(self) -> DBDResources:
+        #killers, survivors, perks, add-ons, items, offerings and maps are loaded once per process and shared by
+        #everything that only reads them, matches from loadMatches included
+        with self.__referenceDataLock:
+            if self.__referenceData is None:
+                self.__referenceData = self.newResourceInstance()
+            return self.__referenceData
+
+    def invalidateReferenceData(self):
+        with self.__referenceDataLock:
+            self.__referenceData = None
+
+    def loadMatches(self, matchType: type, loadOptions: dict, *criteria) -> list[DBDMatch]:
+        #loadOptions is one of the option sets from models, so only match and child rows are queried
+        with self.getNewSession() as s:
+            matches = s.query(matchType).options(*loadOptions[matchType]).filter(*criteria).order_by(matchType.matchID).all()
+        try:
+            resolveMatchReferences(matches, self.referenceData)
+        except KeyError: #resources were added since they were cached
+            self.invalidateReferenceData()
+            resolveMatchReferences(matches, self.referenceData)
+        return matches
+
+    def loadMatchFrames(self, statisticsFilter: Optional[StatisticsFilter] = None) -> MatchFrames:
+        #the statistics input as a few flat selects. dates and enums are read as the stored text and converted per column,
+        #so no row goes through a mapped object or a type processor. with a filter only the rows of the matches it selects are read
+        raw = lambda column: sqlalchemy.type_coerce(column, sqlalchemy.Text) if isinstance(column.type, (sqlalchemy.Date, sqlalchemy.Enum)) else column
+        killerWhere, survivorWhere = Database.__filterConditions(statisticsFilter)
+        ofKillerMatches, ofSurvivorMatches = Database.__childFilters(statisticsFilter, killerWhere, survivorWhere)
+        with self._engine.connect() as connection:
+            def frame(table: sqlalchemy.Table, columns: dict, names: Optional[list[str]] = None, where=sqlalchemy.true()) -> pd.DataFrame:
+                selected = [raw(table.c[name]) for name in (names or columns)]
+                return typedFrame(connection.execute(sqlalchemy.select(*selected).where(where).order_by(selected[0], *table.primary_key.columns)).all(), columns)
+            return MatchFrames(
+                killerMatches=frame(KillerMatch.__table__, KILLER_MATCH_COLUMNS, where=killerWhere),
+                facedSurvivors=frame(FacedSurvivor.__table__, FACED_SURVIVOR_COLUMNS, ['killerMatchID', 'survivorID', 'state'],
+                                     ofKillerMatches(FacedSurvivor.__table__.c.killerMatchID)),
+                killerPerks=frame(KillerMatchPerk.__table__, MATCH_PERK_COLUMNS, ['killerMatchID', 'killerPerkID'],
+                                  ofKillerMatches(KillerMatchPerk.__table__.c.killerMatchID)),
+                killerAddons=frame(MatchKillerAddon.__table__, MATCH_ADDON_COLUMNS, ['killerMatchID', 'killerAddonID'],
+                                   ofKillerMatches(MatchKillerAddon.__table__.c.killerMatchID)),
+                survivorMatches=frame(SurvivorMatch.__table__, SURVIVOR_MATCH_COLUMNS, where=survivorWhere),
+                survivorPerks=frame(SurvivorMatchPerk.__table__, MATCH_PERK_COLUMNS, ['survivorMatchID', 'survivorPerkID'],
+                                    ofSurvivorMatches(SurvivorMatchPerk.__table__.c.survivorMatchID)),
+                itemAddons=frame(MatchItemAddon.__table__, MATCH_ADDON_COLUMNS, ['survivorMatchID', 'itemAddonID'],
+                                 ofSurvivorMatches(MatchItemAddon.__table__.c.survivorMatchID))
+            )
+
+    def contentVersion(self) -> str:
+        #changes with every save: the database plus the highest match id and the match count of both match tables.
+        #anything calculated from the matches can be cached under it
+        with self._engine.connect() as connection:
+            counts = [connection.execute(select(func.max(table.c.matchID), func.count())).one() for table in (KillerMatch.__table__, SurvivorMatch.__table__)]
+        return f'{self._engine.url}|' + '|'.join(f'{maxID}:{count}' for maxID, count in counts)
+
+    def loadMatchAggregates(self, statisticsFilter: Optional[StatisticsFilter] = None) -> pd.DataFrame:
+        #the stored aggregates, or with a filter the same counters grouped by SQLite over the matches it selects
+        table = MatchAggregate.__table__
+        with self._engine.connect() as connection:
+            if statisticsFilter is None or statisticsFilter.isEmpty:
+                rows = connection.execute(select(sqlalchemy.type_coerce(table.c.kind, sqlalchemy.Text), *list(table.columns)[1:])).all()
+            else:
+                rows = [row for query in Database.__aggregateSelects(statisticsFilter=statisticsFilter) for row in connection.execute(query)]
+        return typedFrame(rows, AGGREGATE_COLUMNS)
+
+    def checkMatchAggregates(self, rebuild: bool = False) -> bool:
+        #compares the stored aggregates with ones counted from the match rows again, and with rebuild replaces them
+        #when they differ. they can only drift if matches were written without saveMatchRecords
+        table = MatchAggregate.__table__
+        with self._engine.begin() as connection:
+            stored = set(connection.execute(select(sqlalchemy.type_coerce(table.c.kind, sqlalchemy.Text), *list(table.columns)[1:])).all())
+            counted = {tuple(row) for query in Database.__aggregateSelects() for row in connection.execute(query)}
+            if stored != counted and rebuild:
+                connection.execute(table.delete())
+                Database.__addMatchAggregates(connection)
+        return stored == counted
+
+    def saveMatches(self, matches: list[DBDMatch], checkpoints: Optional[list[LogFileCheckpoint]] = None):
+        self.saveMatchRecords([matchToRecord(m) for m in matches], checkpoints)
+
+    def iterSaveMatches(self, matches: Sequence[DBDMatch], checkpoints: Optional[list[LogFileCheckpoint]] = None,
+                        chunkSize: Optional[int] = None) -> Iterator[int]:
+        #yields the number of matches written so far after each chunk. without checkpoints every chunk is committed on
+        #its own and closing the iterator between chunks keeps what was already committed. checkpoints mark log files
+        #as loaded, so a partial save of their matches would be read from the files once more by the next import:
+        #then the chunks share one transaction, which is only committed with the checkpoints after the last chunk and
+        #is rolled back when the iterator is closed before that
+        chunkSize = max(1, chunkSize or self.saveChunkSize)
+        if len(matches) <= 0:
+            self.saveMatchRecords([], checkpoints)
+            yield 0
+            return
+        if not checkpoints:
+            for start in range(0, len(matches), chunkSize):
+                end = min(start + chunkSize, len(matches))
+                self.saveMatchRecords([matchToRecord(m) for m in matches[start:end]])
+                yield end
+            return
+        with self._engine.begin() as connection:
+            for start in range(0, len(matches), chunkSize):
+                end = min(start + chunkSize, len(matches))
+                Database.__insertMatchRecords(connection, [matchToRecord(m) for m in matches[start:end]], checkpoints if end >= len(matches) else None)
+                if end < len(matches):
+                    yield end
+        yield len(matches)
+
+    def saveMatchRecords(self, records: list[tuple], checkpoints: Optional[list[LogFileCheckpoint]] = None):
+        with self._engine.begin() as connection: #one transaction, so a file is never marked as loaded without its games
+            Database.__insertMatchRecords(connection, records, checkpoints)
+
+    @staticmethod
+    def __insertMatchRecords(connection: sqlalchemy.engine.Connection, records: list[tuple], checkpoints: Optional[list[LogFileCheckpoint]] = None):
+        #core executemany inserts instead of the ORM unit of work, which issues one INSERT per match, perk, add-on and
+        #faced survivor. records are the resource id tuples made by classutil.matchToRecord
+        checkpoints = checkpoints or []
+        killerRecords = [r for r in records if r[0] is KillerMatch]
+        matchIDs = killerMatchIDs = Database.__insertMatches(connection, KillerMatch.__table__, [{
+            'killerID': killerID, 'matchDate': matchDate, 'points': points, 'rank': rank, 'offeringID': offeringID,
+            'gameMapID': gameMapID, 'sacrifices': sacrifices, 'kills': kills, 'disconnects': disconnects
+        } for _, killerID, matchDate, points, rank, offeringID, gameMapID, _, _, sacrifices, kills, disconnects, _ in killerRecords])
+        Database.__insertInBatches(connection, KillerMatchPerk.__table__,
+                                   [{'killerPerkID': p, 'killerMatchID': i} for i, r in zip(matchIDs, killerRecords) for p in r[7]])
+        Database.__insertInBatches(connection, MatchKillerAddon.__table__,
+                                   [{'killerAddonID': a, 'killerMatchID': i} for i, r in zip(matchIDs, killerRecords) for a in r[8]])
+        Database.__insertInBatches(connection, FacedSurvivor.__table__,
+                                   [{'survivorID': survivorID, 'state': FacedSurvivorState(state), 'killerMatchID': i}
+                                    for i, r in zip(matchIDs, killerRecords) for survivorID, state in r[12]])
+
+        survivorRecords = [r for r in records if r[0] is SurvivorMatch]
+        matchIDs = Database.__insertMatches(connection, SurvivorMatch.__table__, [{
+            'survivorID': survivorID, 'matchDate': matchDate, 'points': points, 'rank': rank, 'offeringID': offeringID,
+            'gameMapID': gameMapID, 'facedKillerID': facedKillerID, 'itemID': itemID,
+            'matchResult': SurvivorMatchResult(matchResult), 'partySize': partySize
+        } for _, survivorID, matchDate, points, rank, offeringID, gameMapID, _, _, facedKillerID, itemID, matchResult, partySize in survivorRecords])
+        Database.__insertInBatches(connection, SurvivorMatchPerk.__table__,
+                                   [{'survivorPerkID': p, 'survivorMatchID': i} for i, r in zip(matchIDs, survivorRecords) for p in r[7]])
+        Database.__insertInBatches(connection, MatchItemAddon.__table__,
+                                   [{'itemAddonID': a, 'survivorMatchID': i} for i, r in zip(matchIDs, survivorRecords) for a in r[8]])
+        Database.__addMatchAggregates(connection, killerMatchIDs, matchIDs)
+
+        checkpointTable = LogFileCheckpoint.__table__
+        connection.execute(checkpointTable.delete().where(checkpointTable.c.filePath.in_([c.filePath for c in checkpoints])))
+        Database.__insertInBatches(connection, checkpointTable, [{column.name: getattr(c, column.name) for column in checkpointTable.columns} for c in checkpoints])
+
+    @staticmethod
+    def __filterConditions(statisticsFilter: Optional[StatisticsFilter]) -> tuple[sqlalchemy.sql.ColumnElement, sqlalchemy.sql.ColumnElement]:
+        #the where clauses of the killer and of the survivor matches a filter selects. the match date and the character
+        #columns are indexed, so SQLite only visits the selected rows for the filters that narrow things down the most
+        killerConditions, survivorConditions = [], []
+        if statisticsFilter is not None:
+            for matches, conditions in ((KillerMatch.__table__.c, killerConditions), (SurvivorMatch.__table__.c, survivorConditions)):
+                if statisticsFilter.startDate is not None:
+                    conditions.append(matches.matchDate >= statisticsFilter.startDate)
+                if statisticsFilter.endDate is not None:
+                    conditions.append(matches.matchDate <= statisticsFilter.endDate)
+                if statisticsFilter.minRank is not None:
+                    conditions.append(matches.rank >= statisticsFilter.minRank)
+                if statisticsFilter.maxRank is not None:
+                    conditions.append(matches.rank <= statisticsFilter.maxRank)
+            survivorMatches = SurvivorMatch.__table__.c
+            if statisticsFilter.killerIDs is not None:
+                killerConditions.append(KillerMatch.__table__.c.killerID.in_(sorted(statisticsFilter.killerIDs)))
+                survivorConditions.append(survivorMatches.facedKillerID.in_(sorted(statisticsFilter.killerIDs)))
+            if statisticsFilter.survivorIDs is not None:
+                survivorConditions.append(survivorMatches.survivorID.in_(sorted(statisticsFilter.survivorIDs)))
+            if statisticsFilter.partySizes is not None:
+                survivorConditions.append(survivorMatches.partySize.in_(sorted(statisticsFilter.partySizes)))
+        return sqlalchemy.and_(sqlalchemy.true(), *killerConditions), sqlalchemy.and_(sqlalchemy.true(), *survivorConditions)
+
+    @staticmethod
+    def __childFilters(statisticsFilter: Optional[StatisticsFilter], killerWhere, survivorWhere) -> tuple[Callable, Callable]:
+        #turn a match id column of a child table into the condition that its match is one the filter selects
+        if statisticsFilter is None or statisticsFilter.isEmpty:
+            return (lambda column: sqlalchemy.true()), (lambda column: sqlalchemy.true())
+        killerMatchIDs = select(KillerMatch.__table__.c.matchID).where(killerWhere)
+        survivorMatchIDs = select(SurvivorMatch.__table__.c.matchID).where(survivorWhere)
+        return (lambda column: column.in_(killerMatchIDs)), (lambda column: column.in_(survivorMatchIDs))
+
+    @staticmethod
+    def __aggregateSelects(killerMatchIDs: Optional[Sequence[int]] = None, survivorMatchIDs: Optional[Sequence[int]] = None,
+                           statisticsFilter: Optional[StatisticsFilter] = None) -> list[sqlalchemy.sql.Select]:
+        #the match_aggregates rows for the matches with the given (consecutive) ids, or for all matches without them,
+        #of the matches the filter selects
+        killerMatches, survivorMatches, facedSurvivors = KillerMatch.__table__.c, SurvivorMatch.__table__.c, FacedSurvivor.__table__.c
+        killerWhere, survivorWhere = Database.__filterConditions(statisticsFilter)
+        ofKillerMatches, _ = Database.__childFilters(statisticsFilter, killerWhere, survivorWhere)
+        inRange = lambda column, matchIDs: column.between(matchIDs[0], matchIDs[-1]) if matchIDs is not None else sqlalchemy.true()
+        enumValue = lambda column, enumType: sqlalchemy.case({m.name: m.value for m in enumType}, value=sqlalchemy.type_coerce(column, sqlalchemy.Text))
+        dateOrdinal = lambda column: sqlalchemy.cast(func.julianday(column) - 1721424.5, sqlalchemy.Integer) #julianday of 0001-01-01 is ordinal 1
+        def counters(kind: AggregateKind, keys: list, firstSeen, where, games=None, points=None, sacrifices=None, kills=None, disconnects=None):
+            #keys are the key column and the sub key column or value
+            sumOrZero = lambda column: func.sum(column) if column is not None else sqlalchemy.literal(0)
+            subKey = keys[1] if isinstance(keys[1], sqlalchemy.sql.ColumnElement) else sqlalchemy.literal(keys[1])
+            return select(sqlalchemy.literal(kind.name), keys[0], subKey, games if games is not None else func.count(), sumOrZero(points),
+                          sumOrZero(sacrifices), sumOrZero(kills), sumOrZero(disconnects), func.min(firstSeen)) \
+                .where(where).group_by(*(k for k in keys if isinstance(k, sqlalchemy.sql.ColumnElement)))
+
+        selects = []
+        if killerMatchIDs is None or len(killerMatchIDs) > 0:
+            inKillerRange = sqlalchemy.and_(inRange(killerMatches.matchID, killerMatchIDs), killerWhere)
+            inFacedRange = sqlalchemy.and_(inRange(facedSurvivors.killerMatchID, killerMatchIDs), ofKillerMatches(facedSurvivors.killerMatchID))
+            selects += [
+                counters(AggregateKind.KillerGames, [killerMatches.killerID, MISSING_SUB_KEY], killerMatches.matchID, inKillerRange, points=killerMatches.points,
+                         sacrifices=killerMatches.sacrifices, kills=killerMatches.kills, disconnects=killerMatches.disconnects),
+                counters(AggregateKind.FacedSurvivorStates, [facedSurvivors.survivorID, enumValue(facedSurvivors.state, FacedSurvivorState)],
+                         facedSurvivors.facedSurvivorID, inFacedRange),
+                counters(AggregateKind.FacedSurvivorGames, [facedSurvivors.survivorID, MISSING_SUB_KEY], facedSurvivors.killerMatchID, inFacedRange,
+                         games=func.count(facedSurvivors.killerMatchID.distinct())),
+                counters(AggregateKind.MapGames, [killerMatches.gameMapID, KILLER_SIDE], killerMatches.matchID,
+                         sqlalchemy.and_(inKillerRange, killerMatches.gameMapID.is_not(None))),
+                counters(AggregateKind.DateGames, [dateOrdinal(killerMatches.matchDate), KILLER_SIDE], killerMatches.matchID, inKillerRange,
+                         points=killerMatches.points)
+            ]
+        if survivorMatchIDs is None or len(survivorMatchIDs) > 0:
+            inSurvivorRange = sqlalchemy.and_(inRange(survivorMatches.matchID, survivorMatchIDs), survivorWhere)
+            matchResult = enumValue(survivorMatches.matchResult, SurvivorMatchResult)
+            selects += [
+                counters(AggregateKind.SurvivorResults, [survivorMatches.survivorID, matchResult], survivorMatches.matchID, inSurvivorRange,
+                         points=survivorMatches.points),
+                counters(AggregateKind.FacedKillerResults, [survivorMatches.facedKillerID, matchResult], survivorMatches.matchID, inSurvivorRange),
+                counters(AggregateKind.SurvivorItems, [survivorMatches.itemID, MISSING_SUB_KEY], survivorMatches.matchID,
+                         sqlalchemy.and_(inSurvivorRange, survivorMatches.itemID.is_not(None))),
+                counters(AggregateKind.MapGames, [survivorMatches.gameMapID, SURVIVOR_SIDE], survivorMatches.matchID,
+                         sqlalchemy.and_(inSurvivorRange, survivorMatches.gameMapID.is_not(None))),
+                counters(AggregateKind.DateGames, [dateOrdinal(survivorMatches.matchDate), SURVIVOR_SIDE], survivorMatches.matchID, inSurvivorRange,
+                         points=survivorMatches.points)
+            ]
+        return selects
+
+    @staticmethod
+    def __addMatchAggregates(connection: sqlalchemy.engine.Connection, killerMatchIDs: Optional[Sequence[int]] = None,
+                             survivorMatchIDs: Optional[Sequence[int]] = None):
+        #counts the just inserted matches into the aggregates with one upsert per aggregate, in the caller's transaction
+        table = MatchAggregate.__table__
+        counterColumns = [c.name for c in table.columns if not c.primary_key and c.name != 'firstSeen']
+        for query in Database.__aggregateSelects(killerMatchIDs, survivorMatchIDs):
+            insert = sqlite.insert(table).from_select([c.name for c in table.columns], query)
+            connection.execute(insert.on_conflict_do_update(index_elements=list(table.primary_key.columns), set_={
+                **{name: table.c[name] + insert.excluded[name] for name in counterColumns},
+                'firstSeen': func.min(table.c.firstSeen, insert.excluded.firstSeen)
+            }))
+
+    @staticmethod
+    def __insertMatches(connection: sqlalchemy.engine.Connection, table: sqlalchemy.Table, rows: list[dict]) -> list[int]:
+        #the first match gets its id from the database (and the write lock comes with it), the rest get the following ids,
+        #so the child rows can reference them without reading anything back
+        if len(rows) <= 0:
+            return []
+        firstID = connection.execute(table.insert(), rows[0]).inserted_primary_key[0]
+        matchIDs = list(range(firstID, firstID + len(rows)))
+        for row, matchID in zip(rows, matchIDs):
+            row['matchID'] = matchID
+        Database.__insertInBatches(connection, table, rows[1:])
+        return matchIDs
+
+    @staticmethod
+    def __insertInBatches(connection: sqlalchemy.engine.Connection, table: sqlalchemy.Table, rows: list[dict]):
+        for i in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            connection.execute(table.insert(), rows[i:i + BULK_INSERT_BATCH_SIZE])
+
     def getNewSession(self) -> Session:
         session = self._sessionmaker()
         session.expire_on_commit=False
@@ -52,9 +379,16 @@ class Database:
         return Database.__instance
 
     @staticmethod
-    def init(dbUrl: str):
+    def init(dbUrl: str, saveChunkSize: int = SAVE_CHUNK_SIZE, sqliteProfile: Union[str, dict] = DEFAULT_SQLITE_PROFILE):
         if Database.__instance is None:
-            Database.__instance = Database(dbUrl)
+            Database.__instance = Database(dbUrl, saveChunkSize, sqliteProfile)
+
+    @staticmethod
+    def close():
+        #after this init() can connect to another database
+        if Database.__instance is not None:
+            Database.__instance._engine.dispose()
+            Database.__instance = None
 
     @staticmethod
     def _update():
@@ -350,6 +684,7 @@ class DatabaseUpdateWorker(QRunnable):
                         curIndex += 1
                         self.signals.progressUpdated.emit(messageTemplate.format(curIndex, totalWork))
 
+        Database.instance().invalidateReferenceData()
         self.signals.finished.emit()
 
 
@@ -641,17 +976,31 @@ class DatabaseUpdateWorker(QRunnable):
 
 
 class DatabaseMatchListWorkerSignals(QObject):
+    progressUpdated = pyqtSignal(int, int, float) #matches saved, matches total, matches per second
+    cancelled = pyqtSignal(int) #matches saved before the cancellation
     finished = pyqtSignal()
 
 class DatabaseMatchListSaveWorker(QRunnable):
 
-    def __init__(self, matchesToSave: list[DBDMatch]):
+    def __init__(self, matchesToSave: list[DBDMatch], checkpoints: Optional[list[LogFileCheckpoint]] = None, chunkSize: Optional[int] = None):
         super().__init__()
         self.matches = matchesToSave
+        self.checkpoints = checkpoints or []
+        self.chunkSize = chunkSize
         self.signals = DatabaseMatchListWorkerSignals()
+        self.__cancelled = False
+
+    def cancel(self) -> None:
+        #takes effect after the chunk that is being saved right now is committed
+        self.__cancelled = True
 
     def run(self) -> None:
-        with Database.instance().getNewSession() as s:
-            s.add_all(self.matches)
-            s.commit()
-            self.signals.finished.emit()
\ No newline at end of file
+        saved, start = 0, time.perf_counter()
+        chunks = Database.instance().iterSaveMatches(self.matches, self.checkpoints, self.chunkSize)
+        for saved in chunks:
+            self.signals.progressUpdated.emit(saved, len(self.matches), saved / max(time.perf_counter() - start, 1e-9))
+            if self.__cancelled and saved < len(self.matches):
+                chunks.close()
+                self.signals.cancelled.emit(0 if self.checkpoints else saved) #with checkpoints closing rolled the save back
+                return
+        self.signals.finished.emit()
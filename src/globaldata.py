@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from concurrent.futures import ThreadPoolExecutor
 
-from PyQt5.QtGui import QPixmap
-
 from util import measureTime
 
+if TYPE_CHECKING: #pixmaps are only created by init(), the rest of Globals is used without a QApplication too
+    from PyQt5.QtGui import QPixmap
+
 
 class Globals:
     KILLER_ICONS: dict[str, QPixmap] = {}
@@ -32,6 +33,7 @@ class Globals:
 
     @staticmethod
     def init():  # NOTE: this can only be called after creating QApplication object, otherwise it crashes the program
+        from PyQt5.QtGui import QPixmap
         Globals.DEFAULT_ADDON_ICON = QPixmap('../images/default-addon-icon.png')
         Globals.DEFAULT_PERK_ICON = QPixmap('../images/default-perk-icon.png')
         Globals.DEFAULT_OFFERING_ICON = QPixmap('../images/default-offering-icon.png').scaled(*Globals.OFFERING_ICON_SIZE)
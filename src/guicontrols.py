@@ -8,11 +8,12 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import QIcon, QPaintEvent, QPalette
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QComboBox, QDialog, QScrollArea, \
     QGridLayout, QSizePolicy, QSpacerItem, QStylePainter, QStyleOptionComboBox, QStyle, \
-    QLineEdit, QMessageBox, QListWidgetItem, QListWidget
+    QLineEdit, QMessageBox, QListWidgetItem, QListWidget, QCheckBox, QDateEdit, QSpinBox, QToolButton, QMenu
 
 from globaldata import *
 from models import Killer, Survivor, KillerAddon, ItemAddon, Perk, Item, ItemType, FacedSurvivorState, Offering, \
     GameMap, Realm, FacedSurvivor, DBDMatch, KillerMatch, SurvivorMatch
+from statistics import StatisticsFilter
 from util import clampReverse, splitUpper, setQWidgetLayout, clearLayout, toResourceName, addWidgets, clamp, qtMakeBold
 
 AddonSelectionResult = Optional[Union[KillerAddon, ItemAddon]]
@@ -916,6 +917,15 @@ class PaginatedMatchListWidget(QWidget):
         self.layout().addLayout(lowerLayout)
         self.__refillListWidget(self.items[self.currentIndex:self.currentIndex+self.pageLimit])
 
+    def addItems(self, items: list[DBDMatch]):
+        #items that arrive after the widget was made, like loaded batches. only a page that still has room is refilled
+        shownCount = min(len(self.items) - self.currentIndex, self.pageLimit)
+        self.items += items
+        if shownCount < self.pageLimit:
+            end = min(self.currentIndex + self.pageLimit, len(self.items))
+            self.__refillListWidget(self.items[self.currentIndex:end])
+            self.itemsDisplayLabel.setText(f'{self.currentIndex} - {end}')
+
     def setPageLimit(self, limit: int):
         self.pageLimit = limit
         self.currentIndex = 0
@@ -956,4 +966,59 @@ class PaginatedMatchListWidget(QWidget):
             listItem = QListWidgetItem()
             listItem.setSizeHint(matchWidget.sizeHint())
             self.listWidget.addItem(listItem)
-            self.listWidget.setItemWidget(listItem, matchWidget)
\ No newline at end of file
+            self.listWidget.setItemWidget(listItem, matchWidget)
+
+
+class StatisticsFilterSelection(QWidget):
+
+    filterApplied = pyqtSignal(object) #StatisticsFilter
+
+    def __init__(self, killers: list[Killer], survivors: list[Survivor], parent=None):
+        super().__init__(parent=parent)
+        mainLayout = QHBoxLayout()
+        self.setLayout(mainLayout)
+        self.startDateCheckBox, self.startDatePicker = QCheckBox("From"), QDateEdit(calendarPopup=True)
+        self.endDateCheckBox, self.endDatePicker = QCheckBox("To"), QDateEdit(calendarPopup=True)
+        for checkBox, datePicker in ((self.startDateCheckBox, self.startDatePicker), (self.endDateCheckBox, self.endDatePicker)):
+            datePicker.setDate(QDate.currentDate())
+            datePicker.setDisplayFormat('dd-MM-yyyy')
+            datePicker.setEnabled(False)
+            checkBox.toggled.connect(datePicker.setEnabled)
+            addWidgets(mainLayout, checkBox, datePicker)
+        self.rankCheckBox = QCheckBox("Ranks")
+        self.highestRankSpinner, self.lowestRankSpinner = QSpinBox(), QSpinBox()
+        for spinner, rank in ((self.highestRankSpinner, Globals.HIGHEST_RANK), (self.lowestRankSpinner, Globals.LOWEST_RANK)):
+            spinner.setRange(Globals.HIGHEST_RANK, Globals.LOWEST_RANK)
+            spinner.setValue(rank)
+            spinner.setEnabled(False)
+            self.rankCheckBox.toggled.connect(spinner.setEnabled)
+        addWidgets(mainLayout, self.rankCheckBox, self.highestRankSpinner, QLabel("-"), self.lowestRankSpinner)
+        #nothing checked in a menu means no filtering by it
+        self.killerMenu = self.__addCheckableMenu(mainLayout, "Killers", [(k.killerAlias, k.killerID) for k in killers])
+        self.survivorMenu = self.__addCheckableMenu(mainLayout, "Survivors", [(s.survivorName, s.survivorID) for s in survivors])
+        self.partySizeMenu = self.__addCheckableMenu(mainLayout, "Party size", [(str(size), size) for size in range(1, 5)])
+        applyButton = QPushButton("Apply filter")
+        applyButton.clicked.connect(lambda: self.filterApplied.emit(self.getFilter()))
+        mainLayout.addWidget(applyButton)
+        mainLayout.addStretch()
+
+    def __addCheckableMenu(self, layout: QHBoxLayout, title: str, items: list[tuple[str, int]]) -> QMenu:
+        button = QToolButton()
+        button.setText(title)
+        button.setPopupMode(QToolButton.InstantPopup)
+        menu = QMenu(button)
+        for text, data in items:
+            action = menu.addAction(text)
+            action.setCheckable(True)
+            action.setData(data)
+        button.setMenu(menu)
+        layout.addWidget(button)
+        return menu
+
+    def getFilter(self) -> StatisticsFilter:
+        checked = lambda menu: frozenset(a.data() for a in menu.actions() if a.isChecked()) or None
+        rankBounds = sorted((self.highestRankSpinner.value(), self.lowestRankSpinner.value())) if self.rankCheckBox.isChecked() else (None, None)
+        return StatisticsFilter(startDate=self.startDatePicker.date().toPyDate() if self.startDateCheckBox.isChecked() else None,
+                                endDate=self.endDatePicker.date().toPyDate() if self.endDateCheckBox.isChecked() else None,
+                                minRank=rankBounds[0], maxRank=rankBounds[1], killerIDs=checked(self.killerMenu),
+                                survivorIDs=checked(self.survivorMenu), partySizes=checked(self.partySizeMenu))
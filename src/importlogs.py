@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+from classutil import DBDMatchParser, DBDMatchLogFileLoader, LogFileLoadWorker
+from database import Database, DEFAULT_SQLITE_PROFILE, SQLITE_PROFILES
+from models import LogFileCheckpoint
+from util import loadConfig
+
+#headless bulk import of match log files, e.g. for cron jobs. nothing here imports Qt widgets or needs a display:
+#python importlogs.py [--config ../config.cfg] [--db-url URL] [--sqlite-profile wal] [--processes N] [--full] [--strict] logs/*.txt
+
+
+def parseArguments(argv: list[str]) -> argparse.Namespace:
+    argParser = argparse.ArgumentParser(description='Import Dead by Daylight match log files into the database.')
+    argParser.add_argument('paths', nargs='+', help='log files or glob patterns (quote them to let this script expand **)')
+    argParser.add_argument('--config', default='../config.cfg', help='config file with the DB_URL, same as main.py uses')
+    argParser.add_argument('--db-url', help='database url, overrides the one from the config file')
+    argParser.add_argument('--sqlite-profile', choices=list(SQLITE_PROFILES), help='SQLite pragmas profile, overrides the SQLITE_PROFILE from the config file')
+    argParser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='worker processes used for parsing')
+    argParser.add_argument('--full', action='store_true', help='ignore stored checkpoints and load every file from the top')
+    argParser.add_argument('--strict', action='store_true', help='no fuzzy matching of misspelled names')
+    argParser.add_argument('--dry-run', action='store_true', help='parse and report, but save nothing')
+    return argParser.parse_args(argv)
+
+
+def expandPaths(patterns: list[str]) -> list[str]:
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        paths += (os.path.abspath(p) for p in matches if os.path.isfile(p))
+    return list(dict.fromkeys(paths))
+
+
+def main(argv: list[str]) -> int:
+    args = parseArguments(argv)
+    config = loadConfig(args.config) if args.db_url is None or os.path.isfile(args.config) else {}
+    dbUrl = args.db_url or config["DB_URL"]
+    paths = expandPaths(args.paths)
+    if len(paths) <= 0:
+        print('No log files found', file=sys.stderr)
+        return 1
+    Database.init(dbUrl, sqliteProfile=args.sqlite_profile or config.get("SQLITE_PROFILE", DEFAULT_SQLITE_PROFILE))
+    checkpoints = {}
+    if not args.full:
+        with Database.instance().getNewSession() as s:
+            checkpoints = {c.filePath: c for c in s.query(LogFileCheckpoint).filter(LogFileCheckpoint.filePath.in_(paths))}
+
+    loader = DBDMatchLogFileLoader(DBDMatchParser(Database.instance().referenceData, fuzzyMatching=not args.strict), useMemoryMap=True)
+    #records go straight to the bulk insert, no mapped objects are made for them
+    worker = LogFileLoadWorker(loader, paths, processes=args.processes, checkpoints=checkpoints, asRecords=True)
+    results, newCheckpoints = [], []
+    worker.signals.fileLoadStarted.connect(lambda path: print(f'Reading {path}'))
+    worker.signals.checkpointCreated.connect(newCheckpoints.append)
+    worker.signals.finished.connect(lambda records, errors: results.append((records, errors)))
+    worker.signals.failed.connect(lambda message: print(f'Loading failed: {message}', file=sys.stderr))
+    start = time.perf_counter()
+    worker.run() #no thread pool needed here, the signals are delivered directly
+    loadTime = time.perf_counter() - start
+    if not results:
+        return 1
+    records, errors = results[0]
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(f'Loaded {len(records):,} matches from {loader.linesRead:,} lines in {loadTime:.2f}s '
+          f'({loader.linesRead / loadTime:,.0f} lines/sec, {len(records) / loadTime:,.0f} matches/sec), {len(errors):,} errors')
+
+    if args.dry_run:
+        return 0
+    start = time.perf_counter()
+    Database.instance().saveMatchRecords(records, newCheckpoints)
+    saveTime = time.perf_counter() - start
+    print(f'Saved {len(records):,} matches in {saveTime:.2f}s ({len(records) / max(saveTime, 1e-9):,.0f} matches/sec)')
+    return 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import multiprocessing
 import sys
 
 from PyQt5.QtCore import QLocale, Qt
@@ -7,15 +8,10 @@ from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QApplication, QSplashScreen
 
 from MainWindow import MainWindow
-from database import Database
+from database import Database, SAVE_CHUNK_SIZE, DEFAULT_SQLITE_PROFILE
 from globaldata import Globals
-
-import json
-
-
-def loadConfig(path: str):
-    with open(path,mode='r') as f:
-        return json.load(f)
+from statistics import StatisticsCache, STATISTICS_CACHE_PATH
+from util import loadConfig
 
 
 def updateSplash(splash: QSplashScreen, message:str) -> None:
@@ -24,17 +20,19 @@ def updateSplash(splash: QSplashScreen, message:str) -> None:
 
 def main() -> None:
     config = loadConfig('../config.cfg' if len(sys.argv) <= 1 else sys.argv[1])
-    Database.init(config["DB_URL"])
+    Database.init(config["DB_URL"], config.get("SAVE_CHUNK_SIZE", SAVE_CHUNK_SIZE), config.get("SQLITE_PROFILE", DEFAULT_SQLITE_PROFILE))
     app = QApplication(sys.argv)
     app.setAttribute(Qt.AA_DisableWindowContextHelpButton)
     splash = QSplashScreen(QPixmap())
     splash.show()
     QLocale.setDefault(QLocale(QLocale.English))
     Globals.init()
-    window = MainWindow(title='Dead by Daylight match log', windowSize=(1280, 920))
+    window = MainWindow(title='Dead by Daylight match log', windowSize=(1280, 920),
+                        statisticsCache=StatisticsCache(config.get("STATISTICS_CACHE_PATH", STATISTICS_CACHE_PATH)))
     window.show()
     splash.finish(window)
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() #log loading spawns worker processes, frozen executables need this to start them
     main()
\ No newline at end of file
@@ -7,8 +7,8 @@ from datetime import date
 from io import StringIO
 from typing import Optional
 
-from sqlalchemy import Table, Column, Integer, Text, ForeignKey, Date, Enum
-from sqlalchemy.orm import registry, relationship
+from sqlalchemy import Table, Column, Integer, Text, ForeignKey, Date, Enum, Float
+from sqlalchemy.orm import registry, relationship, selectinload, joinedload, raiseload
 
 from util import splitUpper
 
@@ -38,6 +38,20 @@ class PerkType(enum.Enum):
     Killer = 0
     Survivor = 1
 
+class AggregateKind(enum.Enum):
+    #what the keys of a MatchAggregate row are. rows without a sub key have MISSING_SUB_KEY there
+    KillerGames = 0 #killer played, with the points and eliminations of those matches
+    FacedSurvivorStates = 1 #faced survivor, FacedSurvivorState value. games counts the faced survivor rows
+    FacedSurvivorGames = 2 #faced survivor. games counts the killer matches they were in
+    SurvivorResults = 3 #survivor played, SurvivorMatchResult value, with the points of those matches
+    FacedKillerResults = 4 #faced killer, SurvivorMatchResult value
+    SurvivorItems = 5 #item brought, matches without one are not counted
+    MapGames = 6 #map, SURVIVOR_SIDE or KILLER_SIDE. matches without a map are not counted
+    DateGames = 7 #date.toordinal() of the match date, SURVIVOR_SIDE or KILLER_SIDE, with the points of those matches
+
+MISSING_SUB_KEY = -1
+SURVIVOR_SIDE, KILLER_SIDE = 0, 1
+
 class FacedSurvivorState(enum.Enum):
     Sacrificed = 0
     Killed = 1
@@ -118,7 +132,7 @@ class GameMap:
 
     __mapper_args__ = {
         "properties": {
-            "realm": relationship("Realm", back_populates="maps", lazy="subquery")
+            "realm": relationship("Realm", back_populates="maps")
         }
     }
 
@@ -134,7 +148,7 @@ class Realm:
 
     __mapper_args__ = {
         "properties": {
-            "maps": relationship("GameMap", back_populates="realm", lazy='subquery')
+            "maps": relationship("GameMap", back_populates="realm")
         }
     }
 
@@ -177,7 +191,7 @@ class KillerAddon:
 
     __mapper_args__ = {
         "properties": {
-            "killer": relationship("Killer", uselist=False, lazy='subquery')
+            "killer": relationship("Killer", uselist=False)
         }
     }
 
@@ -228,7 +242,7 @@ class KillerMatchPerk:
         mapperRegistry.metadata,
         Column("killerMatchPerkID", Integer, primary_key=True),
         Column("killerPerkID", Integer, ForeignKey("perks.perkID"), nullable=False),
-        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False)
+        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False, index=True)
     )
     killerMatchPerkID: int = field(init=False,compare=False,hash=False)
     killerPerkID: int = field(init=False,compare=False,hash=False)
@@ -237,7 +251,7 @@ class KillerMatchPerk:
 
     __mapper_args__ = {
         "properties": {
-            "perk": relationship("Perk",uselist=False, lazy='subquery')
+            "perk": relationship("Perk",uselist=False)
         }
     }
 
@@ -252,7 +266,7 @@ class SurvivorMatchPerk:
         mapperRegistry.metadata,
         Column("survivorMatchPerkID", Integer, primary_key=True),
         Column("survivorPerkID", Integer, ForeignKey("perks.perkID"), nullable=False),
-        Column("survivorMatchID", Integer, ForeignKey("survivor_matches.matchID"), nullable=False)
+        Column("survivorMatchID", Integer, ForeignKey("survivor_matches.matchID"), nullable=False, index=True)
     )
     survivorMatchPerkID: int = field(init=False,compare=False,hash=False)
     survivorPerkID: int = field(init=False,compare=False,hash=False)
@@ -261,7 +275,7 @@ class SurvivorMatchPerk:
 
     __mapper_args__ = {
         "properties": {
-            "perk": relationship("Perk",uselist=False, lazy='subquery')
+            "perk": relationship("Perk",uselist=False)
         }
     }
 
@@ -276,7 +290,7 @@ class MatchKillerAddon:
         mapperRegistry.metadata,
         Column("matchKillerAddonID", Integer, primary_key=True),
         Column("killerAddonID", Integer, ForeignKey("killer_addons.addonID"), nullable=False),
-        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False)
+        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False, index=True)
     )
     matchKillerAddonID: int = field(init=False,compare=False,hash=False)
     killerAddon: KillerAddon
@@ -285,7 +299,7 @@ class MatchKillerAddon:
 
     __mapper_args__ = {
         "properties": {
-            "killerAddon": relationship("KillerAddon", uselist=False, backref="killer_addons", lazy='subquery')
+            "killerAddon": relationship("KillerAddon", uselist=False, backref="killer_addons")
         }
     }
 
@@ -300,7 +314,7 @@ class MatchItemAddon:
         mapperRegistry.metadata,
         Column("matchItemAddonID", Integer, primary_key=True),
         Column("itemAddonID", Integer, ForeignKey("item_addons.addonID"), nullable=False),
-        Column("survivorMatchID", Integer, ForeignKey("survivor_matches.matchID"),nullable=False)
+        Column("survivorMatchID", Integer, ForeignKey("survivor_matches.matchID"),nullable=False, index=True)
     )
     matchItemAddonID: int = field(init=False,compare=False,hash=False)
     itemAddon: ItemAddon
@@ -309,7 +323,7 @@ class MatchItemAddon:
 
     __mapper_args__ = {
         "properties": {
-            "itemAddon": relationship("ItemAddon",uselist=False,backref="item_addons", lazy='subquery')
+            "itemAddon": relationship("ItemAddon",uselist=False,backref="item_addons")
         }
     }
 
@@ -324,7 +338,7 @@ class FacedSurvivor:
         mapperRegistry.metadata,
         Column("facedSurvivorID", Integer, primary_key=True),
         Column("state", Enum(FacedSurvivorState), nullable=False),
-        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False),
+        Column("killerMatchID", Integer, ForeignKey("killer_matches.matchID"), nullable=False, index=True),
         Column("survivorID", Integer, ForeignKey("survivors.survivorID"), nullable=False)
     )
     facedSurvivorID: int = field(init=False,compare=False,hash=False)
@@ -335,7 +349,7 @@ class FacedSurvivor:
 
     __mapper_args__ = {
         "properties": {
-            "facedSurvivor": relationship("Survivor",uselist=False, lazy='subquery')
+            "facedSurvivor": relationship("Survivor",uselist=False)
         }
     }
 
@@ -372,13 +386,13 @@ class SurvivorMatch(DBDMatch):
         "survivor_matches",
         mapperRegistry.metadata,
         Column("matchID", Integer, primary_key=True),
-        Column("survivorID", Integer, ForeignKey("survivors.survivorID"), nullable=False),
+        Column("survivorID", Integer, ForeignKey("survivors.survivorID"), nullable=False, index=True),
         Column("points", Integer, default=0),
-        Column("matchDate", Date, nullable=False),
+        Column("matchDate", Date, nullable=False, index=True),
         Column("rank", Integer, nullable=True),
         Column("offeringID", Integer, ForeignKey("offerings.offeringID"), nullable=True),
-        Column("gameMapID", Integer, ForeignKey("maps.mapID"), nullable=True),
-        Column("facedKillerID", Integer, ForeignKey("killers.killerID"), nullable=False),
+        Column("gameMapID", Integer, ForeignKey("maps.mapID"), nullable=True, index=True),
+        Column("facedKillerID", Integer, ForeignKey("killers.killerID"), nullable=False, index=True),
         Column("itemID", Integer, ForeignKey("items.itemID"), nullable=True),
         Column("matchResult", Enum(SurvivorMatchResult), nullable=False),
         Column("partySize", Integer, nullable=True, default=1)
@@ -430,13 +444,13 @@ class SurvivorMatch(DBDMatch):
 
     __mapper_args__ = {
         "properties": {
-            "facedKiller": relationship("Killer",uselist=False, lazy='subquery'),
-            "item": relationship("Item",uselist=False, lazy='subquery'),
-            "perks": relationship("SurvivorMatchPerk", lazy='subquery'),
-            "offering": relationship("Offering",uselist=False, lazy='subquery'),
-            "gameMap": relationship("GameMap",uselist=False, lazy='subquery'),
-            "itemAddons": relationship("MatchItemAddon", lazy='subquery'),
-            "survivor": relationship("Survivor", uselist=False, lazy='subquery')
+            "facedKiller": relationship("Killer",uselist=False),
+            "item": relationship("Item",uselist=False),
+            "perks": relationship("SurvivorMatchPerk"),
+            "offering": relationship("Offering",uselist=False),
+            "gameMap": relationship("GameMap",uselist=False),
+            "itemAddons": relationship("MatchItemAddon"),
+            "survivor": relationship("Survivor", uselist=False)
         }
     }
 
@@ -449,12 +463,12 @@ class KillerMatch(DBDMatch):
         "killer_matches",
         mapperRegistry.metadata,
         Column("matchID", Integer, primary_key=True),
-        Column("killerID", Integer, ForeignKey("killers.killerID"), nullable=False),
+        Column("killerID", Integer, ForeignKey("killers.killerID"), nullable=False, index=True),
         Column("points", Integer, default=0),
-        Column("matchDate", Date, nullable=False),
+        Column("matchDate", Date, nullable=False, index=True),
         Column("rank", Integer, nullable=True),
         Column("offeringID", Integer, ForeignKey("offerings.offeringID"), nullable=True),
-        Column("gameMapID", Integer, ForeignKey("maps.mapID"), nullable=True),
+        Column("gameMapID", Integer, ForeignKey("maps.mapID"), nullable=True, index=True),
         Column("sacrifices", Integer, nullable=False, default=0),
         Column("kills", Integer, nullable=False, default=0),
         Column("disconnects", Integer, nullable=False, default=0)
@@ -505,11 +519,89 @@ class KillerMatch(DBDMatch):
 
     __mapper_args__ = {
         "properties": {
-            "facedSurvivors": relationship("FacedSurvivor", lazy='subquery'),
-            "offering": relationship("Offering",uselist=False, lazy='subquery'),
-            "gameMap": relationship("GameMap",uselist=False, lazy='subquery'),
-            "perks": relationship("KillerMatchPerk", lazy='subquery'),
-            "killerAddons": relationship("MatchKillerAddon", lazy='subquery'),
-            "killer": relationship("Killer", uselist=False, lazy='subquery')
+            "facedSurvivors": relationship("FacedSurvivor"),
+            "offering": relationship("Offering",uselist=False),
+            "gameMap": relationship("GameMap",uselist=False),
+            "perks": relationship("KillerMatchPerk"),
+            "killerAddons": relationship("MatchKillerAddon"),
+            "killer": relationship("Killer", uselist=False)
         }
     }
+
+
+@mapperRegistry.mapped
+@dataclass
+class LogFileCheckpoint:
+    __table__ = Table(
+        "log_file_checkpoints",
+        mapperRegistry.metadata,
+        Column("filePath", Text, primary_key=True),
+        Column("fileSize", Integer, nullable=False),
+        Column("modificationTime", Float, nullable=False),
+        Column("blockOffset", Integer, nullable=False),
+        Column("blockLine", Integer, nullable=False),
+        Column("blockHash", Text, nullable=False),
+        Column("lineCount", Integer, nullable=False)
+    )
+    filePath: str
+    fileSize: int
+    modificationTime: float
+    blockOffset: int #where the last date block of the loaded part of the file starts
+    blockLine: int
+    blockHash: str #sha1 of the last date block, from blockOffset up to fileSize
+    lineCount: int
+
+
+@mapperRegistry.mapped
+@dataclass
+class MatchAggregate:
+    #counters over all saved matches, kept up to date by Database.saveMatchRecords in the transaction that inserts the matches
+    __table__ = Table(
+        "match_aggregates",
+        mapperRegistry.metadata,
+        Column("kind", Enum(AggregateKind), primary_key=True),
+        Column("keyID", Integer, primary_key=True),
+        Column("subKeyID", Integer, primary_key=True),
+        Column("games", Integer, nullable=False, default=0),
+        Column("points", Integer, nullable=False, default=0),
+        Column("sacrifices", Integer, nullable=False, default=0),
+        Column("kills", Integer, nullable=False, default=0),
+        Column("disconnects", Integer, nullable=False, default=0),
+        Column("firstSeen", Integer, nullable=False)
+    )
+    kind: AggregateKind
+    keyID: int
+    subKeyID: int
+    games: int
+    points: int
+    sacrifices: int
+    kills: int
+    disconnects: int
+    firstSeen: int #lowest match id (faced survivor row id for FacedSurvivorStates) counted, histograms list keys in this order
+
+
+#<editor-fold desc="Loader options">
+#relationships only load lazily, so every query that needs related rows picks them with one of these option sets.
+#whatever a use case doesn't list raises instead of quietly issuing a query per row after the session is gone
+RESOURCE_LOAD_OPTIONS = {
+    Realm: (selectinload(Realm.maps).joinedload(GameMap.realm),),
+    KillerAddon: (joinedload(KillerAddon.killer),)
+}
+
+#matches load their own rows and their child rows only, Database.loadMatches points the references at the shared
+#resources afterwards. for the few filtered matches of the match list (and a log export) the collections use
+#selectinload, one IN query over the loaded keys
+MATCH_LIST_LOAD_OPTIONS = {
+    KillerMatch: (
+        selectinload(KillerMatch.perks).raiseload('*'),
+        selectinload(KillerMatch.killerAddons).raiseload('*'),
+        selectinload(KillerMatch.facedSurvivors).raiseload('*'),
+        raiseload('*')
+    ),
+    SurvivorMatch: (
+        selectinload(SurvivorMatch.perks).raiseload('*'),
+        selectinload(SurvivorMatch.itemAddons).raiseload('*'),
+        raiseload('*')
+    )
+}
+#</editor-fold>
@@ -12,7 +12,8 @@ build_exe_opts = {
     "excludes": excluded
 }
 execs = [
-    Executable(script=f'{buildScriptDir}/main.py',base=base,target_name="DeadByDaylightMatchLog")
+    Executable(script=f'{buildScriptDir}/main.py',base=base,target_name="DeadByDaylightMatchLog"),
+    Executable(script=f'{buildScriptDir}/importlogs.py',base=None,target_name="DeadByDaylightMatchLogImport") #console app
 ]
 
 setup(name="DeadByDaylightMatchLog",version="1.0",executables=execs, options={"build_exe": build_exe_opts})
\ No newline at end of file
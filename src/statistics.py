@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import enum
+import os
 import pickle
+import threading
 from abc import ABC
 from collections import defaultdict
-from dataclasses import dataclass
-from functools import reduce
-from typing import Callable, Iterable, Optional
+from dataclasses import dataclass, fields
+from datetime import date
+from itertools import chain
+from typing import Callable, Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from classutil import DBDResources
+from classutil import DBDResources, matchToRecord
 from models import SurvivorMatch, KillerMatch, Survivor, Killer, Realm, GameMap, ItemType, \
-    SurvivorMatchResult, FacedSurvivorState
+    SurvivorMatchResult, FacedSurvivorState, AggregateKind, MISSING_SUB_KEY, SURVIVOR_SIDE, KILLER_SIDE
 from util import singleOrPlural
 
 
@@ -88,6 +93,8 @@ class MapInfo(object):
     totalGames: int
 
     def __str__(self):
+        if self.map is None:
+            return 'No maps recorded'
         return f'{self.map.mapName} ({self.mapGames:,} {singleOrPlural(self.mapGames, "game")} out of {self.totalGames:,})'
 
     def __repr__(self):
@@ -100,6 +107,8 @@ class MapRealmInfo(object):
     totalGames: int
 
     def __str__(self):
+        if self.realm is None:
+            return 'No maps recorded'
         return f'{self.realm.realmName} ({self.realmGames:,} {singleOrPlural(self.realmGames, "game")} out of {self.totalGames:,})'
 
     def __repr__(self):
@@ -107,11 +116,13 @@ class MapRealmInfo(object):
 
 @dataclass(frozen=True)
 class ItemTypeInfo(object):
-    itemType: ItemType
+    itemType: Optional[ItemType] #None when no item was brought to any of the matches
     gamesWithItemType: int
     totalGames: int
 
     def __str__(self):
+        if self.itemType is None:
+            return f'No items brought in {self.totalGames:,} {singleOrPlural(self.totalGames, "game")}'
         return f'{self.itemType.name}, chosen {self.gamesWithItemType:,} {singleOrPlural(self.gamesWithItemType, "time")} out of {self.totalGames:,} {singleOrPlural(self.totalGames, "game")}'
 
     def __repr__(self):
@@ -139,8 +150,8 @@ class KillerMatchStatistics(MatchStatistics):
     favouriteKillerInfo: FavouriteKillerInfo #killer, games with him, total games
     totalKillerEliminations: dict[Killer, EliminationInfo]
     averageKillerKillsPerMatch: dict[Killer, float]
-    mostCommonSurvivorData: CommonSurvivorInfo
-    leastCommonSurvivorData: CommonSurvivorInfo
+    mostCommonSurvivorData: Optional[CommonSurvivorInfo] #None when no survivors were faced in any of the matches
+    leastCommonSurvivorData: Optional[CommonSurvivorInfo]
 
 @dataclass(frozen=True)
 class SurvivorMatchStatistics(MatchStatistics):
@@ -155,171 +166,455 @@ class SurvivorMatchStatistics(MatchStatistics):
     leastLethalKillerData: LethalKillerInfo
 
 
-class StatisticsCalculator(object):
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MISSING_ID = -1 #stands in for NULL in the integer columns of MatchFrames: no offering, map or item, unknown rank or party size
+
+#column name -> dtype. ids and counters get the smallest integer type that holds them, enum columns become categoricals of the enum values
+KILLER_MATCH_COLUMNS = {
+    'matchID': 'int32', 'killerID': 'int16', 'matchDate': 'datetime64[ns]', 'points': 'int32', 'rank': 'int8',
+    'offeringID': 'int16', 'gameMapID': 'int16', 'sacrifices': 'int8', 'kills': 'int8', 'disconnects': 'int8'
+}
+SURVIVOR_MATCH_COLUMNS = {
+    'matchID': 'int32', 'survivorID': 'int16', 'matchDate': 'datetime64[ns]', 'points': 'int32', 'rank': 'int8',
+    'offeringID': 'int16', 'gameMapID': 'int16', 'facedKillerID': 'int16', 'itemID': 'int16',
+    'matchResult': SurvivorMatchResult, 'partySize': 'int8'
+}
+FACED_SURVIVOR_COLUMNS = {'matchID': 'int32', 'survivorID': 'int16', 'state': FacedSurvivorState}
+MATCH_PERK_COLUMNS = {'matchID': 'int32', 'perkID': 'int16'}
+MATCH_ADDON_COLUMNS = {'matchID': 'int32', 'addonID': 'int16'}
+AGGREGATE_COLUMNS = {
+    'kind': AggregateKind, 'keyID': 'int32', 'subKeyID': 'int16', 'games': 'int32', 'points': 'int64',
+    'sacrifices': 'int32', 'kills': 'int32', 'disconnects': 'int32', 'firstSeen': 'int64'
+}
+
+
+def typedFrame(rows: Iterable[tuple], columns: dict[str, Union[str, type]]) -> pd.DataFrame:
+    #nulls become MISSING_ID, enums may come as members, names or values and end up as values
+    frame = pd.DataFrame.from_records(list(rows), columns=list(columns))
+    for name, dtype in columns.items():
+        if isinstance(dtype, type) and issubclass(dtype, enum.Enum):
+            values = {member.value: member.value for member in dtype} | {member.name: member.value for member in dtype} | {member: member.value for member in dtype}
+            frame[name] = pd.Categorical(frame[name].map(values), categories=[member.value for member in dtype])
+        elif dtype.startswith('datetime'):
+            frame[name] = pd.to_datetime(frame[name])
+        else:
+            frame[name] = frame[name].fillna(MISSING_ID).astype(dtype)
+    return frame
 
-    def __init__(self, killerGames: Iterable[KillerMatch], survivorGames: Iterable[SurvivorMatch], resources: DBDResources):
-        self.resources = resources
-        dictMapper = lambda g: g.asDict()
-        generalColumns = ["points", "map", "offering", "date", "rank"]
-        killerColumns = ["killer", "perks", "survivors", "addons", "sacrifices", "kills", "disconnects"]
-        survivorColumns = ["survivor", "faced killer", "item", "match result", "party size", "perks", "addons"]
-        self.survivorGamesDf = pd.DataFrame(data=map(dictMapper, survivorGames), columns=generalColumns + survivorColumns)
-        self.killerGamesDf = pd.DataFrame(data=map(dictMapper, killerGames), columns=generalColumns + killerColumns)
 
-    def calculateKillerGeneral(self) -> Optional[KillerMatchStatistics]:
-        if self.killerGamesDf.empty:
-            return None
-        totalMoris = self.killerGamesDf['kills'].sum()
-        totalSacrifices = self.killerGamesDf['sacrifices'].sum()
-        totalDcs = self.killerGamesDf['disconnects'].sum()
-        totalGamesWithKiller = self.killerGamesDf.groupby('killer', sort=False).size().to_dict()
-
-        favouriteKiller = max(totalGamesWithKiller, key=totalGamesWithKiller.get)
-        favouriteKillerInfo = FavouriteKillerInfo(killer=favouriteKiller, gamesWithKiller=totalGamesWithKiller[favouriteKiller],
-                                                  totalGames=self.killerGamesDf.shape[0])
+@dataclass(frozen=True)
+class MatchFrames(object):
+    #the whole match history as flat frames of resource ids, child rows point at their match with matchID
+    killerMatches: pd.DataFrame
+    facedSurvivors: pd.DataFrame
+    killerPerks: pd.DataFrame
+    killerAddons: pd.DataFrame
+    survivorMatches: pd.DataFrame
+    survivorPerks: pd.DataFrame
+    itemAddons: pd.DataFrame
+
+    @staticmethod
+    def fromRecords(records: Iterable[tuple]) -> MatchFrames:
+        #for matches that were never saved, records are the tuples from classutil.matchToRecord. positions stand in for match ids
+        killerRecords, survivorRecords = [], []
+        for record in records:
+            (killerRecords if record[0] is KillerMatch else survivorRecords).append(record)
+        return MatchFrames(
+            killerMatches=typedFrame(((i, *r[1:7], *r[9:12]) for i, r in enumerate(killerRecords)), KILLER_MATCH_COLUMNS),
+            facedSurvivors=typedFrame(((i, *fs) for i, r in enumerate(killerRecords) for fs in r[12]), FACED_SURVIVOR_COLUMNS),
+            killerPerks=typedFrame(((i, p) for i, r in enumerate(killerRecords) for p in r[7]), MATCH_PERK_COLUMNS),
+            killerAddons=typedFrame(((i, a) for i, r in enumerate(killerRecords) for a in r[8]), MATCH_ADDON_COLUMNS),
+            survivorMatches=typedFrame(((i, *r[1:7], *r[9:13]) for i, r in enumerate(survivorRecords)), SURVIVOR_MATCH_COLUMNS),
+            survivorPerks=typedFrame(((i, p) for i, r in enumerate(survivorRecords) for p in r[7]), MATCH_PERK_COLUMNS),
+            itemAddons=typedFrame(((i, a) for i, r in enumerate(survivorRecords) for a in r[8]), MATCH_ADDON_COLUMNS)
+        )
 
-        averagePoints = self.killerGamesDf['points'].sum() // self.killerGamesDf.shape[0]
 
-        flatSurvivorList = reduce(lambda x, y: x + y, self.killerGamesDf['survivors'].tolist(), [])
 
-        totalSurvivorStatesDict = defaultdict(int)
-        facedSurvivorStatesHistogram = defaultdict(lambda: defaultdict(int))
+@dataclass(frozen=True)
+class StatisticsFilter(object):
+    #the matches statistics are calculated from, Database turns it into the where clauses of the selects that load them.
+    #None doesn't filter, ranges are inclusive and matches without a rank are left out once a rank bound is set
+    startDate: Optional[date] = None
+    endDate: Optional[date] = None
+    minRank: Optional[int] = None
+    maxRank: Optional[int] = None
+    killerIDs: Optional[frozenset[int]] = None #the killer played in killer matches and the one faced in survivor matches
+    survivorIDs: Optional[frozenset[int]] = None #the survivor played in survivor matches, survivors faced as the killer aren't filtered
+    partySizes: Optional[frozenset[int]] = None #survivor matches only, killer matches have no party size
+
+    @property
+    def isEmpty(self) -> bool:
+        return all(getattr(self, f.name) is None for f in fields(self))
 
-        for fs in flatSurvivorList:
-            totalSurvivorStatesDict[fs.state] += 1
-            facedSurvivorStatesHistogram[fs.facedSurvivor][fs.state] += 1
+    def __str__(self):
+        parts = []
+        if self.startDate is not None or self.endDate is not None:
+            parts.append(f"{self.startDate or '...'} - {self.endDate or '...'}")
+        if self.minRank is not None or self.maxRank is not None:
+            parts.append(f"ranks {self.minRank or '...'} - {self.maxRank or '...'}")
+        for name, ids in (('killer', self.killerIDs), ('survivor', self.survivorIDs)):
+            if ids is not None:
+                parts.append(f"{len(ids)} {singleOrPlural(len(ids), name)}")
+        if self.partySizes is not None:
+            parts.append(f"party size {', '.join(map(str, sorted(self.partySizes)))}")
+        return ', '.join(parts) if parts else 'All matches'
+
+
+def matchAggregates(frames: MatchFrames) -> pd.DataFrame:
+    #the counters Database keeps in match_aggregates, computed from the frames. firstSeen is the match id, or the row
+    #position for FacedSurvivorStates, so it is ordered like the stored one but not equal to it
+    def counters(kind: AggregateKind, keyIDs: pd.Series, subKeyIDs: Union[pd.Series, int], firstSeen: Iterable[int], **sums: pd.Series) -> pd.DataFrame:
+        rows = pd.DataFrame({
+            'keyID': keyIDs.to_numpy('int64'), 'games': 1, 'firstSeen': np.asarray(firstSeen, dtype='int64'),
+            'subKeyID': subKeyIDs.to_numpy('int64') if isinstance(subKeyIDs, pd.Series) else subKeyIDs
+        } | {name: values.to_numpy('int64') for name, values in sums.items()})
+        aggregated = rows.groupby(['keyID', 'subKeyID'], sort=False).agg(
+            **{name: (name, 'sum') for name in ('games', *sums)}, firstSeen=('firstSeen', 'min')).reset_index()
+        aggregated.insert(0, 'kind', kind.value)
+        return aggregated
+
+    killerMatches, survivorMatches, facedSurvivors = frames.killerMatches, frames.survivorMatches, frames.facedSurvivors
+    facedSurvivorGames = facedSurvivors.drop_duplicates(['matchID', 'survivorID'])
+    itemMatches = survivorMatches[survivorMatches['itemID'] != MISSING_ID]
+    aggregates = [
+        counters(AggregateKind.KillerGames, killerMatches['killerID'], MISSING_SUB_KEY, killerMatches['matchID'], points=killerMatches['points'],
+                 sacrifices=killerMatches['sacrifices'], kills=killerMatches['kills'], disconnects=killerMatches['disconnects']),
+        counters(AggregateKind.FacedSurvivorStates, facedSurvivors['survivorID'], facedSurvivors['state'], range(facedSurvivors.shape[0])),
+        counters(AggregateKind.FacedSurvivorGames, facedSurvivorGames['survivorID'], MISSING_SUB_KEY, facedSurvivorGames['matchID']),
+        counters(AggregateKind.SurvivorResults, survivorMatches['survivorID'], survivorMatches['matchResult'], survivorMatches['matchID'],
+                 points=survivorMatches['points']),
+        counters(AggregateKind.FacedKillerResults, survivorMatches['facedKillerID'], survivorMatches['matchResult'], survivorMatches['matchID']),
+        counters(AggregateKind.SurvivorItems, itemMatches['itemID'], MISSING_SUB_KEY, itemMatches['matchID'])
+    ]
+    for side, matches in ((SURVIVOR_SIDE, survivorMatches), (KILLER_SIDE, killerMatches)):
+        mapMatches = matches[matches['gameMapID'] != MISSING_ID]
+        dateOrdinals = matches['matchDate'].to_numpy('datetime64[D]').astype('int64') + UNIX_EPOCH_ORDINAL
+        aggregates.append(counters(AggregateKind.MapGames, mapMatches['gameMapID'], side, mapMatches['matchID']))
+        aggregates.append(counters(AggregateKind.DateGames, pd.Series(dateOrdinals), side, matches['matchID'], points=matches['points']))
+    aggregated = pd.concat(aggregates, ignore_index=True).reindex(columns=list(AGGREGATE_COLUMNS)).fillna(0)
+    return typedFrame(aggregated.itertuples(index=False), AGGREGATE_COLUMNS)
+
+
+class StatisticsGroup(enum.Enum):
+    General = 0
+    Killer = 1
+    Survivor = 2
 
-        totalEliminationsInfo = EliminationInfo(sacrifices=totalSacrifices, kills=totalMoris, disconnects=totalDcs)
 
-        uniquePlayedKillers = self.killerGamesDf["killer"].unique()
+@dataclass(frozen=True)
+class ResourceLookup(object):
+    #the side table the ids and codes in MatchFrames are turned back into resources with
+    killers: dict[int, Killer]
+    survivors: dict[int, Survivor]
+    gameMaps: dict[int, GameMap]
+    realms: dict[int, Realm]
+    mapRealmIDs: pd.Series #map id -> realm id
+    itemTypes: pd.Series #item id -> ItemType value
+
+    @staticmethod
+    def fromResources(resources: DBDResources) -> ResourceLookup:
+        byID = resources.byID
+        return ResourceLookup(killers=byID[Killer], survivors=byID[Survivor], gameMaps=byID[GameMap],
+                              realms={r.realmID: r for r in resources.realms},
+                              mapRealmIDs=pd.Series({m.mapID: r.realmID for r in resources.realms for m in r.maps}, dtype='int16'),
+                              itemTypes=pd.Series({i.itemID: i.itemType.value for i in resources.items}, dtype='int8'))
 
-        totalKillerEliminations = {k: EliminationInfo(0,0,0) for k in uniquePlayedKillers}
-        for killer in totalKillerEliminations.keys():
-            df = self.killerGamesDf[self.killerGamesDf["killer"] == killer]
-            totalKillerEliminations[killer] += EliminationInfo(df["sacrifices"].sum(), df["kills"].sum(), df["disconnects"].sum())
 
-        killerAverageKillsPerMatch = {k: 0 for k in uniquePlayedKillers}
-        for killer in killerAverageKillsPerMatch.keys():
-            df = self.killerGamesDf[self.killerGamesDf["killer"] == killer]
-            totalEliminations = df["kills"].sum() + df["sacrifices"].sum() + df["disconnects"].sum()
-            killerAverageKillsPerMatch[killer] = totalEliminations / totalGamesWithKiller[killer]
+class StatisticsCalculator(object):
 
-        facedSurvivorsDf = pd.DataFrame(data=map(lambda _fs: _fs.facedSurvivor, flatSurvivorList))
-        facedSurvivorHistogram = facedSurvivorsDf["survivorName"].value_counts()
-        mostCommonSurvivor = next(s for s in self.resources.survivors if s.survivorName == facedSurvivorHistogram.idxmax())
-        leastCommonSurvivor = next(s for s in self.resources.survivors if s.survivorName == facedSurvivorHistogram.idxmin())
-        facedSurvivorsDict = facedSurvivorHistogram.to_dict()
+    def __init__(self, killerGames: Iterable[KillerMatch], survivorGames: Iterable[SurvivorMatch], resources: DBDResources):
+        self.__init(MatchFrames.fromRecords(map(matchToRecord, chain(killerGames, survivorGames))), resources)
+
+    @staticmethod
+    def fromFrames(frames: MatchFrames, resources: DBDResources) -> StatisticsCalculator:
+        #frames from Database.loadMatchFrames, no mapped objects needed
+        calculator = StatisticsCalculator.__new__(StatisticsCalculator)
+        calculator.__init(frames, resources)
+        return calculator
+
+    @staticmethod
+    def fromAggregates(aggregates: pd.DataFrame, resources: DBDResources) -> StatisticsCalculator:
+        #counters from Database.loadMatchAggregates, nothing is read or computed per match
+        calculator = StatisticsCalculator.__new__(StatisticsCalculator)
+        calculator.__init(None, resources, aggregates)
+        return calculator
+
+    def __init(self, frames: Optional[MatchFrames], resources: DBDResources, aggregates: Optional[pd.DataFrame] = None):
+        self.resources = resources
+        self.frames = frames
+        self.lookup = ResourceLookup.fromResources(resources)
+        self.__aggregates = aggregates #computed from the frames when first needed
+        self.__kinds = None
+        self.__lock = threading.RLock() #the groups can be calculated in threads, the lazy parts are only computed once
+
+    @property
+    def aggregates(self) -> pd.DataFrame:
+        with self.__lock:
+            if self.__aggregates is None:
+                self.__aggregates = matchAggregates(self.frames)
+            return self.__aggregates
+
+    def calculate(self, group: StatisticsGroup) -> Optional[MatchStatistics]:
+        calculations = {StatisticsGroup.General: self.calculateGeneral, StatisticsGroup.Killer: self.calculateKillerGeneral,
+                        StatisticsGroup.Survivor: self.calculateSurvivorGeneral}
+        return calculations[group]()
+
+    def __rows(self, kind: AggregateKind) -> pd.DataFrame:
+        with self.__lock:
+            if self.__kinds is None:
+                #the rows of each kind in the order their keys were first seen, histograms list them in that order
+                ordered = self.aggregates.sort_values('firstSeen', kind='stable')
+                self.__kinds = {k: ordered[ordered['kind'] == k.value] for k in AggregateKind}
+        return self.__kinds[kind]
 
-        def survivorGamesCount(surv: Survivor):
-            mask = self.killerGamesDf["survivors"].apply(lambda x: any(y.facedSurvivor == surv for y in x))
-            return self.killerGamesDf[mask].shape[0]
+    def calculateKillerGeneral(self) -> Optional[KillerMatchStatistics]:
+        killerGames = self.__rows(AggregateKind.KillerGames)
+        if killerGames.empty:
+            return None
+        killers, survivors = self.lookup.killers, self.lookup.survivors
+        totalGames = int(killerGames['games'].sum())
+        killerIDs = killerGames['keyID'].tolist()
+        totalGamesWithKiller = dict(zip(map(killers.get, killerIDs), killerGames['games'].tolist()))
 
-        mostCommonSurvivorGames = survivorGamesCount(mostCommonSurvivor)
-        leastCommonSurvivorGames = survivorGamesCount(leastCommonSurvivor)
-        mostCommonSurvivorInfo = CommonSurvivorInfo(survivor=mostCommonSurvivor, encounters=facedSurvivorsDict[mostCommonSurvivor.survivorName], totalGames=mostCommonSurvivorGames)
-        leastCommonSurvivorInfo = CommonSurvivorInfo(survivor=leastCommonSurvivor, encounters=facedSurvivorsDict[leastCommonSurvivor.survivorName], totalGames=leastCommonSurvivorGames)
+        favouriteKiller = killers[killerIDs[killerGames['games'].argmax()]]
+        favouriteKillerInfo = FavouriteKillerInfo(killer=favouriteKiller, gamesWithKiller=totalGamesWithKiller[favouriteKiller],
+                                                  totalGames=totalGames)
+
+        averagePoints = killerGames['points'].sum() // totalGames
+
+        totalEliminationsInfo = EliminationInfo(sacrifices=killerGames['sacrifices'].sum(), kills=killerGames['kills'].sum(),
+                                                disconnects=killerGames['disconnects'].sum())
+        killerRows = zip(map(killers.get, killerIDs), killerGames['sacrifices'].tolist(), killerGames['kills'].tolist(),
+                         killerGames['disconnects'].tolist(), killerGames['games'].tolist())
+        totalKillerEliminations, killerAverageKillsPerMatch = {}, {}
+        for killer, sacrifices, kills, disconnects, games in killerRows:
+            totalKillerEliminations[killer] = EliminationInfo(sacrifices, kills, disconnects)
+            killerAverageKillsPerMatch[killer] = (sacrifices + kills + disconnects) / games
+
+        survivorStates = self.__rows(AggregateKind.FacedSurvivorStates)
+        states = survivorStates.groupby('subKeyID', sort=False)['games'].sum()
+        totalSurvivorStatesDict = defaultdict(int, zip(map(FacedSurvivorState, states.index), states.tolist()))
+        facedSurvivorStatesHistogram = {}
+        for survivorID, state, count in zip(survivorStates['keyID'].tolist(), survivorStates['subKeyID'].tolist(), survivorStates['games'].tolist()):
+            facedSurvivorStatesHistogram.setdefault(survivors[survivorID], defaultdict(int))[FacedSurvivorState(state)] = count
+
+        encounters = survivorStates.groupby('keyID', sort=False)['games'].sum()
+        survivorGames = self.__rows(AggregateKind.FacedSurvivorGames).set_index('keyID')['games']
+        commonSurvivorInfo = lambda survivorID: CommonSurvivorInfo(survivor=survivors[survivorID], encounters=encounters[survivorID],
+                                                                   totalGames=survivorGames[survivorID])
+        if encounters.empty: #filtered statistics can easily select only matches without faced survivors
+            mostCommonSurvivorInfo, leastCommonSurvivorInfo = None, None
+        else:
+            mostCommonSurvivorInfo, leastCommonSurvivorInfo = commonSurvivorInfo(encounters.idxmax()), commonSurvivorInfo(encounters.idxmin())
 
         return KillerMatchStatistics(totalEliminationsInfo=totalEliminationsInfo, gamesPlayedWithKiller=totalGamesWithKiller,
                                             totalSurvivorStatesHistogram=totalSurvivorStatesDict, facedSurvivorStatesHistogram=facedSurvivorStatesHistogram,
                                             averagePointsPerMatch=averagePoints, totalKillerEliminations=totalKillerEliminations,
                                             favouriteKillerInfo=favouriteKillerInfo, averageKillerKillsPerMatch=killerAverageKillsPerMatch,
                                             mostCommonSurvivorData=mostCommonSurvivorInfo, leastCommonSurvivorData=leastCommonSurvivorInfo,
-                                            totalGames=self.killerGamesDf.shape[0])
+                                            totalGames=totalGames)
 
     def calculateSurvivorGeneral(self) -> Optional[SurvivorMatchStatistics]:
-        if self.survivorGamesDf.empty:
+        results = self.__rows(AggregateKind.SurvivorResults)
+        if results.empty:
             return None
-        survivorGamesHistogram = self.survivorGamesDf.groupby('survivor', sort=False).size().to_dict()
-        facedKillerHistogram = self.survivorGamesDf.groupby('faced killer', sort=False).size()
-        facedKillerHistogramDict = facedKillerHistogram.to_dict()
-        averagePoints = self.survivorGamesDf['points'].sum() // self.survivorGamesDf.shape[0]
-        mostCommonKiller = facedKillerHistogram.idxmax()
-        leastCommonKiller = facedKillerHistogram.idxmin()
-        itemsHistogram = self.survivorGamesDf.groupby('item', sort=False).size()
-        itemTypesHistogram = defaultdict(int)
-        for index, count in itemsHistogram.iteritems():
-            itemTypesHistogram[index.itemType] += count
-        mostCommonItemType = max(itemTypesHistogram, key=itemTypesHistogram.get)
-        mostCommonItemTypeInfo = ItemTypeInfo(itemType=mostCommonItemType, totalGames=self.survivorGamesDf.shape[0], gamesWithItemType=itemTypesHistogram[mostCommonItemType])
-        facedKillerMatchResults = self.survivorGamesDf.groupby(["faced killer", "match result"], sort=False).size()
-        lossResults = (SurvivorMatchResult.Sacrificed, SurvivorMatchResult.Killed, SurvivorMatchResult.Camped,
-                       SurvivorMatchResult.Dead, SurvivorMatchResult.Tunnelled)
-        killerEliminations = defaultdict(int)
-        for index, count in facedKillerMatchResults.iteritems():
-            killer, result = index
-            killerEliminations[killer] += int(result in lossResults)
-        lethalityMapper = lambda k: killerEliminations[k] / facedKillerHistogramDict[k] #that name, lmao
-        mostLethalKiller = max(killerEliminations, key=lethalityMapper)
-        leastLethalKiller = min(killerEliminations, key=lethalityMapper)
-        matchResultsHistogram = self.survivorGamesDf.groupby('match result', sort=False).size().to_dict()
-        mostLethalKillerInfo = LethalKillerInfo(killer=mostLethalKiller, deathsCount=killerEliminations[mostLethalKiller],
-                                                    totalGames=facedKillerHistogramDict[mostLethalKiller],
-                                                    killRatio=killerEliminations[mostLethalKiller] / facedKillerHistogramDict[mostLethalKiller])
-        mostCommonKillerInfo = CommonKillerInfo(killer=mostCommonKiller,
-                                                    encounters=facedKillerHistogramDict[mostCommonKiller],
-                                                    totalGames=self.survivorGamesDf.shape[0])
-        leastLethalKillerInfo = LethalKillerInfo(killer=leastLethalKiller, deathsCount=killerEliminations[leastLethalKiller],
-                                                 totalGames=facedKillerHistogramDict[leastLethalKiller],
-                                                 killRatio=killerEliminations[leastLethalKiller] / facedKillerHistogramDict[leastLethalKiller])
-        leastCommonKillerInfo = CommonKillerInfo(killer=leastCommonKiller,
-                                                 encounters=facedKillerHistogramDict[leastCommonKiller],
-                                                 totalGames=self.survivorGamesDf.shape[0])
-
-        survivorMatchResults = defaultdict(lambda: defaultdict(int))
-        for survivor, result in zip(self.survivorGamesDf["survivor"], self.survivorGamesDf["match result"]):
-            survivorMatchResults[survivor][result] += 1
+        killers, survivors = self.lookup.killers, self.lookup.survivors
+        totalGames = int(results['games'].sum())
+        survivorGames = results.groupby('keyID', sort=False)['games'].sum()
+        survivorGamesHistogram = dict(zip(map(survivors.get, survivorGames.index), survivorGames.tolist()))
+        facedKillerResults = self.__rows(AggregateKind.FacedKillerResults)
+        facedKillers = facedKillerResults.groupby('keyID', sort=False)['games'].sum()
+        facedKillerHistogramDict = dict(zip(map(killers.get, facedKillers.index), facedKillers.tolist()))
+        averagePoints = results['points'].sum() // totalGames
+        mostCommonKiller, leastCommonKiller = killers[facedKillers.idxmax()], killers[facedKillers.idxmin()]
+
+        items = self.__rows(AggregateKind.SurvivorItems)
+        itemTypesHistogram = items['games'].groupby(items['keyID'].map(self.lookup.itemTypes), sort=False).sum()
+        if itemTypesHistogram.empty: #filtered statistics can easily select only matches without items
+            mostCommonItemTypeInfo = ItemTypeInfo(itemType=None, totalGames=totalGames, gamesWithItemType=0)
+        else:
+            mostCommonItemTypeInfo = ItemTypeInfo(itemType=ItemType(itemTypesHistogram.idxmax()), totalGames=totalGames,
+                                                  gamesWithItemType=itemTypesHistogram.max())
+
+        #the number of different loss results each killer was faced with, which is what the statistic has always counted
+        lossResults = [r.value for r in (SurvivorMatchResult.Sacrificed, SurvivorMatchResult.Killed, SurvivorMatchResult.Camped,
+                                         SurvivorMatchResult.Dead, SurvivorMatchResult.Tunnelled)]
+        killerEliminations = facedKillerResults['subKeyID'].isin(lossResults).groupby(facedKillerResults['keyID'], sort=False).sum()
+        lethality = killerEliminations / facedKillers[killerEliminations.index]
+        lethalKillerInfo = lambda killerID: LethalKillerInfo(killer=killers[killerID], deathsCount=killerEliminations[killerID],
+                                                             totalGames=facedKillers[killerID], killRatio=lethality[killerID])
+        mostLethalKillerInfo, leastLethalKillerInfo = lethalKillerInfo(lethality.idxmax()), lethalKillerInfo(lethality.idxmin())
+        mostCommonKillerInfo = CommonKillerInfo(killer=mostCommonKiller, encounters=facedKillerHistogramDict[mostCommonKiller], totalGames=totalGames)
+        leastCommonKillerInfo = CommonKillerInfo(killer=leastCommonKiller, encounters=facedKillerHistogramDict[leastCommonKiller], totalGames=totalGames)
+
+        resultTotals = results.groupby('subKeyID', sort=False)['games'].sum()
+        matchResultsHistogram = dict(zip(map(SurvivorMatchResult, resultTotals.index), resultTotals.tolist()))
+        survivorMatchResults = {}
+        for survivorID, result, count in zip(results['keyID'].tolist(), results['subKeyID'].tolist(), results['games'].tolist()):
+            survivorMatchResults.setdefault(survivors[survivorID], defaultdict(int))[SurvivorMatchResult(result)] = count
 
         return SurvivorMatchStatistics(gamesPlayedWithSurvivor=survivorGamesHistogram, averagePointsPerMatch=averagePoints,
                                               matchResultsHistogram=matchResultsHistogram, mostCommonItemTypeData=mostCommonItemTypeInfo,
                                               mostCommonKillerData=mostCommonKillerInfo, mostLethalKillerData=mostLethalKillerInfo,
                                               leastCommonKillerData=leastCommonKillerInfo, leastLethalKillerData=leastLethalKillerInfo,
-                                              totalGames=self.survivorGamesDf.shape[0], facedKillerHistogram=facedKillerHistogramDict,
+                                              totalGames=totalGames, facedKillerHistogram=facedKillerHistogramDict,
                                               survivorsMatchResultsHistogram=survivorMatchResults)
 
 
     def calculateGeneral(self) -> GeneralMatchStatistics:
-        totalGames = self.survivorGamesDf.shape[0] + self.killerGamesDf.shape[0]
-
-        survivorPoints = self.survivorGamesDf['points'].sum() if not self.survivorGamesDf.empty else 0
-        killerPoints = self.killerGamesDf['points'].sum() if not self.killerGamesDf.empty else 0
-        totalPoints = survivorPoints + killerPoints
-        x = self.survivorGamesDf.shape[0] + self.killerGamesDf.shape[0]
-        averagePoints = totalPoints // (1 if x == 0 else x)
-
-        survivorMapHistogram = self.survivorGamesDf.groupby('map',sort=False).size()
-        killerMapHistogram = self.killerGamesDf.groupby('map',sort=False).size()
-
-        totalMapHistogram = pd.concat([survivorMapHistogram,killerMapHistogram],axis=1).fillna(value=0)
-        totalMapHistogram = pd.DataFrame(data=(totalMapHistogram[0] + totalMapHistogram[1]).astype(int), columns=['count'])
-
-        totalGamesWithMapPresent = totalMapHistogram['count'].sum()
-
-        mostCommonMap: GameMap = totalMapHistogram.idxmax()[0] if not totalMapHistogram.empty else None
-        leastCommonMap: GameMap = totalMapHistogram.idxmin()[0] if not totalMapHistogram.empty else None
-
-        realmsDict = defaultdict(int)
-        for row in totalMapHistogram.itertuples():
-            realmsDict[row.Index.realm] += row.count
-
-        mostCommonRealm = max(realmsDict, key=realmsDict.get) if len(realmsDict) > 0 else None
-        leastCommonRealm = min(realmsDict, key=realmsDict.get) if len(realmsDict) > 0 else None
-
-        mostCommonMapGames = totalMapHistogram[totalMapHistogram.index == mostCommonMap]['count'][0] if not totalMapHistogram.empty else 0
-        leastCommonMapGames = totalMapHistogram[totalMapHistogram.index == leastCommonMap]['count'][0] if not totalMapHistogram.empty else 0
-
-        mostCommonRealmGames = realmsDict[mostCommonRealm] if len(realmsDict) > 0 else 0
-        leastCommonRealmGames = realmsDict[leastCommonRealm] if len(realmsDict) > 0 else 0
-
-        mostCommonMapInfo = MapInfo(totalGames=totalGamesWithMapPresent, map=mostCommonMap, mapGames=mostCommonMapGames)
-        leastCommonMapInfo = MapInfo(totalGames=totalGamesWithMapPresent, map=leastCommonMap, mapGames=leastCommonMapGames)
-        mostCommonRealmInfo = MapRealmInfo(totalGames=totalGamesWithMapPresent, realm=mostCommonRealm, realmGames=mostCommonRealmGames)
-        leastCommonRealmInfo = MapRealmInfo(totalGames=totalGamesWithMapPresent, realm=leastCommonRealm, realmGames=leastCommonRealmGames)
+        killerGames, results = self.__rows(AggregateKind.KillerGames), self.__rows(AggregateKind.SurvivorResults)
+        totalGames = int(results['games'].sum() + killerGames['games'].sum())
+        totalPoints = results['points'].sum() + killerGames['points'].sum()
+        averagePoints = totalPoints // (1 if totalGames == 0 else totalGames)
+
+        #maps in the order they were first seen in survivor matches, then the ones only played in killer matches
+        maps = self.__rows(AggregateKind.MapGames)
+        mapHistogram = pd.concat([maps[maps['subKeyID'] == SURVIVOR_SIDE], maps[maps['subKeyID'] == KILLER_SIDE]]).groupby('keyID', sort=False)['games'].sum()
+        totalGamesWithMapPresent = int(maps['games'].sum())
+        realmHistogram = mapHistogram.groupby(mapHistogram.index.map(self.lookup.mapRealmIDs), sort=False).sum()
+
+        extremes = lambda histogram: (histogram.idxmax(), histogram.idxmin()) if not histogram.empty else (None, None)
+        gameMaps, realms = self.lookup.gameMaps, self.lookup.realms
+        mapInfo = lambda mapID: MapInfo(totalGames=totalGamesWithMapPresent, map=gameMaps.get(mapID),
+                                        mapGames=mapHistogram[mapID] if mapID is not None else 0)
+        realmInfo = lambda realmID: MapRealmInfo(totalGames=totalGamesWithMapPresent, realm=realms.get(realmID),
+                                                 realmGames=realmHistogram[realmID] if realmID is not None else 0)
+        mostCommonMapInfo, leastCommonMapInfo = map(mapInfo, extremes(mapHistogram))
+        mostCommonRealmInfo, leastCommonRealmInfo = map(realmInfo, extremes(realmHistogram))
 
         return GeneralMatchStatistics(averagePointsPerMatch=averagePoints, totalGames=totalGames, totalPoints=totalPoints,
                                       mostCommonMapData=mostCommonMapInfo, mostCommonMapRealmData=mostCommonRealmInfo,
                                       leastCommonMapData=leastCommonMapInfo, leastCommonMapRealmData=leastCommonRealmInfo)
 
 
+class TimeSeriesPeriod(enum.Enum):
+    Day = 'D'
+    Week = 'W'
+    Month = 'M'
+
+
+ESCAPE_RESULTS = [r.value for r in (SurvivorMatchResult.Escaped, SurvivorMatchResult.HatchEscape, SurvivorMatchResult.KeyEscape)]
+DAILY_COUNTER_COLUMNS = ['games', 'points', 'killerGames', 'eliminations', 'facedSurvivors', 'survivorGames', 'escapes']
+
+
+def dailyCounters(frames: MatchFrames) -> tuple[pd.DataFrame, pd.DataFrame]:
+    #per match date: the counters MatchTimeSeries sums up, and the number of survivor matches against each killer id
+    killerMatches, survivorMatches = frames.killerMatches, frames.survivorMatches
+    facedSurvivors = killerMatches['matchID'].map(frames.facedSurvivors.groupby('matchID').size()).fillna(0)
+    eliminations = killerMatches['sacrifices'].astype('int64') + killerMatches['kills'] + killerMatches['disconnects']
+    killerCounters = np.column_stack([np.ones(len(killerMatches)), killerMatches['points'], np.ones(len(killerMatches)), eliminations,
+                                      facedSurvivors, np.zeros(len(killerMatches)), np.zeros(len(killerMatches))])
+    survivorCounters = np.column_stack([np.ones(len(survivorMatches)), survivorMatches['points'], np.zeros((len(survivorMatches), 3)),
+                                        np.ones(len(survivorMatches)), survivorMatches['matchResult'].isin(ESCAPE_RESULTS)])
+    matchDates = pd.DatetimeIndex(np.concatenate([killerMatches['matchDate'].to_numpy(), survivorMatches['matchDate'].to_numpy()]), name='matchDate')
+    daily = pd.DataFrame(np.concatenate([killerCounters, survivorCounters]).astype('int64'), index=matchDates, columns=DAILY_COUNTER_COLUMNS)
+    encounters = survivorMatches.groupby(['matchDate', 'facedKillerID']).size().unstack(fill_value=0)
+    return daily.groupby(level=0).sum(), encounters.rename_axis(columns=None)
+
+
+class MatchTimeSeries(object):
+    #statistics per day, week or month over the per day counters of the match history. every period is the sum of its days
+    #and with a rolling window of the periods before it too, rates are ratios of those sums. results are kept, and appending
+    #matches only calculates again the periods the windows over the new days reach
+
+    def __init__(self, daily: pd.DataFrame, encounters: pd.DataFrame):
+        self.daily = daily
+        self.encounters = encounters
+        self.__results: dict[tuple[TimeSeriesPeriod, int], tuple[pd.DataFrame, pd.DataFrame]] = {}
+
+    @staticmethod
+    def fromFrames(frames: MatchFrames) -> MatchTimeSeries:
+        return MatchTimeSeries(*dailyCounters(frames))
+
+    def append(self, frames: MatchFrames) -> None:
+        #frames of matches saved since, counters of days already in the series are added to
+        daily, encounters = dailyCounters(frames)
+        if daily.empty:
+            return
+        firstDay = daily.index.min()
+        self.daily = MatchTimeSeries.__mergeFrom(self.daily, daily, firstDay)
+        self.encounters = MatchTimeSeries.__mergeFrom(self.encounters, encounters, firstDay).sort_index(axis=1)
+        for period, window in self.__results:
+            self.__results[(period, window)] = self.__calculate(period, window, firstDay)
+
+    def calculate(self, period: TimeSeriesPeriod, window: int = 1) -> tuple[pd.DataFrame, pd.DataFrame]:
+        #games, averagePoints, killRate and escapeRate of every period, and the share of survivor matches against each
+        #killer id. both indexed with the periods
+        if (period, window) not in self.__results:
+            self.__results[(period, window)] = self.__calculate(period, window)
+        return self.__results[(period, window)]
+
+    def __calculate(self, period: TimeSeriesPeriod, window: int, since: Optional[pd.Timestamp] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        #with since only from the period of that day on, reading the window - 1 periods before it the rolling sums need
+        periods = pd.PeriodIndex([], freq=period.value)
+        if not self.daily.empty:
+            firstPeriod, lastPeriod = self.daily.index.min().to_period(period.value), self.daily.index.max().to_period(period.value)
+            if since is not None:
+                sincePeriod = since.to_period(period.value)
+                firstPeriod = max(firstPeriod, sincePeriod - (window - 1))
+            periods = pd.period_range(firstPeriod, lastPeriod, freq=period.value)
+        sums, encounters = (MatchTimeSeries.__rollingSums(frame, periods, window) for frame in (self.daily, self.encounters))
+        statistics = pd.DataFrame({
+            'games': sums['games'].astype('int64'),
+            'averagePoints': sums['points'] / sums['games'],
+            'killRate': sums['eliminations'] / sums['facedSurvivors'],
+            'escapeRate': sums['escapes'] / sums['survivorGames']
+        })
+        shares = encounters.div(encounters.sum(axis=1), axis=0).fillna(0.0)
+        if since is None:
+            return statistics, shares
+        previousStatistics, previousShares = self.__results[(period, window)]
+        keep = lambda previous, new: pd.concat([previous[previous.index < sincePeriod], new[new.index >= sincePeriod]])
+        return keep(previousStatistics, statistics), keep(previousShares, shares).reindex(columns=shares.columns).fillna(0.0)
+
+    @staticmethod
+    def __rollingSums(frame: pd.DataFrame, periods: pd.PeriodIndex, window: int) -> pd.DataFrame:
+        #periods without matches are zeros, so the windows always span the same number of periods
+        if periods.empty:
+            return pd.DataFrame(0, index=periods, columns=frame.columns, dtype='int64')
+        frame = frame[frame.index >= periods[0].start_time]
+        sums = frame.groupby(frame.index.to_period(periods.freq)).sum().reindex(periods, fill_value=0)
+        return sums.rolling(window, min_periods=1).sum()
+
+    @staticmethod
+    def __mergeFrom(frame: pd.DataFrame, added: pd.DataFrame, firstDay: pd.Timestamp) -> pd.DataFrame:
+        #the days before firstDay are kept as they are, the rest is summed up with the added counters
+        tail = pd.concat([frame[frame.index >= firstDay], added]).fillna(0).groupby(level=0).sum()
+        return pd.concat([frame[frame.index < firstDay], tail]).fillna(0).astype('int64')
+
+
+STATISTICS_CACHE_PATH = '../statistics-cache.bin'
+STATISTICS_CACHE_FORMAT = 1 #bump when the statistics classes or what they hold change, cache files of other formats are ignored
+
+StatisticsGroups = tuple[GeneralMatchStatistics, Optional[KillerMatchStatistics], Optional[SurvivorMatchStatistics]]
+
+
+class StatisticsCache(object):
+    #the last calculated statistics, pickled together with the database content version (Database.contentVersion)
+    #they were calculated from. they are only given back while that version is still the current one
+
+    def __init__(self, path: str = STATISTICS_CACHE_PATH):
+        self.path = path
+
+    def load(self, version: str) -> Optional[StatisticsGroups]:
+        try:
+            with open(self.path, mode='rb') as f:
+                cacheFormat, cachedVersion, statistics = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, ImportError):
+            return None #no cache yet, or one an older version of the program wrote
+        return statistics if cacheFormat == STATISTICS_CACHE_FORMAT and cachedVersion == version else None
+
+    def store(self, version: str, statistics: StatisticsGroups) -> None:
+        #written next to the cache file and moved over it, so an interrupted write leaves the previous cache intact
+        temporaryPath = self.path + '.tmp'
+        try:
+            with open(temporaryPath, mode='wb') as f:
+                pickle.dump((STATISTICS_CACHE_FORMAT, version, statistics), f)
+            os.replace(temporaryPath, self.path)
+        except OSError:
+            pass #without a cache the statistics are just calculated again next time
+
 
 def exportAsJson(statistics: MatchStatistics, destinationPath: str):
     pass
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import datetime
+import json
 import re
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterable, TYPE_CHECKING
 
-import numpy as np
 import requests
-from PyQt5.QtGui import QIntValidator
-from PyQt5.QtWidgets import QLayout, QWidget, QMessageBox
 import time
 
+#widgets are imported where they're used, so the headless importer can use this module without the GUI stack
+if TYPE_CHECKING:
+    from PyQt5.QtGui import QIntValidator
+    from PyQt5.QtWidgets import QLayout, QWidget
+
+
+def loadConfig(path: str):
+    with open(path,mode='r') as f:
+        return json.load(f)
 
 def saveImageFromURL(url: str, dest: str):
     request = requests.get(url,stream=True)
@@ -28,6 +35,7 @@ def setQWidgetLayout(widget: QWidget, layout: QLayout) -> tuple:
     return widget, layout
 
 def nonNegativeIntValidator(upperBound: Optional[int]=None) -> QIntValidator:
+    from PyQt5.QtGui import QIntValidator
     validator = QIntValidator()
     validator.setBottom(0)
     if upperBound is not None and upperBound > 0:
@@ -51,25 +59,60 @@ def clearLayout(layout: QLayout):
 def toResourceName(s: str) -> str:
     return re.sub(r'[:\'\"]', '', s).lower().replace(' ', '-')
 
-def levenshteinDistance(s1: str, s2: str) -> int:
-    l1, l2 = len(s1), len(s2)
-    if l1 == 0:
-        return l2
-    if l2 == 0:
-        return l1
-
-    m, n = l1 + 1, l2 + 1
-    matrix = np.zeros((m, n), dtype=int)
-    nrange, mrange = np.arange(n), np.arange(m)
-    matrix[mrange,0] = mrange
-    matrix[0,nrange] = nrange
-
-    for i in range(1, m):
-        for j in range(1, n):
-            cost = 1 if s1[i - 1] != s2[j - 1] else 0
-            matrix[i][j] = min(matrix[i - 1][j] + 1, matrix[i][j - 1] + 1, matrix[i - 1][j - 1] + cost)
-
-    return matrix[m - 1][n - 1]
+def levenshteinDistance(s1: str, s2: str, maxDistance: Optional[int] = None) -> int:
+    #only the previous row of the distance matrix is kept. with maxDistance the returned value is exact up to it and
+    #otherwise just some number bigger than maxDistance: strings whose lengths differ by more can't be within it, and
+    #only the cells at most maxDistance off the diagonal are computed, the ones outside the band count as maxDistance + 1
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if maxDistance is not None and len(s1) - len(s2) > maxDistance:
+        return len(s1) - len(s2)
+    if len(s2) == 0:
+        return len(s1)
+    if maxDistance is None or maxDistance >= len(s1):
+        previousRow = list(range(len(s2) + 1))
+        for i, c1 in enumerate(s1, 1):
+            currentRow = [i]
+            for j, c2 in enumerate(s2, 1):
+                currentRow.append(min(previousRow[j] + 1, currentRow[j - 1] + 1, previousRow[j - 1] + (c1 != c2)))
+            previousRow = currentRow
+        return previousRow[-1]
+    outside = maxDistance + 1
+    previousRow = [min(j, outside) for j in range(len(s2) + 1)]
+    for i, c1 in enumerate(s1, 1):
+        currentRow = [outside] * (len(s2) + 1)
+        currentRow[0] = min(i, outside)
+        rowMin = currentRow[0]
+        for j in range(max(1, i - maxDistance), min(len(s2), i + maxDistance) + 1):
+            currentRow[j] = distance = min(previousRow[j] + 1, currentRow[j - 1] + 1, previousRow[j - 1] + (c1 != s2[j - 1]), outside)
+            rowMin = min(rowMin, distance)
+        if rowMin > maxDistance:
+            return rowMin
+        previousRow = currentRow
+    return previousRow[-1]
+
+class EditDistanceIndex(object):
+    #words bucketed by length. a search only computes distances to the words whose length is within the tolerance,
+    #and those stop as soon as they exceed it. a BK-tree needs the exact distance at every node it visits to pick the
+    #children, which made it slower than this over the few hundred resource names
+
+    def __init__(self, words: Iterable[str]):
+        self.__wordsByLength: dict[int, set[str]] = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        self.__wordsByLength.setdefault(len(word), set()).add(word)
+
+    def search(self, word: str, maxDistance: int) -> list[tuple[int, str]]:
+        #(distance, word) pairs sorted by distance and then alphabetically
+        results = []
+        for length in range(max(0, len(word) - maxDistance), len(word) + maxDistance + 1):
+            for candidate in self.__wordsByLength.get(length, ()):
+                distance = levenshteinDistance(word, candidate, maxDistance)
+                if distance <= maxDistance:
+                    results.append((distance, candidate))
+        return sorted(results)
 
 def isDateString(s:str, fmt: str) -> bool:
     try:
@@ -90,6 +133,7 @@ def qtMakeItalic(s: str) -> str:
 def confirmation(text: str="Confirmation", informativeText: str="Please confirm your action", title: str="Confirmation dialog") -> Callable:
     def outerWrapper(func):
         def wrapper(*args):
+            from PyQt5.QtWidgets import QMessageBox
             msgBox = QMessageBox()
             msgBox.setText(text)
             msgBox.setIcon(QMessageBox.Question)
@@ -0,0 +1,223 @@
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import sqlalchemy
+from sqlalchemy import event
+
+from classutil import DBDMatchParser, DBDMatchLogFileLoader, matchToRecord
+from database import Database, DatabaseMatchListSaveWorker, sqlitePragmas
+from loadertests import writeLog
+from models import *
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        Database.close() #other test modules connect to the DEV database first
+        self.tempDir = tempfile.TemporaryDirectory()
+        dbPath = os.path.join(self.tempDir.name, 'test.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', dbPath)
+        self.dbPath = dbPath
+        Database.init(f'sqlite:///{dbPath}')
+        self.resources = Database.instance().newResourceInstance()
+        logPath = os.path.join(self.tempDir.name, 'log.txt')
+        writeLog(logPath, days=10, gamesPerDay=6)
+        self.loader = DBDMatchLogFileLoader(DBDMatchParser(self.resources))
+        self.matches = self.loader.load(logPath)
+        for match in self.matches: #the parser gives datetimes, dates are read back
+            match.matchDate = match.matchDate.date()
+
+    def tearDown(self) -> None:
+        Database.close()
+        self.tempDir.cleanup()
+
+    def loadSavedMatches(self) -> tuple[list[KillerMatch], list[SurvivorMatch]]:
+        return Database.instance().loadMatches(KillerMatch, MATCH_LIST_LOAD_OPTIONS), Database.instance().loadMatches(SurvivorMatch, MATCH_LIST_LOAD_OPTIONS)
+
+    def test_saveMatches_sameRowsAsOrmSave(self):
+        with Database.instance().getNewSession() as s:
+            s.add_all(self.matches)
+            s.commit()
+        ormSaved = self.loadSavedMatches()
+        Database.instance().saveMatches(self.matches)
+        killerMatches, survivorMatches = self.loadSavedMatches()
+        self.assertEqual(killerMatches[len(ormSaved[0]):], ormSaved[0])
+        self.assertEqual(survivorMatches[len(ormSaved[1]):], ormSaved[1])
+        self.assertEqual(killerMatches[-1].matchID, ormSaved[0][-1].matchID + len(ormSaved[0]))
+        self.assertEqual(len(killerMatches[-1].facedSurvivors), 4)
+
+    def test_saveMatchRecords_storesAndReplacesCheckpoints(self):
+        records = [matchToRecord(m) for m in self.matches]
+        checkpoint = self.loader.checkpoint
+        Database.instance().saveMatchRecords(records[:10], [checkpoint])
+        newCheckpoint = LogFileCheckpoint(checkpoint.filePath, 1, 2.0, 0, 1, 'hash', 3)
+        Database.instance().saveMatchRecords(records[10:], [newCheckpoint])
+        killerMatches, survivorMatches = self.loadSavedMatches()
+        self.assertEqual(killerMatches + survivorMatches,
+                         [m for m in self.matches if isinstance(m, KillerMatch)] + [m for m in self.matches if isinstance(m, SurvivorMatch)])
+        with Database.instance().getNewSession() as s:
+            self.assertEqual(s.query(LogFileCheckpoint).all(), [newCheckpoint])
+
+    def test_saveMatchRecords_nothingToSave(self):
+        Database.instance().saveMatchRecords([])
+        self.assertEqual(self.loadSavedMatches(), ([], []))
+
+    def savedCheckpoints(self) -> list[LogFileCheckpoint]:
+        with Database.instance().getNewSession() as s:
+            return s.query(LogFileCheckpoint).all()
+
+    def test_iterSaveMatches_commitsEveryChunkWithoutCheckpoints(self):
+        progress = []
+        for saved in Database.instance().iterSaveMatches(self.matches, chunkSize=25):
+            killerMatches, survivorMatches = self.loadSavedMatches()
+            self.assertEqual(len(killerMatches) + len(survivorMatches), saved)
+            progress.append(saved)
+        self.assertEqual(progress, [25, 50, 60])
+
+    def test_iterSaveMatches_withCheckpoints_commitsOnceAfterLastChunk(self):
+        progress = []
+        for saved in Database.instance().iterSaveMatches(self.matches, [self.loader.checkpoint], chunkSize=25):
+            killerMatches, survivorMatches = self.loadSavedMatches()
+            self.assertEqual(len(killerMatches) + len(survivorMatches), 0 if saved < len(self.matches) else saved)
+            self.assertEqual(self.savedCheckpoints(), [self.loader.checkpoint] if saved == len(self.matches) else [])
+            progress.append(saved)
+        self.assertEqual(progress, [25, 50, 60])
+
+    def runCancelledSaveWorker(self, checkpoints: list[LogFileCheckpoint]) -> tuple[list, list, list]:
+        worker = DatabaseMatchListSaveWorker(self.matches, checkpoints, chunkSize=20)
+        progress, cancelled, finished = [], [], []
+        worker.signals.progressUpdated.connect(lambda saved, total, rate: progress.append((saved, total)))
+        worker.signals.progressUpdated.connect(lambda saved, total, rate: worker.cancel() if saved >= 40 else None)
+        worker.signals.cancelled.connect(cancelled.append)
+        worker.signals.finished.connect(lambda: finished.append(True))
+        worker.run()
+        return progress, cancelled, finished
+
+    def test_saveWorker_cancelledBetweenChunks(self):
+        progress, cancelled, finished = self.runCancelledSaveWorker([])
+        self.assertEqual(progress, [(20, 60), (40, 60)])
+        self.assertEqual((cancelled, finished), ([40], []))
+        killerMatches, survivorMatches = self.loadSavedMatches()
+        self.assertEqual(len(killerMatches) + len(survivorMatches), 40)
+
+    def aggregateRows(self) -> list[tuple]:
+        with sqlite3.connect(self.dbPath) as connection:
+            return connection.execute("SELECT * FROM match_aggregates ORDER BY kind, keyID, subKeyID").fetchall()
+
+    def test_saveWorker_withCheckpoints_cancelRollsBack(self):
+        aggregates = self.aggregateRows()
+        progress, cancelled, finished = self.runCancelledSaveWorker([self.loader.checkpoint])
+        self.assertEqual(progress, [(20, 60), (40, 60)])
+        self.assertEqual((cancelled, finished), ([0], []))
+        self.assertEqual(self.loadSavedMatches(), ([], []))
+        self.assertEqual(self.savedCheckpoints(), [])
+        self.assertEqual(self.aggregateRows(), aggregates)
+
+    def indexNames(self) -> set[str]:
+        with sqlite3.connect(self.dbPath) as connection:
+            return {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'")}
+
+    def queryPlans(self, query) -> list[list[str]]:
+        #plans of every statement the query runs, the eager loads included
+        engine = Database.instance()._engine
+        statements = []
+        listener = lambda connection, cursor, statement, parameters, context, executemany: statements.append((statement, parameters))
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            query()
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        with engine.connect() as connection:
+            return [[row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)] for statement, parameters in statements]
+
+    def test_migration_createsMissingIndexesOnce(self):
+        expected = {index.name for table in mapperRegistry.metadata.sorted_tables for index in table.indexes}
+        self.assertIn('ix_killer_matches_matchDate', expected)
+        self.assertEqual(self.indexNames(), expected)
+        Database.close()
+        with sqlite3.connect(self.dbPath) as connection:
+            for name in expected:
+                connection.execute(f'DROP INDEX "{name}"')
+        self.assertEqual(self.indexNames(), set())
+        for _ in range(2):
+            Database.close()
+            Database.init(f'sqlite:///{self.dbPath}')
+            self.assertEqual(self.indexNames(), expected)
+
+    def test_queryPlans_matchQueriesUseIndexes(self):
+        Database.instance().saveMatches(self.matches)
+        matchDate = self.matches[0].matchDate
+        Database.instance().referenceData #loaded once, the match queries don't touch the resource tables
+        for matchType in (KillerMatch, SurvivorMatch):
+            def filterMatches(): #what MainWindow.__filterMatches runs
+                self.assertGreater(len(Database.instance().loadMatches(matchType, MATCH_LIST_LOAD_OPTIONS, matchType.matchDate == matchDate)), 0)
+            def fetchDates():
+                with Database.instance().getNewSession() as s:
+                    s.query(matchType.matchDate).distinct().order_by(matchType.matchDate).all()
+            for query in (filterMatches, fetchDates):
+                plans = self.queryPlans(query)
+                self.assertGreater(len(plans), 0)
+                for plan in plans: #no full table scans, only scans over the materialized subqueries of the eager loads
+                    self.assertFalse([step for step in plan if re.match(r'SCAN (?!anon_)\w+$', step)], plan)
+        def filterByFacedKiller():
+            with Database.instance().getNewSession() as s:
+                s.query(SurvivorMatch.matchID).filter(SurvivorMatch.facedKillerID == self.matches[1].facedKiller.killerID).all()
+        plans = self.queryPlans(filterByFacedKiller)
+        self.assertIn('USING COVERING INDEX ix_survivor_matches_facedKillerID', plans[0][0])
+
+    def test_sqliteProfile_pragmasAppliedToEveryConnection(self):
+        engine = Database.instance()._engine
+        for connection in (engine.connect(), engine.connect()):
+            with connection:
+                pragmas = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in ('journal_mode', 'synchronous', 'cache_size', 'temp_store', 'busy_timeout')}
+                self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'cache_size': -65536, 'temp_store': 2, 'busy_timeout': 10000})
+        Database.close()
+        Database.init(f'sqlite:///{self.dbPath}', sqliteProfile={'synchronous': 'OFF'})
+        with Database.instance()._engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA synchronous').scalar(), 0)
+
+    def test_sqliteProfile_readersNotBlockedByWriter(self):
+        engine = Database.instance()._engine
+        writer, reader = engine.raw_connection(), engine.raw_connection()
+        try:
+            writer.execute('BEGIN EXCLUSIVE') #with a rollback journal this locks readers out until the commit
+            writer.execute('DELETE FROM killers')
+            self.assertEqual(reader.execute('SELECT COUNT(*) FROM killers').fetchone()[0], len(self.resources.killers))
+            writer.rollback()
+        finally:
+            writer.close()
+            reader.close()
+
+    def test_sqlitePragmas_invalidProfiles(self):
+        self.assertEqual(sqlitePragmas('default'), {})
+        for profile in ('fastest', {'journal_mode': 'WAL; DROP TABLE killers'}, {'locking_mode': 'EXCLUSIVE'}):
+            with self.assertRaises(ValueError):
+                sqlitePragmas(profile)
+
+    def test_loadMatches_oneStatementPerCollection(self):
+        Database.instance().saveMatches(self.matches)
+        killerMatches, survivorMatches = self.loadSavedMatches()
+        for matchType, collectionCount, expected in ((KillerMatch, 3, killerMatches), (SurvivorMatch, 2, survivorMatches)):
+            loaded = []
+            plans = self.queryPlans(lambda: loaded.extend(Database.instance().loadMatches(matchType, MATCH_LIST_LOAD_OPTIONS)))
+            self.assertEqual(loaded, expected)
+            self.assertEqual(len(plans), 1 + collectionCount)
+            tables = {re.match(r'(?:SEARCH|SCAN) (\w+)', step).group(1) for plan in plans for step in plan if re.match(r'SEARCH|SCAN', step)}
+            self.assertFalse(tables & {'killers', 'survivors', 'perks', 'killer_addons', 'item_addons', 'items', 'offerings', 'maps', 'realms'})
+
+    def test_loadMatches_referencesSharedAcrossLoads(self):
+        Database.instance().saveMatches(self.matches)
+        first, second = self.loadSavedMatches(), self.loadSavedMatches()
+        resources = Database.instance().referenceData
+        self.assertIs(first[0][0].killer, second[0][0].killer)
+        self.assertIs(first[0][0].killer, resources.byID[Killer][first[0][0].killerID])
+        self.assertIs(first[1][0].gameMap, second[1][0].gameMap)
+        self.assertIs(first[1][0].gameMap.realm.maps[0].realm, first[1][0].gameMap.realm)
+        self.assertIs(first[0][0].perks[0].perk, resources.byID[Perk][first[0][0].perks[0].killerPerkID])
+        with Database.instance().getNewSession() as s: #set as loaded values, so nothing looks modified
+            s.add(first[0][0])
+            self.assertFalse(s.dirty)
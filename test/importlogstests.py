@@ -0,0 +1,57 @@
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import importlogs
+from database import Database
+from loadertests import writeLog
+
+
+class TestImportLogs(unittest.TestCase):
+
+    def setUp(self) -> None:
+        Database.close() #other test modules connect to the DEV database first
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dbPath = os.path.join(self.tempDir.name, 'import.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', self.dbPath)
+        self.logPath = os.path.join(self.tempDir.name, 'logs', 'log.txt')
+        os.mkdir(os.path.dirname(self.logPath))
+        writeLog(self.logPath, days=10, gamesPerDay=4)
+
+    def tearDown(self) -> None:
+        Database.close()
+        self.tempDir.cleanup()
+
+    def runImport(self, *args: str) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(importlogs.main(['--db-url', f'sqlite:///{self.dbPath}', '--processes', '1', *args]), 0)
+        return output.getvalue()
+
+    def matchCount(self) -> int:
+        with contextlib.closing(sqlite3.connect(self.dbPath)) as connection:
+            return sum(connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in ('killer_matches', 'survivor_matches'))
+
+    def test_expandPaths_globsAndDuplicates(self):
+        pattern = os.path.join(self.tempDir.name, '**', '*.txt')
+        self.assertEqual(importlogs.expandPaths([pattern, self.logPath, 'missing.txt']), [os.path.abspath(self.logPath)])
+
+    def test_main_importsOnlyNewLinesOnSecondRun(self):
+        self.assertIn('Loaded 40 matches', self.runImport(self.logPath))
+        self.assertEqual(self.matchCount(), 40)
+        self.assertIn('Loaded 0 matches', self.runImport(self.logPath))
+        self.assertEqual(self.matchCount(), 40)
+
+    def test_main_dryRunSavesNothing(self):
+        self.assertIn('Loaded 40 matches', self.runImport('--dry-run', self.logPath))
+        self.assertEqual(self.matchCount(), 0)
+
+    def test_main_countsLinesOnceWithProcesses(self):
+        #10 date headers, 40 games, 2 broken and 10 empty lines. a file this small is one chunk and parsed without starting processes
+        for processes in ('1', '2'):
+            with self.subTest(processes=processes):
+                self.assertIn('Loaded 40 matches from 62 lines', self.runImport('--full', '--dry-run', '--processes', processes, self.logPath))
@@ -0,0 +1,234 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from classutil import DBDMatchParser, DBDMatchLogFileLoader, LogFileLoadWorker, LogFileLoadError, matchToRecord, \
+    matchFromRecord, parseDateHeader, LOG_DATE_FORMAT
+from database import Database
+from models import *
+
+KILLER_LINE = "Hillbilly, 2 kills, (tinkerer I, enduring III, lightborn III), {points} points, " \
+              "add ons: apex muffler, map: rancid abattoir, offering: black ward, " \
+              "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6"
+SURVIVOR_LINE = "Bill, sacrificed, (we're gonna live forever III, dead hard I, unbreakable III, " \
+                "borrowed time III), {points} points, item: commodious toolbox, add ons: wire spool, " \
+                "scraps (against legion), map: wreckers' yard, offering: white ward, rank: 10, party size: 1"
+BROKEN_LINE = "Hillbilly, 2 kills, (tinkerer I, not a perk III), 100 points, add ons: none"
+
+
+def writeLog(path: str, days: int, gamesPerDay: int):
+    with open(path, mode='w', encoding='utf-8') as f:
+        for day in range(days):
+            f.write(f"{day % 28 + 1:02} 0{day % 9 + 1} 2021\n")
+            for game in range(gamesPerDay):
+                line = KILLER_LINE if game % 2 == 0 else SURVIVOR_LINE
+                f.write(line.format(points=day * 100 + game) + '\n')
+            if day % 5 == 0:
+                f.write(BROKEN_LINE + '\n')
+            f.write('\n')
+
+
+class TestDBDMatchLogFileLoader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        Database.init('sqlite:///../dbd-match-log-DEV.db')
+        cls.resources = Database.instance().newResourceInstance()
+        cls.tempDir = tempfile.TemporaryDirectory()
+        cls.logPath = os.path.join(cls.tempDir.name, 'log.txt')
+        writeLog(cls.logPath, days=40, gamesPerDay=6)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tempDir.cleanup()
+
+    def newLoader(self) -> DBDMatchLogFileLoader:
+        return DBDMatchLogFileLoader(DBDMatchParser(self.resources))
+
+    def test_load_parsesGamesAndReportsErrors(self):
+        loader = self.newLoader()
+        games = loader.load(self.logPath)
+        self.assertEqual(len(games), 40 * 6)
+        self.assertEqual(len(loader.errors), 8)
+        self.assertTrue(loader.errors[0].startswith('Error at line 8 '))
+
+    def test_iterLoad_yieldsGamesAndErrorsInFileOrder(self):
+        loader = self.newLoader()
+        results = list(loader.iterLoad(self.logPath))
+        self.assertEqual([r for r in results if not isinstance(r, LogFileLoadError)], loader.load(self.logPath))
+        errors = [r for r in results if isinstance(r, LogFileLoadError)]
+        self.assertEqual([str(e) for e in errors], loader.errors)
+        self.assertEqual(errors[0].line, 8)
+        self.assertIsInstance(results[6], LogFileLoadError)
+
+    def test_iterBatches_batchesHaveRequestedSize(self):
+        loader = self.newLoader()
+        batches = list(loader.iterBatches(self.logPath, batchSize=50))
+        self.assertEqual([len(games) for games, _ in batches], [50, 50, 50, 50, 40])
+        self.assertEqual([g for games, _ in batches for g in games], loader.load(self.logPath))
+        self.assertEqual([str(e) for _, errors in batches for e in errors], loader.errors)
+
+    def test_load_memoryMapped_sameResultAsLoad(self):
+        loader = self.newLoader()
+        mappedLoader = DBDMatchLogFileLoader(loader.parser, useMemoryMap=True)
+        self.assertEqual(mappedLoader.load(self.logPath), loader.load(self.logPath))
+        self.assertEqual(mappedLoader.errors, loader.errors)
+        self.assertEqual(mappedLoader.checkpoint, loader.checkpoint)
+        self.assertEqual(mappedLoader.splitIntoChunks(self.logPath, chunkSize=4096), loader.splitIntoChunks(self.logPath, chunkSize=4096))
+        self.assertEqual(mappedLoader.checkpoint, loader.checkpoint)
+
+    def test_splitIntoChunks_memoryMapped_windowsLineBreaksAndNoTrailingLineBreak(self):
+        path = os.path.join(self.tempDir.name, 'crlf.txt')
+        with open(self.logPath, mode='rb') as f:
+            data = f.read().replace(b'\n', b'\r\n').rstrip()
+        with open(path, mode='wb') as f:
+            f.write(data)
+        loader = self.newLoader()
+        mappedLoader = DBDMatchLogFileLoader(loader.parser, useMemoryMap=True)
+        for chunkSize in (1, 4096, len(data)):
+            self.assertEqual(mappedLoader.splitIntoChunks(path, chunkSize), loader.splitIntoChunks(path, chunkSize))
+            self.assertEqual(mappedLoader.checkpoint, loader.checkpoint)
+        loader.load(path)
+        self.assertEqual(mappedLoader.checkpoint, loader.checkpoint)
+
+    def test_load_memoryMapped_emptyFile(self):
+        path = os.path.join(self.tempDir.name, 'empty.txt')
+        open(path, mode='w').close()
+        loader = DBDMatchLogFileLoader(DBDMatchParser(self.resources), useMemoryMap=True)
+        self.assertEqual(loader.load(path), [])
+        self.assertEqual(loader.checkpoint.lineCount, 0)
+
+    def test_parseDateHeader_sameAsStrptime(self):
+        lines = ['21 05 2021', '1 5 2021', '01  05 2021', '31 02 2021', '29 02 2020', '00 01 2021', '21 13 2021',
+                 '21 05 21', '21/05/2021', '121 05 2021', KILLER_LINE, '']
+        for line in lines:
+            try:
+                expected = datetime.strptime(line, LOG_DATE_FORMAT)
+            except ValueError:
+                expected = None
+            self.assertEqual(parseDateHeader(line), expected, line)
+
+    def copyLog(self) -> str:
+        path = os.path.join(self.tempDir.name, f'{self.id()}.txt')
+        shutil.copyfile(self.logPath, path)
+        return path
+
+    def test_load_withCheckpoint_onlyNewLinesLoaded(self):
+        path = self.copyLog()
+        loader = self.newLoader()
+        allGames = loader.load(path)
+        checkpoint = loader.checkpoint
+        self.assertEqual(checkpoint.fileSize, os.path.getsize(path))
+        with open(path, mode='a', encoding='utf-8') as f:
+            #the last date block continues without a new date header, then a new day starts
+            f.write(KILLER_LINE.format(points=1) + '\n' + BROKEN_LINE + '\n\n01 01 2022\n' + SURVIVOR_LINE.format(points=2) + '\n')
+        games = loader.load(path, checkpoint)
+        self.assertEqual([g.points for g in games], [1, 2])
+        self.assertEqual(games[0].matchDate, allGames[-1].matchDate)
+        self.assertEqual(len(loader.errors), 1)
+        self.assertTrue(loader.errors[0].startswith(f'Error at line {checkpoint.lineCount + 2} '))
+        self.assertEqual(loader.load(path, loader.checkpoint), [])
+        self.assertEqual(loader.load(path), allGames + games)
+
+    def test_load_withCheckpoint_changedFileLoadedAgain(self):
+        path = self.copyLog()
+        loader = self.newLoader()
+        allGames = loader.load(path)
+        checkpoint = loader.checkpoint
+        with open(path, mode='r+b') as f:
+            f.seek(checkpoint.fileSize - 3)
+            f.write(b'2') #party size of the last game
+        os.utime(path, (0, checkpoint.modificationTime + 10))
+        games = loader.load(path, checkpoint)
+        self.assertEqual(len(games), len(allGames))
+        self.assertEqual(games[-1].partySize, 2)
+
+    def test_splitIntoChunks_withCheckpoint_onlyNewLinesLoaded(self):
+        path = self.copyLog()
+        loader = self.newLoader()
+        loader.load(path)
+        checkpoint = loader.checkpoint
+        with open(path, mode='a', encoding='utf-8') as f:
+            f.write(KILLER_LINE.format(points=1) + '\n\n01 01 2022\n' + SURVIVOR_LINE.format(points=2) + '\n')
+        chunks = loader.splitIntoChunks(path, chunkSize=16, checkpoint=checkpoint)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0].startOffset, checkpoint.blockOffset)
+        self.assertEqual([g.points for chunk in chunks for g in loader.loadChunk(chunk)], [1, 2])
+        self.assertEqual(loader.checkpoint.fileSize, os.path.getsize(path))
+
+    def test_splitIntoChunks_chunksStartAtDateHeaders(self):
+        loader = self.newLoader()
+        chunks = loader.splitIntoChunks(self.logPath, chunkSize=4096)
+        self.assertGreater(len(chunks), 1)
+        with open(self.logPath, mode='rb') as f:
+            data = f.read()
+        self.assertEqual(chunks[-1].endOffset, len(data))
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertEqual(previous.endOffset, chunk.startOffset)
+            self.assertRegex(data[chunk.startOffset:chunk.startOffset + 11].decode(), r'\d\d \d\d \d{4}\n')
+
+    def test_loadChunk_sameResultAsLoad(self):
+        loader = self.newLoader()
+        expectedGames, expectedErrors = loader.load(self.logPath), loader.errors
+        games, errors = [], []
+        for chunk in loader.splitIntoChunks(self.logPath, chunkSize=4096):
+            games += loader.loadChunk(chunk)
+            errors += loader.errors
+        self.assertEqual(games, expectedGames)
+        self.assertEqual(errors, expectedErrors)
+
+    def test_matchRecord_roundTrip(self):
+        games = self.newLoader().load(self.logPath)
+        self.assertEqual([matchFromRecord(matchToRecord(g), self.resources) for g in games], games)
+
+    def test_worker_parallelLoadSameAsSequential(self):
+        loader = self.newLoader()
+        expectedGames, expectedErrors = loader.load(self.logPath), loader.errors
+        results = []
+        worker = LogFileLoadWorker(loader, [self.logPath, self.logPath], processes=2, chunkSize=4096)
+        worker.signals.finished.connect(lambda games, errors: results.append((games, errors)))
+        worker.run()
+        games, errors = results[0]
+        self.assertEqual(games, expectedGames * 2)
+        self.assertEqual(errors, expectedErrors * 2)
+
+    def test_worker_batchesWithoutKeptResults(self):
+        loader = self.newLoader()
+        expectedGames, expectedErrors = loader.load(self.logPath), loader.errors
+        for processes in (1, 2):
+            batches, results = [], []
+            worker = LogFileLoadWorker(loader, [self.logPath, self.logPath], processes=processes, chunkSize=4096, batchSize=7, keepResults=False)
+            worker.signals.batchLoaded.connect(lambda games, errors: batches.append((games, errors)))
+            worker.signals.finished.connect(lambda games, errors: results.append((games, errors)))
+            worker.run()
+            self.assertEqual(results, [([], [])])
+            self.assertGreater(len(batches), 2)
+            self.assertEqual([g for games, _ in batches for g in games], expectedGames * 2)
+            self.assertEqual([e for _, errors in batches for e in errors], expectedErrors * 2)
+
+    def test_worker_cancelledDuringLoad(self):
+        for processes in (1, 2):
+            batches, results, checkpoints, cancelled = [], [], [], []
+            worker = LogFileLoadWorker(self.newLoader(), [self.logPath, self.logPath], processes=processes, chunkSize=4096, batchSize=7, keepResults=False)
+            worker.signals.batchLoaded.connect(lambda games, errors: (batches.append(games), worker.cancel()))
+            worker.signals.finished.connect(lambda games, errors: results.append(games))
+            worker.signals.checkpointCreated.connect(checkpoints.append)
+            worker.signals.cancelled.connect(lambda: cancelled.append(True))
+            worker.run()
+            self.assertEqual(cancelled, [True])
+            self.assertEqual(results, [])
+            self.assertEqual(checkpoints, [])
+            self.assertLess(sum(len(games) for games in batches), 40 * 6)
+
+    def test_worker_missingFile_failedEmitted(self):
+        for processes in (1, 2):
+            results, failures = [], []
+            worker = LogFileLoadWorker(self.newLoader(), [os.path.join(self.tempDir.name, 'missing.txt')], processes=processes)
+            worker.signals.finished.connect(lambda games, errors: results.append(games))
+            worker.signals.failed.connect(failures.append)
+            worker.run()
+            self.assertEqual(results, [])
+            self.assertEqual(len(failures), 1)
+            self.assertTrue(failures[0].startswith('FileNotFoundError'))
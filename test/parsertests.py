@@ -172,4 +172,71 @@ class TestDBDMatchParser(unittest.TestCase):
         self.parser.setMatchDate(date(2021, 5, 21))
         self.assertRaises(AssertionError, lambda: self.parser.parse(testString))
 
+    def test_parseGame_failWhen_addonForDifferentItemType(self):
+        testString = "Bill, sacrificed, (we're gonna live forever III, dead hard I, unbreakable III, " \
+                     "borrowed time III), 20100 points, item: camping aid kit, add ons: scraps, bandages (against legion), " \
+                     "map: wreckers' yard, offering: white ward, rank: 10, party size: 1"
+        self.parser.setMatchDate(date(2021, 5, 21))
+        self.assertRaises(AssertionError, lambda: self.parser.parse(testString))
+
+    def test_parseKillerGame_addonNameWithoutDiacritics(self):
+        testString = "Spirit, 2 kills, (tinkerer I, enduring III, lightborn III), 23196 points, " \
+                     "add ons: zori, map: rancid abattoir, offering: black ward, " \
+                     "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6"
+        self.parser.setMatchDate(date(2021, 5, 21))
+        resultMatch = self.parser.parse(testString)
+        self.assertEqual([a.killerAddon.addonName for a in resultMatch.killerAddons], ['Zōri'])
+
+    def test_parseKillerGame_fieldsInDifferentOrder(self):
+        testString = "Hillbilly, 2 kills, (tinkerer I, enduring III, lightborn III), 23196 points, " \
+                     "offering: black ward, add ons: apex muffler, iridescent brick, " \
+                     "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], map: rancid abattoir"
+        self.parser.setMatchDate(date(2021, 5, 21))
+        resultMatch = self.parser.parse(testString)
+        self.assertEqual(resultMatch.gameMap.mapName, 'Rancid Abattoir')
+        self.assertEqual(resultMatch.offering.offeringName, 'Black Ward')
+        self.assertEqual(len(resultMatch.killerAddons), 2)
+        self.assertEqual(len(resultMatch.facedSurvivors), 4)
+        self.assertIsNone(resultMatch.rank)
+
+    def test_parseGame_repeatedBuildServedFromCache(self):
+        testString = "Hillbilly, 2 kills, (tinkerer I, enduring III, lightborn III), 23196 points, " \
+                     "add ons: apex muffler, map: rancid abattoir, offering: black ward, " \
+                     "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6"
+        parser = DBDMatchParser(self.resources)
+        parser.setMatchDate(date(2021, 5, 21))
+        first = parser.parse(testString)
+        second = parser.parse(testString.replace('2 kills', '1 kill, 1 mori'))
+        third = parser.parse(testString)
+        self.assertEqual(first, third)
+        self.assertIsNot(first.facedSurvivors[0], third.facedSurvivors[0])
+        self.assertEqual([fs.state for fs in second.facedSurvivors], [FacedSurvivorState.Escaped, FacedSurvivorState.Sacrificed,
+                                                                      FacedSurvivorState.Sacrificed, FacedSurvivorState.Escaped])
+        cacheInfo = parser.cacheInfo()
+        self.assertEqual((cacheInfo['perks'].hits, cacheInfo['perks'].misses), (2, 1))
+        self.assertEqual((cacheInfo['addons'].hits, cacheInfo['addons'].misses), (2, 1))
+        self.assertEqual((cacheInfo['faced survivors'].hits, cacheInfo['faced survivors'].misses), (1, 2))
+
+    def test_parseGame_fuzzyMatchingResolvesTypos(self):
+        testString = "Hillbilly, 2 kills, (tinkrer I, endurng III, lightborn III), 23196 points, " \
+                     "add ons: apex mufler, map: rancid abatoir, offering: black wrd, " \
+                     "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6"
+        self.parser.setMatchDate(date(2021, 5, 21))
+        self.assertRaises(AssertionError, self.parser.parse, testString)
+        fuzzyParser = DBDMatchParser(self.resources, fuzzyMatching=True)
+        fuzzyParser.setMatchDate(date(2021, 5, 21))
+        resultMatch = fuzzyParser.parse(testString)
+        self.assertEqual([p.perk.perkName for p in resultMatch.perks], ['Tinkerer', 'Enduring', 'Lightborn'])
+        self.assertEqual(resultMatch.killerAddons[0].killerAddon.addonName, 'Apex Muffler')
+        self.assertEqual(resultMatch.gameMap.mapName, 'Rancid Abattoir')
+        self.assertEqual(resultMatch.offering.offeringName, 'Black Ward')
+
+    def test_parseGame_fuzzyMatching_failWhen_nameTooDifferent(self):
+        testString = "Hillbilly, 2 kills, (tinkerer I, enduring III, lightborn III), 23196 points, " \
+                     "add ons: muffler, map: rancid abattoir, offering: black ward, " \
+                     "survivors: [Jeff, Yui: sacrificed, David: sacrificed, Meg], rank: 6"
+        fuzzyParser = DBDMatchParser(self.resources, fuzzyMatching=True)
+        fuzzyParser.setMatchDate(date(2021, 5, 21))
+        self.assertRaises(AssertionError, fuzzyParser.parse, testString)
+
     #todo: make tests for when there is no map, rank, party size etc. information
\ No newline at end of file
@@ -0,0 +1,179 @@
+#StatisticsCalculator as it was before the statistics were computed from MatchFrames, kept to check the vectorized
+#calculations against. it works on object columns built from the mapped matches
+from collections import defaultdict
+from functools import reduce
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from classutil import DBDResources
+from models import SurvivorMatch, KillerMatch, Survivor, GameMap, SurvivorMatchResult
+from statistics import EliminationInfo, FavouriteKillerInfo, CommonKillerInfo, LethalKillerInfo, CommonSurvivorInfo, \
+    MapInfo, MapRealmInfo, ItemTypeInfo, GeneralMatchStatistics, KillerMatchStatistics, SurvivorMatchStatistics
+
+
+class ReferenceStatisticsCalculator(object):
+
+    def __init__(self, killerGames: Iterable[KillerMatch], survivorGames: Iterable[SurvivorMatch], resources: DBDResources):
+        self.resources = resources
+        dictMapper = lambda g: g.asDict()
+        generalColumns = ["points", "map", "offering", "date", "rank"]
+        killerColumns = ["killer", "perks", "survivors", "addons", "sacrifices", "kills", "disconnects"]
+        survivorColumns = ["survivor", "faced killer", "item", "match result", "party size", "perks", "addons"]
+        self.survivorGamesDf = pd.DataFrame(data=map(dictMapper, survivorGames), columns=generalColumns + survivorColumns)
+        self.killerGamesDf = pd.DataFrame(data=map(dictMapper, killerGames), columns=generalColumns + killerColumns)
+
+    def calculateKillerGeneral(self) -> Optional[KillerMatchStatistics]:
+        if self.killerGamesDf.empty:
+            return None
+        totalMoris = self.killerGamesDf['kills'].sum()
+        totalSacrifices = self.killerGamesDf['sacrifices'].sum()
+        totalDcs = self.killerGamesDf['disconnects'].sum()
+        totalGamesWithKiller = self.killerGamesDf.groupby('killer', sort=False).size().to_dict()
+
+        favouriteKiller = max(totalGamesWithKiller, key=totalGamesWithKiller.get)
+        favouriteKillerInfo = FavouriteKillerInfo(killer=favouriteKiller, gamesWithKiller=totalGamesWithKiller[favouriteKiller],
+                                                  totalGames=self.killerGamesDf.shape[0])
+
+        averagePoints = self.killerGamesDf['points'].sum() // self.killerGamesDf.shape[0]
+
+        flatSurvivorList = reduce(lambda x, y: x + y, self.killerGamesDf['survivors'].tolist(), [])
+
+        totalSurvivorStatesDict = defaultdict(int)
+        facedSurvivorStatesHistogram = defaultdict(lambda: defaultdict(int))
+
+        for fs in flatSurvivorList:
+            totalSurvivorStatesDict[fs.state] += 1
+            facedSurvivorStatesHistogram[fs.facedSurvivor][fs.state] += 1
+
+        totalEliminationsInfo = EliminationInfo(sacrifices=totalSacrifices, kills=totalMoris, disconnects=totalDcs)
+
+        uniquePlayedKillers = self.killerGamesDf["killer"].unique()
+
+        totalKillerEliminations = {k: EliminationInfo(0,0,0) for k in uniquePlayedKillers}
+        for killer in totalKillerEliminations.keys():
+            df = self.killerGamesDf[self.killerGamesDf["killer"] == killer]
+            totalKillerEliminations[killer] += EliminationInfo(df["sacrifices"].sum(), df["kills"].sum(), df["disconnects"].sum())
+
+        killerAverageKillsPerMatch = {k: 0 for k in uniquePlayedKillers}
+        for killer in killerAverageKillsPerMatch.keys():
+            df = self.killerGamesDf[self.killerGamesDf["killer"] == killer]
+            totalEliminations = df["kills"].sum() + df["sacrifices"].sum() + df["disconnects"].sum()
+            killerAverageKillsPerMatch[killer] = totalEliminations / totalGamesWithKiller[killer]
+
+        facedSurvivorsDf = pd.DataFrame(data=map(lambda _fs: _fs.facedSurvivor, flatSurvivorList))
+        facedSurvivorHistogram = facedSurvivorsDf["survivorName"].value_counts()
+        mostCommonSurvivor = next(s for s in self.resources.survivors if s.survivorName == facedSurvivorHistogram.idxmax())
+        leastCommonSurvivor = next(s for s in self.resources.survivors if s.survivorName == facedSurvivorHistogram.idxmin())
+        facedSurvivorsDict = facedSurvivorHistogram.to_dict()
+
+        def survivorGamesCount(surv: Survivor):
+            mask = self.killerGamesDf["survivors"].apply(lambda x: any(y.facedSurvivor == surv for y in x))
+            return self.killerGamesDf[mask].shape[0]
+
+        mostCommonSurvivorGames = survivorGamesCount(mostCommonSurvivor)
+        leastCommonSurvivorGames = survivorGamesCount(leastCommonSurvivor)
+        mostCommonSurvivorInfo = CommonSurvivorInfo(survivor=mostCommonSurvivor, encounters=facedSurvivorsDict[mostCommonSurvivor.survivorName], totalGames=mostCommonSurvivorGames)
+        leastCommonSurvivorInfo = CommonSurvivorInfo(survivor=leastCommonSurvivor, encounters=facedSurvivorsDict[leastCommonSurvivor.survivorName], totalGames=leastCommonSurvivorGames)
+
+        return KillerMatchStatistics(totalEliminationsInfo=totalEliminationsInfo, gamesPlayedWithKiller=totalGamesWithKiller,
+                                            totalSurvivorStatesHistogram=totalSurvivorStatesDict, facedSurvivorStatesHistogram=facedSurvivorStatesHistogram,
+                                            averagePointsPerMatch=averagePoints, totalKillerEliminations=totalKillerEliminations,
+                                            favouriteKillerInfo=favouriteKillerInfo, averageKillerKillsPerMatch=killerAverageKillsPerMatch,
+                                            mostCommonSurvivorData=mostCommonSurvivorInfo, leastCommonSurvivorData=leastCommonSurvivorInfo,
+                                            totalGames=self.killerGamesDf.shape[0])
+
+    def calculateSurvivorGeneral(self) -> Optional[SurvivorMatchStatistics]:
+        if self.survivorGamesDf.empty:
+            return None
+        survivorGamesHistogram = self.survivorGamesDf.groupby('survivor', sort=False).size().to_dict()
+        facedKillerHistogram = self.survivorGamesDf.groupby('faced killer', sort=False).size()
+        facedKillerHistogramDict = facedKillerHistogram.to_dict()
+        averagePoints = self.survivorGamesDf['points'].sum() // self.survivorGamesDf.shape[0]
+        mostCommonKiller = facedKillerHistogram.idxmax()
+        leastCommonKiller = facedKillerHistogram.idxmin()
+        itemsHistogram = self.survivorGamesDf.groupby('item', sort=False).size()
+        itemTypesHistogram = defaultdict(int)
+        for index, count in itemsHistogram.iteritems():
+            itemTypesHistogram[index.itemType] += count
+        mostCommonItemType = max(itemTypesHistogram, key=itemTypesHistogram.get)
+        mostCommonItemTypeInfo = ItemTypeInfo(itemType=mostCommonItemType, totalGames=self.survivorGamesDf.shape[0], gamesWithItemType=itemTypesHistogram[mostCommonItemType])
+        facedKillerMatchResults = self.survivorGamesDf.groupby(["faced killer", "match result"], sort=False).size()
+        lossResults = (SurvivorMatchResult.Sacrificed, SurvivorMatchResult.Killed, SurvivorMatchResult.Camped,
+                       SurvivorMatchResult.Dead, SurvivorMatchResult.Tunnelled)
+        killerEliminations = defaultdict(int)
+        for index, count in facedKillerMatchResults.iteritems():
+            killer, result = index
+            killerEliminations[killer] += int(result in lossResults)
+        lethalityMapper = lambda k: killerEliminations[k] / facedKillerHistogramDict[k] #that name, lmao
+        mostLethalKiller = max(killerEliminations, key=lethalityMapper)
+        leastLethalKiller = min(killerEliminations, key=lethalityMapper)
+        matchResultsHistogram = self.survivorGamesDf.groupby('match result', sort=False).size().to_dict()
+        mostLethalKillerInfo = LethalKillerInfo(killer=mostLethalKiller, deathsCount=killerEliminations[mostLethalKiller],
+                                                    totalGames=facedKillerHistogramDict[mostLethalKiller],
+                                                    killRatio=killerEliminations[mostLethalKiller] / facedKillerHistogramDict[mostLethalKiller])
+        mostCommonKillerInfo = CommonKillerInfo(killer=mostCommonKiller,
+                                                    encounters=facedKillerHistogramDict[mostCommonKiller],
+                                                    totalGames=self.survivorGamesDf.shape[0])
+        leastLethalKillerInfo = LethalKillerInfo(killer=leastLethalKiller, deathsCount=killerEliminations[leastLethalKiller],
+                                                 totalGames=facedKillerHistogramDict[leastLethalKiller],
+                                                 killRatio=killerEliminations[leastLethalKiller] / facedKillerHistogramDict[leastLethalKiller])
+        leastCommonKillerInfo = CommonKillerInfo(killer=leastCommonKiller,
+                                                 encounters=facedKillerHistogramDict[leastCommonKiller],
+                                                 totalGames=self.survivorGamesDf.shape[0])
+
+        survivorMatchResults = defaultdict(lambda: defaultdict(int))
+        for survivor, result in zip(self.survivorGamesDf["survivor"], self.survivorGamesDf["match result"]):
+            survivorMatchResults[survivor][result] += 1
+
+        return SurvivorMatchStatistics(gamesPlayedWithSurvivor=survivorGamesHistogram, averagePointsPerMatch=averagePoints,
+                                              matchResultsHistogram=matchResultsHistogram, mostCommonItemTypeData=mostCommonItemTypeInfo,
+                                              mostCommonKillerData=mostCommonKillerInfo, mostLethalKillerData=mostLethalKillerInfo,
+                                              leastCommonKillerData=leastCommonKillerInfo, leastLethalKillerData=leastLethalKillerInfo,
+                                              totalGames=self.survivorGamesDf.shape[0], facedKillerHistogram=facedKillerHistogramDict,
+                                              survivorsMatchResultsHistogram=survivorMatchResults)
+
+
+    def calculateGeneral(self) -> GeneralMatchStatistics:
+        totalGames = self.survivorGamesDf.shape[0] + self.killerGamesDf.shape[0]
+
+        survivorPoints = self.survivorGamesDf['points'].sum() if not self.survivorGamesDf.empty else 0
+        killerPoints = self.killerGamesDf['points'].sum() if not self.killerGamesDf.empty else 0
+        totalPoints = survivorPoints + killerPoints
+        x = self.survivorGamesDf.shape[0] + self.killerGamesDf.shape[0]
+        averagePoints = totalPoints // (1 if x == 0 else x)
+
+        survivorMapHistogram = self.survivorGamesDf.groupby('map',sort=False).size()
+        killerMapHistogram = self.killerGamesDf.groupby('map',sort=False).size()
+
+        totalMapHistogram = pd.concat([survivorMapHistogram,killerMapHistogram],axis=1).fillna(value=0)
+        totalMapHistogram = pd.DataFrame(data=(totalMapHistogram[0] + totalMapHistogram[1]).astype(int), columns=['count'])
+
+        totalGamesWithMapPresent = totalMapHistogram['count'].sum()
+
+        mostCommonMap: GameMap = totalMapHistogram.idxmax()[0] if not totalMapHistogram.empty else None
+        leastCommonMap: GameMap = totalMapHistogram.idxmin()[0] if not totalMapHistogram.empty else None
+
+        realmsDict = defaultdict(int)
+        for row in totalMapHistogram.itertuples():
+            realmsDict[row.Index.realm] += row.count
+
+        mostCommonRealm = max(realmsDict, key=realmsDict.get) if len(realmsDict) > 0 else None
+        leastCommonRealm = min(realmsDict, key=realmsDict.get) if len(realmsDict) > 0 else None
+
+        mostCommonMapGames = totalMapHistogram[totalMapHistogram.index == mostCommonMap]['count'][0] if not totalMapHistogram.empty else 0
+        leastCommonMapGames = totalMapHistogram[totalMapHistogram.index == leastCommonMap]['count'][0] if not totalMapHistogram.empty else 0
+
+        mostCommonRealmGames = realmsDict[mostCommonRealm] if len(realmsDict) > 0 else 0
+        leastCommonRealmGames = realmsDict[leastCommonRealm] if len(realmsDict) > 0 else 0
+
+        mostCommonMapInfo = MapInfo(totalGames=totalGamesWithMapPresent, map=mostCommonMap, mapGames=mostCommonMapGames)
+        leastCommonMapInfo = MapInfo(totalGames=totalGamesWithMapPresent, map=leastCommonMap, mapGames=leastCommonMapGames)
+        mostCommonRealmInfo = MapRealmInfo(totalGames=totalGamesWithMapPresent, realm=mostCommonRealm, realmGames=mostCommonRealmGames)
+        leastCommonRealmInfo = MapRealmInfo(totalGames=totalGamesWithMapPresent, realm=leastCommonRealm, realmGames=leastCommonRealmGames)
+
+        return GeneralMatchStatistics(averagePointsPerMatch=averagePoints, totalGames=totalGames, totalPoints=totalPoints,
+                                      mostCommonMapData=mostCommonMapInfo, mostCommonMapRealmData=mostCommonRealmInfo,
+                                      leastCommonMapData=leastCommonMapInfo, leastCommonMapRealmData=leastCommonRealmInfo)
+
+
@@ -0,0 +1,460 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+import pandas as pd
+
+from classutil import matchFromRecord
+from database import Database
+from models import *
+from statistics import StatisticsCalculator, MatchFrames, MISSING_ID, matchAggregates, StatisticsCache, StatisticsGroup, \
+    StatisticsFilter, MatchTimeSeries, TimeSeriesPeriod
+from StatisticsWindow import StatisticsWorker
+from statisticsreference import ReferenceStatisticsCalculator
+
+
+def randomRecords(resources, count: int, seed: int = 0) -> list[tuple]:
+    #match records with skewed character, map and result choices, so the most and least common ones are clear
+    rng = random.Random(seed)
+    weighted = lambda items: rng.choices(items, weights=range(len(items), 0, -1))[0]
+    killers, survivors = resources.killers[:12], resources.survivors[:15]
+    maps = [m for r in resources.realms for m in r.maps][:20]
+    killerPerks = [p for p in resources.perks if p.perkType == PerkType.Killer][:30]
+    survivorPerks = [p for p in resources.perks if p.perkType == PerkType.Survivor][:30]
+    itemAddons = [a for a in resources.addons if isinstance(a, ItemAddon)]
+    records = []
+    for i in range(count):
+        matchDate = date(2021, 1, 1) + timedelta(days=i // 10)
+        offering = rng.choice(resources.offerings + [None])
+        gameMap = weighted(maps + [None])
+        rank = rng.choice([1, 5, 10, 20, None])
+        if i % 3 != 2:
+            killer = weighted(killers)
+            addons = [a for a in resources.addons if isinstance(a, KillerAddon) and a.killer == killer][:2]
+            states = [weighted(list(FacedSurvivorState)).value for _ in range(4)]
+            facedSurvivors = tuple((weighted(survivors).survivorID, state) for state in states)
+            sacrifices = sum(s == FacedSurvivorState.Sacrificed.value for s in states)
+            kills = sum(s == FacedSurvivorState.Killed.value for s in states)
+            disconnects = sum(s == FacedSurvivorState.Disconnected.value for s in states)
+            records.append((KillerMatch, killer.killerID, matchDate, rng.randint(5000, 32000), rank,
+                            offering.offeringID if offering else None, gameMap.mapID if gameMap else None,
+                            tuple(p.perkID for p in rng.sample(killerPerks, 4)), tuple(a.addonID for a in addons),
+                            sacrifices, kills, disconnects, facedSurvivors))
+        else:
+            item = rng.choice(resources.items + [None])
+            addons = [a for a in itemAddons if item is not None and a.itemType == item.itemType][:2]
+            records.append((SurvivorMatch, weighted(survivors).survivorID, matchDate, rng.randint(5000, 32000), rank,
+                            offering.offeringID if offering else None, gameMap.mapID if gameMap else None,
+                            tuple(p.perkID for p in rng.sample(survivorPerks, 4)), tuple(a.addonID for a in addons),
+                            weighted(killers).killerID, item.itemID if item else None, weighted(list(SurvivorMatchResult)).value,
+                            rng.choice([1, 2, 3, 4])))
+    return records
+
+
+class TestStatistics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        Database.close()
+        cls.tempDir = tempfile.TemporaryDirectory()
+        dbPath = os.path.join(cls.tempDir.name, 'test.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', dbPath)
+        Database.init(f'sqlite:///{dbPath}')
+        cls.resources = Database.instance().referenceData
+        cls.records = randomRecords(cls.resources, 3000)
+        Database.instance().saveMatchRecords(cls.records)
+        cls.matches = [matchFromRecord(r, cls.resources) for r in cls.records]
+        cls.killerMatches = [m for m in cls.matches if isinstance(m, KillerMatch)]
+        cls.survivorMatches = [m for m in cls.matches if isinstance(m, SurvivorMatch)]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        Database.close()
+        cls.tempDir.cleanup()
+
+    def test_loadMatchFrames_sameAsFramesFromRecords(self):
+        loaded = Database.instance().loadMatchFrames()
+        expected = MatchFrames.fromRecords(self.records)
+        for name in ('killerMatches', 'facedSurvivors', 'killerPerks', 'killerAddons', 'survivorMatches', 'survivorPerks', 'itemAddons'):
+            loadedFrame, expectedFrame = getattr(loaded, name).copy(), getattr(expected, name)
+            self.assertEqual(dict(loadedFrame.dtypes), dict(expectedFrame.dtypes), name)
+            self.assertEqual(len(loadedFrame), len(expectedFrame), name)
+            #saved matches are numbered from their first id on, in record order
+            loadedFrame['matchID'] -= loadedFrame['matchID'].min() if len(loadedFrame) > 0 else 0
+            self.assertTrue(loadedFrame.reset_index(drop=True).equals(expectedFrame), name)
+        self.assertTrue((loaded.survivorMatches['itemID'] == MISSING_ID).any())
+        self.assertEqual(set(loaded.facedSurvivors['state']), {s.value for s in FacedSurvivorState})
+
+    def test_fromFrames_sameStatisticsAsFromMatches(self):
+        fromMatches = StatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources)
+        fromFrames = StatisticsCalculator.fromFrames(Database.instance().loadMatchFrames(), self.resources)
+        self.assertEqual(fromFrames.calculateGeneral(), fromMatches.calculateGeneral())
+        self.assertEqual(fromFrames.calculateKillerGeneral(), fromMatches.calculateKillerGeneral())
+        self.assertEqual(fromFrames.calculateSurvivorGeneral(), fromMatches.calculateSurvivorGeneral())
+
+    def test_calculateKillerGeneral_sameAsReference(self):
+        expected = ReferenceStatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources).calculateKillerGeneral()
+        actual = StatisticsCalculator.fromFrames(Database.instance().loadMatchFrames(), self.resources).calculateKillerGeneral()
+        self.assertEqual(actual, expected)
+        #histograms list killers and survivors in the order they were first seen, the charts show them in that order
+        self.assertEqual(list(actual.gamesPlayedWithKiller), list(expected.gamesPlayedWithKiller))
+        self.assertEqual(list(actual.totalKillerEliminations), list(expected.totalKillerEliminations))
+        self.assertEqual(list(actual.facedSurvivorStatesHistogram), list(expected.facedSurvivorStatesHistogram))
+        self.assertEqual([list(h) for h in actual.facedSurvivorStatesHistogram.values()], [list(h) for h in expected.facedSurvivorStatesHistogram.values()])
+
+    def test_calculateSurvivorGeneral_sameAsReference(self):
+        expected = ReferenceStatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources).calculateSurvivorGeneral()
+        actual = StatisticsCalculator.fromFrames(Database.instance().loadMatchFrames(), self.resources).calculateSurvivorGeneral()
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(actual.gamesPlayedWithSurvivor), list(expected.gamesPlayedWithSurvivor))
+        self.assertEqual(list(actual.facedKillerHistogram), list(expected.facedKillerHistogram))
+        self.assertEqual(list(actual.matchResultsHistogram), list(expected.matchResultsHistogram))
+        self.assertEqual(list(actual.survivorsMatchResultsHistogram), list(expected.survivorsMatchResultsHistogram))
+        self.assertEqual([list(h) for h in actual.survivorsMatchResultsHistogram.values()], [list(h) for h in expected.survivorsMatchResultsHistogram.values()])
+
+    def test_calculateGeneral_sameAsReference(self):
+        expected = ReferenceStatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources).calculateGeneral()
+        actual = StatisticsCalculator.fromFrames(Database.instance().loadMatchFrames(), self.resources).calculateGeneral()
+        self.assertEqual(actual, expected)
+        self.assertIsNotNone(actual.leastCommonMapData.map)
+
+    def test_calculate_sameAsReferenceForEachMatchType(self):
+        for killerMatches, survivorMatches in ((self.killerMatches, []), ([], self.survivorMatches), (self.killerMatches[:1], self.survivorMatches[:1])):
+            calculator = StatisticsCalculator(killerMatches, survivorMatches, self.resources)
+            reference = ReferenceStatisticsCalculator(killerMatches, survivorMatches, self.resources)
+            self.assertEqual(calculator.calculateGeneral(), reference.calculateGeneral())
+            self.assertEqual(calculator.calculateKillerGeneral(), reference.calculateKillerGeneral())
+            self.assertEqual(calculator.calculateSurvivorGeneral(), reference.calculateSurvivorGeneral())
+
+    def test_calculateGeneral_noMaps(self):
+        records = [r[:6] + (None,) + r[7:] for r in self.records[:30]]
+        matches = [matchFromRecord(r, self.resources) for r in records]
+        killerMatches, survivorMatches = [m for m in matches if isinstance(m, KillerMatch)], [m for m in matches if isinstance(m, SurvivorMatch)]
+        stats = StatisticsCalculator(killerMatches, survivorMatches, self.resources).calculateGeneral()
+        self.assertEqual(stats, ReferenceStatisticsCalculator(killerMatches, survivorMatches, self.resources).calculateGeneral())
+        self.assertIsNone(stats.mostCommonMapData.map)
+        self.assertEqual(stats.leastCommonMapRealmData.realmGames, 0)
+
+    def test_calculateKillerGeneral_survivorFacedTwiceInAMatch(self):
+        survivor = self.resources.survivors[0]
+        records = [r for r in self.records if r[0] is KillerMatch][:2]
+        records[0] = records[0][:12] + (tuple((survivor.survivorID, s) for _, s in records[0][12]),)
+        killerMatches = [matchFromRecord(r, self.resources) for r in records]
+        stats = StatisticsCalculator(killerMatches, [], self.resources).calculateKillerGeneral()
+        self.assertEqual(stats, ReferenceStatisticsCalculator(killerMatches, [], self.resources).calculateKillerGeneral())
+        self.assertEqual(stats.mostCommonSurvivorData.survivor, survivor)
+        self.assertEqual(stats.mostCommonSurvivorData.totalGames, 1 + (survivor in [fs.facedSurvivor for fs in killerMatches[1].facedSurvivors]))
+
+    def test_calculateKillerGeneral_noFacedSurvivors(self):
+        records = [r[:12] + ((),) for r in self.records if r[0] is KillerMatch][:5]
+        killerMatches = [matchFromRecord(r, self.resources) for r in records]
+        stats = StatisticsCalculator(killerMatches, [], self.resources).calculateKillerGeneral()
+        self.assertIsNone(stats.mostCommonSurvivorData)
+        self.assertIsNone(stats.leastCommonSurvivorData)
+        self.assertEqual(stats.totalGames, 5)
+
+    def test_worker_calculatesEveryGroupOnce(self):
+        frames = Database.instance().loadMatchFrames()
+        expected = StatisticsCalculator.fromFrames(frames, self.resources)
+        groups, finished = [], []
+        worker = StatisticsWorker(lambda: StatisticsCalculator.fromFrames(frames, self.resources))
+        worker.groupCalculated.connect(lambda group, statistics: groups.append((group, statistics)))
+        worker.calculationFinished.connect(lambda *statistics: finished.append(statistics))
+        worker.run()
+        self.assertCountEqual([g for g, _ in groups], list(StatisticsGroup))
+        self.assertEqual(finished[0], tuple(expected.calculate(g) for g in StatisticsGroup))
+        self.assertEqual(finished[0], tuple(dict(groups)[g] for g in StatisticsGroup))
+
+    def test_worker_emitsOneSidedStatisticsAndErrors(self):
+        finished, failed = [], []
+        worker = StatisticsWorker(lambda: StatisticsCalculator(self.killerMatches, [], self.resources))
+        worker.calculationFinished.connect(lambda *statistics: finished.append(statistics))
+        worker.run()
+        self.assertIsNone(finished[0][2])
+        def failingCalculator() -> StatisticsCalculator:
+            raise ValueError('no matches')
+        worker = StatisticsWorker(failingCalculator)
+        worker.calculationFinished.connect(lambda *statistics: finished.append(statistics))
+        worker.calculationFailed.connect(failed.append)
+        worker.run()
+        self.assertEqual(len(finished), 1)
+        self.assertEqual(failed, ['ValueError: no matches'])
+
+    def test_fromAggregates_sameAsReference(self):
+        expected = ReferenceStatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources)
+        actual = StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(), self.resources)
+        self.assertEqual(actual.calculateGeneral(), expected.calculateGeneral())
+        self.assertEqual(actual.calculateKillerGeneral(), expected.calculateKillerGeneral())
+        self.assertEqual(actual.calculateSurvivorGeneral(), expected.calculateSurvivorGeneral())
+        self.assertEqual(list(actual.calculateGeneral().__dict__), list(expected.calculateGeneral().__dict__))
+        self.assertEqual(list(actual.calculateKillerGeneral().facedSurvivorStatesHistogram), list(expected.calculateKillerGeneral().facedSurvivorStatesHistogram))
+        self.assertEqual(list(actual.calculateSurvivorGeneral().facedKillerHistogram), list(expected.calculateSurvivorGeneral().facedKillerHistogram))
+
+    def test_loadMatchAggregates_sameCountersAsFrames(self):
+        columns = ['kind', 'keyID', 'subKeyID', 'games', 'points', 'sacrifices', 'kills', 'disconnects']
+        stored = Database.instance().loadMatchAggregates()
+        counted = matchAggregates(Database.instance().loadMatchFrames())
+        self.assertEqual(sorted(stored[columns].itertuples(index=False)), sorted(counted[columns].itertuples(index=False)))
+        self.assertEqual(stored['games'][stored['kind'] == AggregateKind.DateGames.value].sum(), len(self.records))
+        self.assertTrue(Database.instance().checkMatchAggregates())
+
+    def test_loadMatchAggregates_filteredSameAsReferenceOfSelectedMatches(self):
+        killers, survivors = self.resources.killers[:3], self.resources.survivors[:4]
+        statisticsFilter = StatisticsFilter(startDate=date(2021, 2, 1), endDate=date(2021, 6, 30), minRank=1, maxRank=10,
+                                            killerIDs=frozenset(k.killerID for k in killers), survivorIDs=frozenset(s.survivorID for s in survivors),
+                                            partySizes=frozenset([1, 2]))
+        selected = lambda m: date(2021, 2, 1) <= m.matchDate <= date(2021, 6, 30) and m.rank is not None and 1 <= m.rank <= 10
+        killerMatches = [m for m in self.killerMatches if selected(m) and m.killer in killers]
+        survivorMatches = [m for m in self.survivorMatches if selected(m) and m.facedKiller in killers and m.survivor in survivors and m.partySize in (1, 2)]
+        self.assertTrue(len(killerMatches) > 0 and len(survivorMatches) > 0)
+        expected = ReferenceStatisticsCalculator(killerMatches, survivorMatches, self.resources)
+        fromAggregates = StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(statisticsFilter), self.resources)
+        frames = Database.instance().loadMatchFrames(statisticsFilter)
+        self.assertEqual((len(frames.killerMatches), len(frames.survivorMatches)), (len(killerMatches), len(survivorMatches)))
+        self.assertEqual(len(frames.facedSurvivors), sum(len(m.facedSurvivors) for m in killerMatches))
+        self.assertTrue(frames.survivorPerks['matchID'].isin(frames.survivorMatches['matchID']).all())
+        for actual in (fromAggregates, StatisticsCalculator.fromFrames(frames, self.resources)):
+            self.assertEqual(actual.calculateGeneral(), expected.calculateGeneral())
+            self.assertEqual(actual.calculateKillerGeneral(), expected.calculateKillerGeneral())
+            self.assertEqual(actual.calculateSurvivorGeneral(), expected.calculateSurvivorGeneral())
+
+    def test_loadMatchAggregates_filterWithoutMatches(self):
+        self.assertTrue(Database.instance().loadMatchAggregates(StatisticsFilter()).equals(Database.instance().loadMatchAggregates()))
+        calculator = StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(StatisticsFilter(startDate=date(2030, 1, 1))), self.resources)
+        self.assertEqual(calculator.calculateGeneral().totalGames, 0)
+        self.assertIsNone(calculator.calculateKillerGeneral())
+        self.assertIsNone(calculator.calculateSurvivorGeneral())
+        #survivor matches that all went without items
+        itemless = StatisticsCalculator([], [m for m in self.survivorMatches if m.item is None][:5], self.resources).calculateSurvivorGeneral()
+        self.assertIsNone(itemless.mostCommonItemTypeData.itemType)
+
+    def test_fromMatches_framesLookUpToMatchResources(self):
+        calculator = StatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources)
+        frames, lookup = calculator.frames, calculator.lookup
+        self.assertEqual(frames.killerMatches['killerID'].map(lookup.killers).tolist(), [m.killer for m in self.killerMatches])
+        facedSurvivors = frames.facedSurvivors.groupby('matchID', sort=False)
+        self.assertEqual([list(zip(g['survivorID'].map(lookup.survivors), g['state'].map(FacedSurvivorState))) for _, g in facedSurvivors],
+                         [[(fs.facedSurvivor, fs.state) for fs in m.facedSurvivors] for m in self.killerMatches])
+        self.assertEqual(frames.survivorMatches['gameMapID'].map(lookup.gameMaps).where(frames.survivorMatches['gameMapID'] != MISSING_ID, None).tolist(),
+                         [m.gameMap for m in self.survivorMatches])
+        self.assertEqual(frames.survivorMatches['matchResult'].map(SurvivorMatchResult).tolist(), [m.matchResult for m in self.survivorMatches])
+        self.assertEqual(frames.survivorMatches['itemID'].map(lookup.itemTypes).dropna().map(ItemType).tolist(),
+                         [m.item.itemType for m in self.survivorMatches if m.item is not None])
+
+    def test_fromMatches_compactColumnTypes(self):
+        frames = StatisticsCalculator(self.killerMatches, self.survivorMatches, self.resources).frames
+        self.assertEqual(str(frames.killerMatches['killerID'].dtype), 'int16')
+        self.assertEqual(str(frames.facedSurvivors['matchID'].dtype), 'int32')
+        self.assertEqual(frames.facedSurvivors['state'].dtype, pd.CategoricalDtype([s.value for s in FacedSurvivorState]))
+        self.assertEqual(frames.survivorMatches['matchResult'].dtype, pd.CategoricalDtype([r.value for r in SurvivorMatchResult]))
+        #sums widen again, so totals cannot overflow the small column types
+        self.assertEqual(frames.killerMatches['points'].sum(), sum(m.points for m in self.killerMatches))
+
+    def test_emptyHistory(self):
+        calculator = StatisticsCalculator([], [], self.resources)
+        self.assertIsNone(calculator.calculateKillerGeneral())
+        self.assertIsNone(calculator.calculateSurvivorGeneral())
+        self.assertEqual(calculator.calculateGeneral().totalGames, 0)
+
+
+class TestMatchAggregates(unittest.TestCase):
+
+    def setUp(self) -> None:
+        Database.close()
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dbPath = os.path.join(self.tempDir.name, 'test.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', self.dbPath)
+        Database.init(f'sqlite:///{self.dbPath}')
+        self.resources = Database.instance().referenceData
+        self.records = randomRecords(self.resources, 300, seed=1)
+
+    def tearDown(self) -> None:
+        Database.close()
+        self.tempDir.cleanup()
+
+    def aggregateRows(self) -> list[tuple]:
+        return sorted(Database.instance().loadMatchAggregates().itertuples(index=False))
+
+    def test_saveMatchRecords_chunksAddUpToOneSave(self):
+        Database.instance().saveMatchRecords(self.records)
+        oneSave = self.aggregateRows()
+        Database.close()
+        shutil.copyfile('../dbd-match-log-DEV.db', self.dbPath)
+        Database.init(f'sqlite:///{self.dbPath}')
+        for start in range(0, len(self.records), 70):
+            Database.instance().saveMatchRecords(self.records[start:start + 70])
+        self.assertEqual(self.aggregateRows(), oneSave)
+        self.assertTrue(Database.instance().checkMatchAggregates())
+
+    def test_checkMatchAggregates_rebuildsAfterSavesThatSkippedThem(self):
+        Database.instance().saveMatchRecords(self.records[:200])
+        with Database.instance().getNewSession() as s: #the ORM doesn't know about the aggregates
+            s.add_all([matchFromRecord(r, self.resources) for r in self.records[200:]])
+            s.commit()
+        self.assertFalse(Database.instance().checkMatchAggregates())
+        self.assertFalse(Database.instance().checkMatchAggregates(rebuild=True))
+        self.assertTrue(Database.instance().checkMatchAggregates())
+        matches = [matchFromRecord(r, self.resources) for r in self.records]
+        expected = ReferenceStatisticsCalculator([m for m in matches if isinstance(m, KillerMatch)], [m for m in matches if isinstance(m, SurvivorMatch)], self.resources)
+        actual = StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(), self.resources)
+        self.assertEqual(actual.calculateKillerGeneral(), expected.calculateKillerGeneral())
+        self.assertEqual(actual.calculateSurvivorGeneral(), expected.calculateSurvivorGeneral())
+
+    def test_init_countsMatchesOfDatabasesWithoutAggregates(self):
+        Database.instance().saveMatchRecords(self.records)
+        expected = self.aggregateRows()
+        with Database.instance()._engine.begin() as connection:
+            connection.exec_driver_sql('DROP TABLE match_aggregates')
+        Database.close()
+        Database.init(f'sqlite:///{self.dbPath}')
+        self.assertEqual(self.aggregateRows(), expected)
+
+    def test_emptyDatabase(self):
+        self.assertEqual(self.aggregateRows(), [])
+        self.assertTrue(Database.instance().checkMatchAggregates())
+        calculator = StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(), self.resources)
+        self.assertIsNone(calculator.calculateKillerGeneral())
+        self.assertEqual(calculator.calculateGeneral().totalGames, 0)
+
+
+class TestStatisticsCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        Database.close()
+        self.tempDir = tempfile.TemporaryDirectory()
+        dbPath = os.path.join(self.tempDir.name, 'test.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', dbPath)
+        Database.init(f'sqlite:///{dbPath}')
+        self.resources = Database.instance().referenceData
+        self.records = randomRecords(self.resources, 300, seed=2)
+        Database.instance().saveMatchRecords(self.records[:200])
+        self.cache = StatisticsCache(os.path.join(self.tempDir.name, 'statistics-cache.bin'))
+        self.calculatorsMade = 0
+
+    def tearDown(self) -> None:
+        Database.close()
+        self.tempDir.cleanup()
+
+    def calculator(self) -> StatisticsCalculator:
+        self.calculatorsMade += 1
+        return StatisticsCalculator.fromAggregates(Database.instance().loadMatchAggregates(), self.resources)
+
+    def runWorker(self) -> tuple:
+        emitted = []
+        worker = StatisticsWorker(self.calculator, self.cache, Database.instance().contentVersion())
+        worker.calculationFinished.connect(lambda *statistics: emitted.append(statistics))
+        groups = []
+        worker.groupCalculated.connect(lambda group, statistics: groups.append((group, statistics)))
+        worker.run()
+        self.assertEqual(tuple(dict(groups)[g] for g in StatisticsGroup), emitted[0]) #cached statistics are shown group by group too
+        return emitted[0]
+
+    def test_contentVersion_changesOnlyWithSaves(self):
+        version = Database.instance().contentVersion()
+        Database.instance().loadMatchAggregates()
+        self.assertEqual(Database.instance().contentVersion(), version)
+        Database.instance().saveMatchRecords(self.records[200:201])
+        self.assertNotEqual(Database.instance().contentVersion(), version)
+
+    def test_worker_calculatesOnlyAfterSaves(self):
+        first = self.runWorker()
+        self.assertEqual(self.calculatorsMade, 1)
+        self.assertEqual(self.runWorker(), first)
+        self.assertEqual(self.calculatorsMade, 1)
+        Database.instance().saveMatchRecords(self.records[200:])
+        third = self.runWorker()
+        self.assertEqual(self.calculatorsMade, 2)
+        self.assertEqual(third[0].totalGames, len(self.records))
+        self.assertEqual(third, tuple(getattr(self.calculator(), name)() for name in ('calculateGeneral', 'calculateKillerGeneral', 'calculateSurvivorGeneral')))
+
+    def test_load_ignoresOtherVersionsAndBrokenFiles(self):
+        statistics = (self.calculator().calculateGeneral(), None, None)
+        self.cache.store('a', statistics)
+        self.assertEqual(self.cache.load('a'), statistics)
+        self.assertIsNone(self.cache.load('b'))
+        with open(self.cache.path, 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(self.cache.load('a'))
+        self.assertIsNone(StatisticsCache(os.path.join(self.tempDir.name, 'missing.bin')).load('a'))
+
+
+class TestMatchTimeSeries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        Database.close()
+        cls.tempDir = tempfile.TemporaryDirectory()
+        dbPath = os.path.join(cls.tempDir.name, 'test.db')
+        shutil.copyfile('../dbd-match-log-DEV.db', dbPath)
+        Database.init(f'sqlite:///{dbPath}')
+        cls.resources = Database.instance().referenceData
+        cls.records = randomRecords(cls.resources, 2000, seed=3)
+        cls.matches = [matchFromRecord(r, cls.resources) for r in cls.records]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        Database.close()
+        cls.tempDir.cleanup()
+
+    def test_calculate_monthlyStatisticsOfTheMatches(self):
+        statistics, shares = MatchTimeSeries.fromFrames(MatchFrames.fromRecords(self.records)).calculate(TimeSeriesPeriod.Month)
+        month = pd.Period('2021-03', 'M')
+        matches = [m for m in self.matches if pd.Period(m.matchDate, 'M') == month]
+        killerMatches, survivorMatches = [m for m in matches if isinstance(m, KillerMatch)], [m for m in matches if isinstance(m, SurvivorMatch)]
+        row = statistics.loc[month]
+        self.assertEqual(row['games'], len(matches))
+        self.assertAlmostEqual(row['averagePoints'], sum(m.points for m in matches) / len(matches))
+        self.assertAlmostEqual(row['killRate'], sum(m.sacrifices + m.kills + m.disconnects for m in killerMatches) / sum(len(m.facedSurvivors) for m in killerMatches))
+        escapes = sum(m.matchResult in (SurvivorMatchResult.Escaped, SurvivorMatchResult.HatchEscape, SurvivorMatchResult.KeyEscape) for m in survivorMatches)
+        self.assertAlmostEqual(row['escapeRate'], escapes / len(survivorMatches))
+        killer = survivorMatches[0].facedKiller
+        self.assertAlmostEqual(shares.loc[month, killer.killerID], sum(m.facedKiller == killer for m in survivorMatches) / len(survivorMatches))
+        self.assertEqual(statistics['games'].sum(), len(self.matches))
+
+    def test_calculate_rollingWindowSumsThePeriodsBefore(self):
+        timeSeries = MatchTimeSeries.fromFrames(MatchFrames.fromRecords(self.records))
+        weekly, _ = timeSeries.calculate(TimeSeriesPeriod.Week)
+        rolling, _ = timeSeries.calculate(TimeSeriesPeriod.Week, 4)
+        self.assertTrue((weekly.index == rolling.index).all())
+        self.assertEqual(rolling['games'].tolist(), weekly['games'].rolling(4, min_periods=1).sum().astype('int64').tolist())
+        self.assertAlmostEqual(rolling['averagePoints'].iloc[10], (weekly['averagePoints'] * weekly['games']).iloc[7:11].sum() / weekly['games'].iloc[7:11].sum())
+
+    def test_append_sameAsCalculatingEverything(self):
+        expected = MatchTimeSeries.fromFrames(MatchFrames.fromRecords(self.records))
+        appended = MatchTimeSeries.fromFrames(MatchFrames.fromRecords(self.records[:1205]))
+        windows = [(period, window) for period in TimeSeriesPeriod for window in (1, 3)]
+        before = {key: appended.calculate(*key) for key in windows}
+        #the first batch ends in the middle of a day, the next one leaves out days that the last one fills in
+        appended.append(MatchFrames.fromRecords(self.records[1205:1500]))
+        appended.append(MatchFrames.fromRecords(self.records[1700:]))
+        appended.append(MatchFrames.fromRecords(self.records[1500:1700]))
+        for key in windows:
+            statistics, shares = appended.calculate(*key)
+            expectedStatistics, expectedShares = expected.calculate(*key)
+            pd.testing.assert_frame_equal(statistics, expectedStatistics, check_freq=False)
+            pd.testing.assert_frame_equal(shares, expectedShares, check_freq=False)
+            #periods the windows over the appended days don't reach are the ones calculated before
+            previous = before[key][0]
+            untouched = previous.index[previous.index < pd.Timestamp(self.records[1205][2]).to_period(key[0].value) - (key[1] - 1)]
+            pd.testing.assert_frame_equal(statistics.loc[untouched], previous.loc[untouched], check_freq=False)
+
+    def test_calculate_emptyAndOneSidedHistories(self):
+        statistics, shares = MatchTimeSeries.fromFrames(MatchFrames.fromRecords([])).calculate(TimeSeriesPeriod.Day, 7)
+        self.assertTrue(statistics.empty and shares.empty)
+        killerRecords = [r for r in self.records if r[0] is KillerMatch]
+        statistics, shares = MatchTimeSeries.fromFrames(MatchFrames.fromRecords(killerRecords)).calculate(TimeSeriesPeriod.Week)
+        self.assertEqual(statistics['games'].sum(), len(killerRecords))
+        self.assertTrue(statistics['escapeRate'].isna().all())
+        self.assertEqual(len(shares.columns), 0)
+
+    def test_worker_emitsTimeSeries(self):
+        emitted = []
+        frames = MatchFrames.fromRecords(self.records)
+        worker = StatisticsWorker(lambda: StatisticsCalculator.fromFrames(frames, self.resources),
+                                  timeSeriesFactory=lambda: MatchTimeSeries.fromFrames(frames))
+        worker.timeSeriesCalculated.connect(emitted.append)
+        worker.run()
+        self.assertEqual(emitted[0].calculate(TimeSeriesPeriod.Month)[0]['games'].sum(), len(self.records))
@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from util import levenshteinDistance, EditDistanceIndex
+
+
+class TestLevenshteinDistance(unittest.TestCase):
+
+    def test_levenshteinDistance_knownDistances(self):
+        self.assertEqual(levenshteinDistance('kitten', 'sitting'), 3)
+        self.assertEqual(levenshteinDistance('sitting', 'kitten'), 3)
+        self.assertEqual(levenshteinDistance('', 'abc'), 3)
+        self.assertEqual(levenshteinDistance('tinkerer', 'tinkerer'), 0)
+        self.assertEqual(levenshteinDistance('apex muffler', 'apex mufler'), 1)
+
+    def test_levenshteinDistance_stopsAboveMaxDistance(self):
+        self.assertGreater(levenshteinDistance('borrowed time', 'dead hard', maxDistance=2), 2)
+        self.assertEqual(levenshteinDistance('borrowed time', 'borowed tme', maxDistance=2), 2)
+
+    def test_levenshteinDistance_exactUpToMaxDistance(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            s1, s2 = (''.join(rng.choices('abc ', k=rng.randint(0, 10))) for _ in range(2))
+            maxDistance = rng.randint(0, 4)
+            distance = levenshteinDistance(s1, s2)
+            if distance <= maxDistance:
+                self.assertEqual(levenshteinDistance(s1, s2, maxDistance), distance, (s1, s2, maxDistance))
+            else:
+                self.assertGreater(levenshteinDistance(s1, s2, maxDistance), maxDistance, (s1, s2, maxDistance))
+
+
+class TestEditDistanceIndex(unittest.TestCase):
+
+    def test_search_sameAsLinearScan(self):
+        words = ['tinkerer', 'enduring', 'lightborn', 'dead hard', 'borrowed time', 'spine chill', 'sprint burst',
+                 'iron will', 'self-care', 'bond', 'kindred', 'deja vu', 'ruin', 'tinker']
+        index = EditDistanceIndex(words)
+        for query in ('tinkrer', 'bnd', 'spirnt burst', 'iron wil', 'xyz', 'kindred'):
+            for maxDistance in range(4):
+                expected = sorted((levenshteinDistance(query, w), w) for w in words if levenshteinDistance(query, w) <= maxDistance)
+                self.assertEqual(index.search(query, maxDistance), expected, (query, maxDistance))
+
+    def test_search_randomWordsSameAsLinearScan(self):
+        rng = random.Random(0)
+        words = [''.join(rng.choices('abcde ', k=rng.randint(1, 12))) for _ in range(300)]
+        index = EditDistanceIndex(words)
+        for query in words[:40] + ['', 'abcdeabcde']:
+            for maxDistance in range(4):
+                expected = sorted({(levenshteinDistance(query, w), w) for w in words if levenshteinDistance(query, w) <= maxDistance})
+                self.assertEqual(index.search(query, maxDistance), expected, (query, maxDistance))
+
+    def test_search_emptyIndex(self):
+        self.assertEqual(EditDistanceIndex([]).search('ruin', 2), [])